@@ -59,9 +59,19 @@ def main(annualHourlyData, analysisPeriod):
         
             # read analysis period
             stMonth, stDay, stHour, endMonth, endDay, endHour = lb_preparation.readRunPeriod(analysisPeriod)
+            selectedHours = lb_preparation.getPeriodIndices(analysisPeriod)
+            resampler = sc.sticky["ladybug_DataResampler"]()
             
-            def average(list):
-                return sum(list)/len(list)
+            # days and months of the analysis period
+            stJD = lb_preparation.getJD(stMonth, stDay)
+            endJD = lb_preparation.getJD(endMonth, endDay)
+            if lb_preparation.date2Hour(stMonth, stDay, stHour) < lb_preparation.date2Hour(endMonth, endDay, endHour):
+                selectedDays = range(stJD - 1, endJD)
+                selectedMonths = range(stMonth - 1, endMonth)
+            else:
+                # it goes from the end of the year to the start of the year
+                selectedDays = range(stJD - 1, 365) + range(endJD)
+                selectedMonths = range(stMonth - 1, 12) + range(endMonth)
         
             selHourlyData =[];
             selDailyData = []; avDailyData = []
@@ -72,21 +82,8 @@ def main(annualHourlyData, analysisPeriod):
                 selHourlyData.append('Hourly')
                 selHourlyData.append((stMonth, stDay, stHour))
                 selHourlyData.append((endMonth, endDay, endHour))
-                # select data
-                stAnnualHour = lb_preparation.date2Hour(stMonth, stDay, stHour)
-                endAnnualHour = lb_preparation.date2Hour(endMonth, endDay, endHour)
-                
-                # check it goes from the end of the year to the start of the year
-                if stAnnualHour < endAnnualHour:
-                    for i, item in enumerate(separatedLists[l][stAnnualHour-1:endAnnualHour]):
-                        if stHour-1 <= (i + stHour - 1)%24 <= endHour-1: selHourlyData.append(item)
-                    type = True
-                else:
-                    for i, item in enumerate(separatedLists[l][stAnnualHour-1:]):
-                        if stHour-1 <= (i + stHour - 1)%24 <= endHour-1: selHourlyData.append(item)
-                    for i, item in enumerate(separatedLists[l][:endAnnualHour]):
-                        if stHour-1 <= i %24 <= endHour-1: selHourlyData.append(item)
-                    type = False
+                selHourly = lb_preparation.selectValues(separatedLists[l], selectedHours)
+                selHourlyData.extend(selHourly)
                 
                 # add list informations
                 [selDailyData.append(item) for item in listInfo[l][:4]]
@@ -99,23 +96,11 @@ def main(annualHourlyData, analysisPeriod):
                 avDailyData.append((stMonth, stDay, stHour))
                 avDailyData.append((endMonth, endDay, endHour))
                 
-                if type:
-                    for JD in range(lb_preparation.getJD(stMonth,stDay), lb_preparation.getJD(endMonth,endDay) + 1):
-                        dailyData = separatedLists[l][lb_preparation.getHour(JD, stHour)-1 : lb_preparation.getHour(JD, endHour)]
-                        avDailyData.append(average(dailyData))
-                        for hour in range(endHour - stHour + 1): selDailyData.append(dailyData[hour])
-                else:
-                    for JD in range(lb_preparation.getJD(stMonth,stDay), 365 + 1):
-                        dailyData = separatedLists[l][lb_preparation.getHour(JD, stHour)-1 : lb_preparation.getHour(JD, endHour)]
-                        avDailyData.append(average(dailyData))
-                        for hour in range(endHour - stHour + 1): selDailyData.append(dailyData[hour])
-                    
-                    for JD in range(1, lb_preparation.getJD(endMonth,endDay) +1):
-                        dailyData = separatedLists[l][lb_preparation.getHour(JD, stHour)-1 : lb_preparation.getHour(JD, endHour)]
-                        avDailyData.append(average(dailyData))
-                        for hour in range(endHour - stHour + 1): selDailyData.append(dailyData[hour])
+                # the hours of each day of the period are the selected hours
+                selDailyData.extend(selHourly)
+                dailyAverages = resampler.aggregate(separatedLists[l], 'daily', 'mean', (stHour, endHour))
+                avDailyData.extend([dailyAverages[day] for day in selectedDays])
                 
-
                 # average monthly
                 [selMonthlyData.append(item) for item in listInfo[l][:4]]
                 selMonthlyData.append('Monthly-> averaged for each hour')
@@ -126,54 +111,18 @@ def main(annualHourlyData, analysisPeriod):
                 avMonthlyData.append('Monthly-> averaged')
                 avMonthlyData.append((stMonth, stDay, stHour))
                 avMonthlyData.append((endMonth, endDay, endHour))
-
-                monthDays = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31] 
-                if type:
-                    for month in range(stMonth, endMonth + 1):
-                        stJD = lb_preparation.getJD(month, 1)
-                        endJD = lb_preparation.getJD(month, monthDays[month])
-                        monthlyData = separatedLists[l][lb_preparation.getHour(stJD, stHour)-1 : lb_preparation.getHour(endJD , endHour)]
-                        selMonthly = []
-                        for i, item in enumerate(monthlyData):
-                            if stHour-1 <= (i + stHour -1)%24 <= endHour-1: selMonthly.append(item)
-                        
-                        avMonthlyData.append(average(selMonthly))
-                        
-                        for hour in range(endHour - stHour + 1):
-                            eachHourData = []
-                            for day in range(monthDays[month]):
-                                eachHourData.append(monthlyData[hour + (day * (endHour - stHour + 1))])
-                            selMonthlyData.append(average(eachHourData))
+                
+                # use the statistics of the data if it is imported from an epw file
+                statistics = lb_preparation.getHourlyStatistics(listInfo[l][2], listInfo[l][3], separatedLists[l])
+                if statistics != None:
+                    monthlyAverages = [statistics.monthlyMean(month + 1, stHour, endHour) for month in range(12)]
+                    hourlyAverages = statistics.monthlyPerHour('mean')
                 else:
-                    for month in range(stMonth, 12 + 1):
-                        stJD = lb_preparation.getJD(month, 1)
-                        endJD = lb_preparation.getJD(month, monthDays[month])
-                        
-                        #for item in 
-                        monthlyData = separatedLists[l][lb_preparation.getHour(stJD, stHour)-1 : lb_preparation.getHour(endJD , endHour)]
-                        selMonthly = []
-                        for i, item in enumerate(monthlyData):
-                            if stHour-1 <= (i + stHour -1)%24 <= endHour-1: selMonthly.append(item)
-                        
-                        avMonthlyData.append(average(selMonthly))
-                    
-                        for hour in range(endHour - stHour + 1):
-                            eachHourData = []
-                            for day in range(monthDays[month]):
-                                eachHourData.append(monthlyData[hour + (day * (endHour - stHour + 1))])
-                            selMonthlyData.append(average(eachHourData))
-                    
-                    for month in range(1, endMonth + 1):
-                        stJD = lb_preparation.getJD(month, 1)
-                        endJD = lb_preparation.getJD(month, monthDays[month])
-                        monthlyData = separatedLists[l][lb_preparation.getHour(stJD, stHour)-1 : lb_preparation.getHour(endJD , endHour)]
-                        avMonthlyData.append(average(monthlyData))
-                    
-                        for hour in range(endHour - stHour + 1):
-                            eachHourData = []
-                            for day in range(monthDays[month]):
-                                eachHourData.append(monthlyData[hour + (day * (endHour - stHour + 1))])
-                            selMonthlyData.append(average(eachHourData))
+                    monthlyAverages = resampler.aggregate(separatedLists[l], 'monthly', 'mean', (stHour, endHour))
+                    hourlyAverages = resampler.monthlyPerHour(separatedLists[l], 'mean')
+                for month in selectedMonths:
+                    avMonthlyData.append(monthlyAverages[month])
+                    selMonthlyData.extend(hourlyAverages[month][stHour - 1:endHour])
                 
             return selHourlyData, avDailyData, selDailyData, selWeeklyData, selMonthlyData, avMonthlyData
         else:
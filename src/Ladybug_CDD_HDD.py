@@ -74,6 +74,9 @@ def main(coolingSetPoint, heatingSetPoint, hourlyDryBulbTemperature, useDailyAvr
                 [selList.append(float(x)) for x in hourlyDBTemp[indexList[i]+7:indexList[i+1]]]
                 separatedLists.append(selList)
             
+            resampler = sc.sticky["ladybug_DataResampler"]()
+            dailyResampler = sc.sticky["ladybug_DataResampler"](stepsPerDay = 1)
+            
             daily_coolingDegDays = [];
             daily_heatingDegDays = [];
             monthly_coolingDegDays = [];
@@ -120,41 +123,43 @@ def main(coolingSetPoint, heatingSetPoint, hourlyDryBulbTemperature, useDailyAvr
                     
                     hourlyTemperature = separatedLists[l]
                     
-                    for day in range (int(len(hourlyTemperature)/24)):
-                        # 7 is for thr first 7 members of the list which are information
-                        dayHourlyTemp = hourlyTemperature[(day * 24):((day+1)*24)]
-                        if useDailyAvrMethod == True:
-                            dayAvrTemp = sum(dayHourlyTemp)/len(dayHourlyTemp)
+                    heatingDegDays = []
+                    coolingDegDays = []
+                    if useDailyAvrMethod == True:
+                        for dayAvrTemp in resampler.aggregate(hourlyTemperature, 'daily', 'mean'):
                             if dayAvrTemp < heatingSetPoint:
-                                daily_heatingDegDays.append(heatingSetPoint - dayAvrTemp)
-                            else: daily_heatingDegDays.append(0)
+                                heatingDegDays.append(heatingSetPoint - dayAvrTemp)
+                            else: heatingDegDays.append(0)
                             if coolingSetPoint < dayAvrTemp:
-                                daily_coolingDegDays.append(dayAvrTemp - coolingSetPoint)
-                            else: daily_coolingDegDays.append(0)
-                        else:
-                            minT = min(dayHourlyTemp)
-                            maxT = max(dayHourlyTemp)
-                            
+                                coolingDegDays.append(dayAvrTemp - coolingSetPoint)
+                            else: coolingDegDays.append(0)
+                    else:
+                        dailyMinT = resampler.aggregate(hourlyTemperature, 'daily', 'min')
+                        dailyMaxT = resampler.aggregate(hourlyTemperature, 'daily', 'max')
+                        for minT, maxT in zip(dailyMinT, dailyMaxT):
                             # heating degree days
-                            if minT > heatingSetPoint: daily_heatingDegDays.append(0)
-                            elif (maxT + minT)/2 > heatingSetPoint: daily_heatingDegDays.append((heatingSetPoint-minT)/4)
-                            elif maxT >= heatingSetPoint: daily_heatingDegDays.append((heatingSetPoint-minT)/2-(maxT-heatingSetPoint)/4)
-                            elif maxT < heatingSetPoint: daily_heatingDegDays.append(heatingSetPoint-(maxT+minT)/2)
+                            if minT > heatingSetPoint: heatingDegDays.append(0)
+                            elif (maxT + minT)/2 > heatingSetPoint: heatingDegDays.append((heatingSetPoint-minT)/4)
+                            elif maxT >= heatingSetPoint: heatingDegDays.append((heatingSetPoint-minT)/2-(maxT-heatingSetPoint)/4)
+                            elif maxT < heatingSetPoint: heatingDegDays.append(heatingSetPoint-(maxT+minT)/2)
                             
                             # cooling degree days
-                            if maxT < coolingSetPoint: daily_coolingDegDays.append(0)
-                            elif (maxT + minT)/2 < coolingSetPoint: daily_coolingDegDays.append((maxT-coolingSetPoint)/4)
-                            elif minT <= coolingSetPoint: daily_coolingDegDays.append((maxT-coolingSetPoint)/2 - (coolingSetPoint-minT)/4)
-                            elif minT > coolingSetPoint: daily_coolingDegDays.append((maxT + minT)/2 - coolingSetPoint)
+                            if maxT < coolingSetPoint: coolingDegDays.append(0)
+                            elif (maxT + minT)/2 < coolingSetPoint: coolingDegDays.append((maxT-coolingSetPoint)/4)
+                            elif minT <= coolingSetPoint: coolingDegDays.append((maxT-coolingSetPoint)/2 - (coolingSetPoint-minT)/4)
+                            elif minT > coolingSetPoint: coolingDegDays.append((maxT + minT)/2 - coolingSetPoint)
                     
-                    numOfDays = lb_preparation.numOfDays
+                    daily_heatingDegDays.extend(heatingDegDays)
+                    daily_coolingDegDays.extend(coolingDegDays)
                     
-                    for month in range(len(numOfDays)- 1):
-                        monthly_heatingDegDays.append(sum(daily_heatingDegDays[numOfDays[month] + 7: numOfDays[month + 1]+ 7]))
-                        monthly_coolingDegDays.append(sum(daily_coolingDegDays[numOfDays[month] + 7: numOfDays[month + 1]+ 7]))
+                    # the daily values are summed up for each month of this list
+                    monthlyHeatingDegDays = dailyResampler.aggregate(heatingDegDays, 'monthly', 'sum')
+                    monthlyCoolingDegDays = dailyResampler.aggregate(coolingDegDays, 'monthly', 'sum')
+                    monthly_heatingDegDays.extend(monthlyHeatingDegDays)
+                    monthly_coolingDegDays.extend(monthlyCoolingDegDays)
                     
-                    annual_heatingDegDays.append(sum(monthly_heatingDegDays[7:]))
-                    annual_coolingDegDays.append(sum(monthly_coolingDegDays[7:]))
+                    annual_heatingDegDays.append(sum(monthlyHeatingDegDays))
+                    annual_coolingDegDays.append(sum(monthlyCoolingDegDays))
                         
                     
                     
@@ -91,6 +91,8 @@ def main(coolingSetPoint, heatingSetPoint, coolingSetBack, heatingSetBack, start
                 [selList.append(float(x)) for x in hourlyDBTemp[indexList[i]+7:indexList[i+1]]]
                 separatedLists.append(selList)
             
+            resampler = sc.sticky["ladybug_DataResampler"]()
+            
             hourly_coolingDegHours = [];
             hourly_heatingDegHours = [];
             daily_coolingDegHours = [];
@@ -152,27 +154,21 @@ def main(coolingSetPoint, heatingSetPoint, coolingSetBack, heatingSetBack, start
                 hourlyTemperature = separatedLists[l]
                 
                 # for each hour based on hourly temperature data
-                for hour, temp in enumerate(hourlyTemperature):
-                    if float(temp) < heatingSetPoint:
-                        hourly_heatingDegHours.append(heatingSetPoint - float(temp))
-                    else: hourly_heatingDegHours.append(0)
-                    if coolingSetPoint < float(temp):
-                        hourly_coolingDegHours.append(float(temp) - coolingSetPoint)
-                    else: hourly_coolingDegHours.append(0)
-                
-                # for each day based on hourly degree hours
-                for day in range (int(len(hourlyTemperature)/24)):
-                    # 7 is for thr first 7 members of the list which are information
-                    daily_heatingDegHours.append(sum(hourly_heatingDegHours[(day * 24) + 7:((day+1)*24) + 7]))
-                    daily_coolingDegHours.append(sum(hourly_coolingDegHours[(day * 24) + 7:((day+1)*24) + 7]))
+                heatingDegHours = [heatingSetPoint - temp if temp < heatingSetPoint else 0 for temp in hourlyTemperature]
+                coolingDegHours = [temp - coolingSetPoint if coolingSetPoint < temp else 0 for temp in hourlyTemperature]
+                hourly_heatingDegHours.extend(heatingDegHours)
+                hourly_coolingDegHours.extend(coolingDegHours)
                 
-                numOfDays = lb_preparation.numOfDays
-                for month in range(len(numOfDays)- 1):
-                    monthly_heatingDegHours.append(sum(daily_heatingDegHours[numOfDays[month] + 7: numOfDays[month + 1]+ 7]))
-                    monthly_coolingDegHours.append(sum(daily_coolingDegHours[numOfDays[month] + 7: numOfDays[month + 1]+ 7]))
+                # for each day and month based on hourly degree hours
+                monthlyHeatingDegHours = resampler.aggregate(heatingDegHours, 'monthly', 'sum')
+                monthlyCoolingDegHours = resampler.aggregate(coolingDegHours, 'monthly', 'sum')
+                daily_heatingDegHours.extend(resampler.aggregate(heatingDegHours, 'daily', 'sum'))
+                daily_coolingDegHours.extend(resampler.aggregate(coolingDegHours, 'daily', 'sum'))
+                monthly_heatingDegHours.extend(monthlyHeatingDegHours)
+                monthly_coolingDegHours.extend(monthlyCoolingDegHours)
                 
-                annual_heatingDegHours.append(sum(monthly_heatingDegHours[7:]))
-                annual_coolingDegHours.append(sum(monthly_coolingDegHours[7:]))
+                annual_heatingDegHours.append(sum(monthlyHeatingDegHours))
+                annual_coolingDegHours.append(sum(monthlyCoolingDegHours))
                 
             return hourly_coolingDegHours, hourly_heatingDegHours, daily_coolingDegHours, daily_heatingDegHours, monthly_coolingDegHours, monthly_heatingDegHours, annual_coolingDegHours, annual_heatingDegHours
         else:
@@ -32,9 +32,9 @@ AddReference('Grasshopper')
 import Grasshopper.Kernel as gh
 
 def main(days, months, hours):
-    DOY = []
-    HOY = []
-    date = []
+    selMonths = []
+    selDays = []
+    selHours = []
     # import the classes
     if sc.sticky.has_key('ladybug_release'):
         lb_preparation = sc.sticky["ladybug_Preparation"]()
@@ -44,9 +44,12 @@ def main(days, months, hours):
                     h = lb_preparation.checkHour(float(h))
                     m  = lb_preparation.checkMonth(int(m))
                     d = lb_preparation.checkDay(int(d), m)
-                    HOY.append(lb_preparation.date2Hour(m, d, h))
-                    DOY.append(int(lb_preparation.getJD(m, d)))
-                    date.append(lb_preparation.hour2Date(lb_preparation.date2Hour(m, d, h)))
+                    selMonths.append(m); selDays.append(d); selHours.append(h)
+        
+        # convert all the dates at once
+        HOY = lb_preparation.dates2Hours(selMonths, selDays, selHours)
+        DOY = [int(lb_preparation.getJD(m, d)) for m, d in zip(selMonths, selDays)]
+        date = lb_preparation.hours2Dates(HOY)
         return HOY, DOY, date
     else:
         print "You should first let the Ladybug fly..."
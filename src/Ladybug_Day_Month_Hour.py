@@ -36,16 +36,10 @@ def main(HOY):
     # import the classes
     if sc.sticky.has_key('ladybug_release'):
         lb_preparation = sc.sticky["ladybug_Preparation"]()
-        day = []
-        month = []
-        hour = []
-        date = []
-        for hoy in HOY:
-            d, m, t = lb_preparation.hour2Date(hoy, True)
-            day.append(d)
-            month.append(m + 1)
-            hour.append(t)
-            date.append(lb_preparation.hour2Date(hoy))
+        # convert all the hours at once
+        day, month, hour = lb_preparation.hours2Dates(HOY, True)
+        month = [m + 1 for m in month]
+        date = lb_preparation.hours2Dates(HOY)
         
         return day, month, hour, date
     else:
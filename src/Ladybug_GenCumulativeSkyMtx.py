@@ -64,43 +64,6 @@ def hour2Date(hour):
     
     return str(day), str(month), str(time)
 
-def getRadiationValues(epw_file, analysisPeriod, weaFile):
-    # start hour and end hour
-    stHour = 0
-    endHour = 8760
-    epwfile = open(epw_file,"r")
-    for lineCount, line in enumerate(epwfile):
-        hour = lineCount - 8
-        if  int(stHour) <= hour <= int(endHour):
-            dirRad = (line.split(',')[14])
-            difRad = (line.split(',')[15])
-            day, month, time = hour2Date(hour)
-            weaFile.write(month + " " + day + " " + time + " " + dirRad + " " + difRad + "\n")
-    epwfile.close()
-    return weaFile
-
-def weaHeader(epwFileAddress, lb_preparation):
-    
-    locName, lat, long, timeZone, elev, dataStr = lb_preparation.epwLocation(epwFileAddress)
-    
-    #print locName, lat, long, timeZone, elev
-    
-    return  "place " + locName + "\n" + \
-            "latitude " + lat + "\n" + \
-            "longitude " + `-float(long)` + "\n" + \
-            "time_zone " + `-float(timeZone) * 15` + "\n" + \
-            "site_elevation " + elev + "\n" + \
-            "weather_data_file_units 1\n"
-
-def epw2wea(weatherFile, analysisPeriod, lb_preparation):
-    outputFile = weatherFile.replace(".epw", ".wea")
-    header = weaHeader(weatherFile, lb_preparation)
-    weaFile = open(outputFile, 'w')
-    weaFile.write(header)
-    weaFile = getRadiationValues(weatherFile, analysisPeriod, weaFile)
-    weaFile.close()
-    return outputFile
-
 def main(epwFile, skyType, workingDir, useOldRes):
     # import the classes
     if sc.sticky.has_key('ladybug_release'):
@@ -121,7 +84,7 @@ def main(epwFile, skyType, workingDir, useOldRes):
         ## check for epw file to be connected
         if epwFile != None and epwFile[-3:] == 'epw':
             # import data from epw file
-            locName, lat, lngt, timeZone, elev, locationStr = lb_preparation.epwLocation(epwFile)
+            locName, lat, lngt, timeZone, elev, locationStr = lb_preparation.epwLocation(epwFile, workingDir)
             newLocName = lb_preparation.removeBlank(locName)
             
             # make new folder for each city
@@ -131,7 +94,7 @@ def main(epwFile, skyType, workingDir, useOldRes):
             weatherFileAddress = lb_preparation.copyFile(epwFile, subWorkingDir + "\\" + newLocName + '.epw')
             
             # create weaFile
-            weaFile = epw2wea(weatherFileAddress, [], lb_preparation)
+            weaFile = sc.sticky["ladybug_EPWWriter"]().epw2wea(weatherFileAddress, workingDir = workingDir)
         
             outputFile = weaFile.replace(".wea", ".mtx")
             outputFileDif = weaFile.replace(".wea", "_dif_" + `skyType` + ".mtx")
@@ -15,7 +15,10 @@ The document is available online at this address:
 Provided by Ladybug 0.0.53
     
     Args:
-        _epwFile: epw file location on your system as a string
+        _epwFile: epw file location on your system as a string. Compressed weather files (.epw.gz or .zip) can be used directly
+            and a single epw file of a zip archive can be selected as c:\\weather\\library.zip\\fileName.epw
+        fillMethod_: [optional] "linear" to fill the missing values of the weather data by linear interpolation or "daily" to fill them
+            with the average of the same hour of the days around them. By default the missing values are imported as they are in the file.
         
     Returns:
         readMe!: ...
@@ -48,15 +51,24 @@ from clr import AddReference
 AddReference('Grasshopper')
 import Grasshopper.Kernel as gh
 
-def main(_epw_file):
+def main(_epw_file, fillMethod):
     # import the classes
     if sc.sticky.has_key('ladybug_release'):
         lb_preparation = sc.sticky["ladybug_Preparation"]()
         
+        if fillMethod: fillMethod = str(fillMethod).strip().lower()
+        if fillMethod not in (None, 'linear', 'daily'):
+            warningM = "fillMethod_ should be linear or daily."
+            print warningM
+            w = gh.GH_RuntimeMessageLevel.Warning
+            ghenv.Component.AddRuntimeMessage(w, warningM)
+            return -1
+        
         locationData = lb_preparation.epwLocation(_epw_file)
-        weatherData = lb_preparation.epwDataReader(_epw_file, locationData[0])
+        # fields are parsed only when they are asked for
+        weatherData = lb_preparation.epwWeatherData(_epw_file, fillMethod = fillMethod)
         
-        return locationData, weatherData
+        return locationData, weatherData, lb_preparation.epwDataReaderFields
     
     else:
         warningM = "First please let the Ladybug fly..."
@@ -68,11 +80,22 @@ def main(_epw_file):
 
 
 # Collecting Data
-if _epwFile and _epwFile.endswith('.epw'):
-    result = main(_epwFile)
+if _epwFile and _epwFile.lower().endswith(('.epw', '.epw.gz', '.zip')):
+    result = main(_epwFile, fillMethod_)
     if result!= -1:
         location, locName, latitude = result[0][-1], result[0][0], result[0][1]
-        dryBulbTemperature, dewPointTemperature, relativeHumidity, windSpeed, windDirection, directNormalRadiation, diffuseHorizontalRadiation, globalHorizontalRadiation, directNormalIlluminance, diffuseHorizontalIlluminance, globalHorizontalIlluminance, totalSkyCover, liquidPrecipitationDepth, barometricPressure = result[1][:]
+        weatherData, epwFieldIndices = result[1], result[2]
+        outputNames = ['dryBulbTemperature', 'dewPointTemperature', 'relativeHumidity', 'windSpeed', 'windDirection',
+                       'directNormalRadiation', 'diffuseHorizontalRadiation', 'globalHorizontalRadiation',
+                       'directNormalIlluminance', 'diffuseHorizontalIlluminance', 'globalHorizontalIlluminance',
+                       'totalSkyCover', 'liquidPrecipitationDepth', 'barometricPressure']
+        for outputName, fieldIndex in zip(outputNames, epwFieldIndices):
+            globals()[outputName] = weatherData.hourlyData(fieldIndex)
+        # write the sidecars once so the next import of this file skips the text parsing
+        weatherData.saveCache()
+        # the outputs are different from the values in the file
+        for warningM in weatherData.filledValuesReport(epwFieldIndices):
+            ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, warningM)
         print 'Hourly weather data for ' + locName + ' is imported successfully!'
 else:
     print "Please connect a valid epw file address to _epw_file input..."
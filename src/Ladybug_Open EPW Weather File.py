@@ -26,7 +26,7 @@ ghenv.Component.AdditionalHelpFromDocStrings = "2"
 import rhinoscriptsyntax as rs
 
 if _open == True:
-    filter = "EPW file (*.epw)|*.epw|All Files (*.*)|*.*||"
+    filter = "EPW file (*.epw)|*.epw|Compressed EPW file (*.zip, *.epw.gz)|*.zip;*.gz|All Files (*.*)|*.*||"
     epwFile = rs.OpenFileName("Open .epw Weather File", filter)
     print 'Done!'
 else:
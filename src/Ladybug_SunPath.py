@@ -32,6 +32,7 @@ Provided by Ladybug 0.0.53
         legendPar_: Input legend parameters from the Ladybug Legend Parameters component
         _dailyOrAnnualSunPath_: Set to 0 or False for daily sunpath and 1 or True for annual sunpath
         bakeIt_: Set to True to bake the sunpath
+        solarEngine_: [optional] "radiance" for the RADIANCE sun-path equations or "spa" for the NREL Solar Position Algorithm that is accurate to 0.0003 degrees. Default is "radiance"
     Returns:
         readMe!: ...
         sunSpheresMesh: Colored sun mesh spheres as a joined mesh
@@ -66,81 +67,6 @@ import Grasshopper.Kernel as gh
 from Grasshopper import DataTree
 from Grasshopper.Kernel.Data import GH_Path
 
-def checkConditionalStatement(annualHourlyData, conditionalStatement):
-        lb_preparation = sc.sticky["ladybug_Preparation"]()
-        indexList, listInfo = lb_preparation.separateList(annualHourlyData, lb_preparation.strToBeFound)
-        
-        letters = [chr(i) for i in xrange(ord('a'), ord('z')+1)]
-        # remove 'and' and 'or' from conditional statements
-        csCleaned = conditionalStatement.replace('and', '',20000)
-        csCleaned = csCleaned.replace('or', '',20000)
-        
-        # find the number of the lists that have assigned conditional statements
-        listNum = []
-        for count, let in enumerate(letters):
-            if csCleaned.find(let)!= -1: listNum.append(count)
-        
-        # check if all the conditions are actually applicable
-        for num in listNum:
-            if num>len(listInfo) - 1:
-                warning = 'A conditional statement is assigned for list number ' + `num + 1` + '  which is not existed!\n' + \
-                          'Please remove the letter "' + letters[num] + '" from the statements to solve this problem!\n' + \
-                          'Number of lists are ' + `len(listInfo)` + '. Please fix this issue and try again.'
-                          
-                print warning
-                ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, warning)
-                return -1, -1
-        
-        selList = []
-        [selList.append([]) for i in range(len(listInfo))]
-        for i in range(len(listInfo)):
-            selList[i] = annualHourlyData[indexList[i]+7:indexList[i+1]]
-            if listInfo[i][4]!='Hourly' or listInfo[i][5]!=(1,1,1) or  listInfo[i][6]!=(12,31,24) or len(selList[i])!=8760:
-                warning = 'At least one of the input data lists is not a valis ladybug hourly data! Please fix this issue and try again!\n List number = '+ `i+1`
-                print warning
-                ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, warning)
-                return -1, -1
-        
-        # replace the right list in the conditional statement
-        statement = conditionalStatement.split(' ')
-        finalStatement = 'pattern = '
-        titleStatement = '...                         ...                         ...\n' +\
-                         'Conditional Selection Applied:\n'
-        
-        for statemntPart in statement:
-            statementCopy = str.Copy(statemntPart) # a copy to make a meaningful string
-            
-            if statemntPart!='and' and statemntPart!='or':
-                for num in listNum:
-                    toBeReplacedWith = 'selList[this][HOY]'.replace('this', `num`)
-                    titleToBeReplacedWith = listInfo[num][2]
-                    
-                    statemntPart = statemntPart.replace(letters[num], toBeReplacedWith, 20000)
-                    statementCopy = statementCopy.replace(letters[num], titleToBeReplacedWith, 20000)
-                    if statementCopy.find(letters[num])!=-1: break
-                    
-                titleStatement = titleStatement + ' ' + statementCopy
-            else:
-                
-                titleStatement = titleStatement + '\n' + statementCopy
-            finalStatement = finalStatement + ' ' + statemntPart
-        print titleStatement
-        
-        # check for the pattern
-        patternList = []
-        try:
-            for HOY in range(8760):
-                exec(finalStatement)
-                patternList.append(pattern)
-        except Exception,e:
-            warning = 'There is an error in the conditional statement:\n' + `e`
-            print warning
-            ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, warning)
-            return -1, -1
-        
-        return titleStatement, patternList
-
-
 def readLocation(location):
     locationStr = location.split('\n')
     newLocStr = ""
@@ -158,7 +84,7 @@ def readLocation(location):
     
     return float(latitude), float(longitude), float(timeZone), float(elevation)
 
-def main(latitude, longitude, timeZone, elevation, north, hour, day, month, timeStep, analysisPeriod, centerPt, sunPathScale, sunScale, annualHourlyData, conditionalStatement, legendPar, dailyOrAnnualSunPath, bakeIt):
+def main(latitude, longitude, timeZone, elevation, north, hour, day, month, timeStep, analysisPeriod, centerPt, sunPathScale, sunScale, annualHourlyData, conditionalStatement, legendPar, dailyOrAnnualSunPath, bakeIt, solarEngine):
     
     if dailyOrAnnualSunPath:
         dailySunPath, annualSunPath = False, True
@@ -215,15 +141,11 @@ def main(latitude, longitude, timeZone, elevation, north, hour, day, month, time
         scale = lb_preparation.setScale(sunPathScale, conversionFac) * 200
         sunSc = lb_preparation.setScale(sunScale, conversionFac)* scale * conversionFac * 0.007
         
-        try:
-            timeStep = int(timeStep)
-            if 60%timeStep!=0:
-                validTimeSteps = [1, 2, 3, 4, 5, 6, 10, 12, 15, 20, 30, 60]
-                stepDifference = []
-                [stepDifference.append(abs(validTimeStep - timeStep)) for validTimeStep in validTimeSteps]
-                timeStep = validTimeSteps[stepDifference.index(min(stepDifference))]
-                print 'Time-step is set to ' + `timeStep`
-        except: timeStep = 1; print 'Time-step is set to 1'
+        validTimeStep = lb_preparation.checkTimestep(timeStep)
+        try: isValid = validTimeStep == int(timeStep)
+        except: isValid = False
+        if not isValid: print 'Time-step is set to ' + `validTimeStep`
+        timeStep = validTimeStep
         
         if longitude!=None and timeZone != None:
             try: longitude = float(longitude); timeZone = float(timeZone)
@@ -243,8 +165,7 @@ def main(latitude, longitude, timeZone, elevation, north, hour, day, month, time
             days = day
             months = month
             
-        if timeStep != 1: hours = rs.frange(hour[0], hour[-1] + 1 - 1/timeStep, 1/timeStep)
-        else: hours = hour
+        hours = lb_preparation.timestepHours(hour, timeStep)
         
         
         if latitude!=None:
@@ -254,10 +175,10 @@ def main(latitude, longitude, timeZone, elevation, north, hour, day, month, time
                 print 'Checking conditional statements...'
                 # send all data and statement to a function and return back
                 # True, False Pattern and condition statement
-                titleStatement, patternList = checkConditionalStatement(annualHourlyData, conditionalStatement)
+                titleStatement, patternList = lb_preparation.checkConditionalStatement(annualHourlyData, conditionalStatement, ghenv.Component)
                 
             if titleStatement == -1:
-                patternList = [[True]] * 8760
+                patternList = sc.sticky["ladybug_HourPattern"].allHours()
                 titleStatement = False
 
             printWarning = False
@@ -270,27 +191,45 @@ def main(latitude, longitude, timeZone, elevation, north, hour, day, month, time
                 ghenv.Component.AddRuntimeMessage(w, 'Latitude should be between -90 and 90')
             
             
-            lb_sunpath.initTheClass(float(latitude), northAngle, cenPt, scale, longitude, timeZone)
-            # count total sun up hours
-            SUH = 0
+            if solarEngine: solarEngine = str(solarEngine).strip().lower()
+            else: solarEngine = 'radiance'
+            if lb_sunpath.initTheClass(float(latitude), northAngle, cenPt, scale, longitude, timeZone, solarEngine, elevation) == -1:
+                w = gh.GH_RuntimeMessageLevel.Warning
+                ghenv.Component.AddRuntimeMessage(w, 'solarEngine_ should be radiance or spa')
+                return -1
+            sunDates = []
             for m in months:
                 for d in days:
                     for h in hours:
                         h = lb_preparation.checkHour(float(h))
                         m  = lb_preparation.checkMonth(int(m))
                         d = lb_preparation.checkDay(int(d), m)
-                        lb_sunpath.solInitOutput(m, d, h)
-                        if lb_sunpath.solAlt >= 0: SUH += 1
-                        if lb_sunpath.solAlt >= 0 and patternList[int(round(lb_preparation.date2Hour(m, d, h)))]:
-                            sunSphere, sunVector, sunPoint = lb_sunpath.sunPosPt(sunSc)
-                            # find the hour of the year
-                            sunUpHours.append(lb_preparation.date2Hour(m, d, h))
-                            sunPosInfo.append(lb_preparation.hour2Date(lb_preparation.date2Hour(m, d, h)))
-                            sunPositions.append(sunPoint)
-                            sunSpheres.append(sunSphere)
-                            sunVectors.append(sunVector)
-                            sunAlt.append(math.degrees(lb_sunpath.solAlt))
-                            sunAzm.append(math.degrees(lb_sunpath.solAz))
+                        sunDates.append((m, d, h))
+            
+            # look up the sun positions in the annual table of this location
+            sunDateHours, solAlts, solAzs = [], [], []
+            if sunDates:
+                sunDateHours = lb_preparation.dates2Hours(*zip(*sunDates))
+                sunVectorTable = sc.sticky["ladybug_SunVectorTable"].get(float(latitude), longitude, timeZone, northAngle, timeStep,
+                                                                          engine = lb_sunpath.solarEngine, elevation = lb_sunpath.elevation)
+                solAlts, solAzs = sunVectorTable.lookup(sunDateHours)[:2]
+            
+            # count total sun up hours
+            SUH = 0
+            for HOY, solAlt, solAz in zip(sunDateHours, solAlts, solAzs):
+                if solAlt < 0: continue
+                SUH += 1
+                if patternList[int(round(HOY))]:
+                    sunSphere, sunVector, sunPoint = lb_sunpath.sunPosPt(sunSc, solAlt, solAz)
+                    sunUpHours.append(HOY)
+                    sunPositions.append(sunPoint)
+                    sunSpheres.append(sunSphere)
+                    sunVectors.append(sunVector)
+                    sunAlt.append(math.degrees(solAlt))
+                    sunAzm.append(math.degrees(solAz))
+            
+            # convert all the hours to dates at once
+            sunPosInfo = lb_preparation.hours2Dates(sunUpHours, timestep = timeStep)
             
             if len(sunVectors)== 0:
                 warning = 'None of the hours meet the conditional statement'
@@ -337,6 +276,9 @@ def main(latitude, longitude, timeZone, elevation, north, hour, day, month, time
                 #separate data
                 indexList, listInfo = lb_preparation.separateList(annualHourlyData, lb_preparation.strToBeFound)
                 
+                # the interpolation weights of the sun up hours are the same for all the lists
+                interpolationWeights = lb_preparation.interpolationWeights(sunUpHours)
+                
                 for i in range(len(listInfo)):
                     movingVector = rc.Geometry.Vector3d(i * movingDist, 0, 0)
                     values= []
@@ -350,10 +292,8 @@ def main(latitude, longitude, timeZone, elevation, north, hour, day, month, time
                         return -1
                     else:
                         #find the numbers
-                        for h, hr in enumerate(sunUpHours):
-                            value = selList[int(math.floor(hr-1))] + (selList[int(math.ceil(hr-1))] - selList[int(math.floor(hr-1))])* (hr - math.floor(hr))
-                            values.append(value)
-                            modifiedsunPosInfo.append(sunPosInfo[h] + '\n' + ("%.2f" % value) + ' ' + listInfo[i][3])
+                        values = lb_preparation.interpolateValues(selList, interpolationWeights)
+                        modifiedsunPosInfo = [info + '\n' + ("%.2f" % value) + ' ' + listInfo[i][3] for info, value in zip(sunPosInfo, values)]
                     
                     if values!=[] and sunPathCrvs!=[]:
                         # mesh colors
@@ -380,8 +320,8 @@ def main(latitude, longitude, timeZone, elevation, north, hour, day, month, time
                         customHeading = customHeading + 'Hourly Data: ' + listInfo[i][2] + ' (' + listInfo[i][3] + ')\n' + listInfo[i][1]
                         
                         if titleStatement:
-                            resultStr = ("%.1f" % (len(values)/timeStep)) + ' hours of total ' + ("%.1f" % (SUH/timeStep)) + ' sun up hours' + \
-                                        '(' + ("%.2f" % ((len(values)/timeStep)/(SUH/timeStep) * 100)) + '%).'
+                            resultStr = ("%.1f" % (len(values)/float(timeStep))) + ' hours of total ' + ("%.1f" % (SUH/float(timeStep))) + ' sun up hours' + \
+                                        '(' + ("%.2f" % (len(values)/float(SUH) * 100)) + '%).'
                             # print resultStr
                             customHeading = customHeading + '\n' + titleStatement + '\n' + resultStr
                         
@@ -491,7 +431,7 @@ if _location:
     result = main(latitude, longitude, timeZone, elevation, north_, _hour_, _day_,
                   _month_, _timeStep_, analysisPeriod_, _centerPt_, _sunPathScale_,
                   _sunScale_, annualHourlyData_, conditionalStatement_, legendPar_,
-                  _dailyOrAnnualSunPath_, bakeIt_)
+                  _dailyOrAnnualSunPath_, bakeIt_, solarEngine_)
 
     if result!= -1:
         sunPositionsList, sunSpheres, sunVectors, sunPathCrvsList, legendCrvs, selHourlyDataList, sunAltitudes, sunAzimuths, centerPoints, sunPosInfoList,  legendBasePtList= result
@@ -55,31 +55,7 @@ def getCumulativeSky(daylightMtxDict, runningPeriod):
     
     lb_preparation = sc.sticky["ladybug_Preparation"]()
     
-    def selectHourlyData(dataList, analysisPeriod):
-        # read analysis period
-        stMonth, stDay, stHour, endMonth, endDay, endHour = lb_preparation.readRunPeriod(analysisPeriod, False)
-        
-        selHourlyData =[];
-        
-        # select data
-        stAnnualHour = lb_preparation.date2Hour(stMonth, stDay, stHour)
-        endAnnualHour = lb_preparation.date2Hour(endMonth, endDay, endHour)
-        
-        # check it goes from the end of the year to the start of the year
-        if stAnnualHour < endAnnualHour:
-            for i, item in enumerate(dataList[stAnnualHour-1:endAnnualHour+1]):
-                if stHour-1 <= (i + stHour - 1)%24 <= endHour-1: selHourlyData.append(item)
-            type = True
-        else:
-            for i, item in enumerate(dataList[stAnnualHour-1:]):
-                if stHour-1 <= (i + stHour - 1)%24 <= endHour-1: selHourlyData.append(item)
-            for i, item in enumerate(dataList[:endAnnualHour + 1]):
-                if stHour-1 <= i %24 <= endHour-1: selHourlyData.append(item)
-            type = False
-        
-        return selHourlyData
-    
-    HOYS = selectHourlyData(range(8760), runningPeriod)
+    HOYS = lb_preparation.getPeriodIndices(runningPeriod)
     
     hourlyMtx = []
     for patchNumber in daylightMtxDict.keys():
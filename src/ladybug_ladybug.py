@@ -47,12 +47,64 @@ import os
 import System.Threading.Tasks as tasks
 import System
 import time
-from itertools import chain
+from itertools import chain, izip, islice
+from collections import OrderedDict, deque, namedtuple
+from operator import itemgetter
+from array import array
 import datetime
+import hashlib
+import marshal
+import struct
+import re
+import zipfile
+import gzip
+try: import mmap
+except ImportError: mmap = None
+try: import sqlite3
+except ImportError: sqlite3 = None
 PI = math.pi
 letItFly = True
 rc.Runtime.HostUtils.DisplayOleAlerts(False)
 
+class LRUCache(object):
+    """ Dictionary that keeps the maxSize most recently used items and counts hits and misses"""
+    def __init__(self, maxSize = 32):
+        self.maxSize = maxSize
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key, default = None):
+        try: value = self.items.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        # move the item to the end as the most recently used one
+        self.items[key] = value
+        self.hits += 1
+        return value
+    
+    def set(self, key, value):
+        self.items.pop(key, None)
+        self.items[key] = value
+        while len(self.items) > self.maxSize:
+            try: self.items.popitem(last = False)
+            except KeyError: break
+    
+    def __contains__(self, key):
+        return key in self.items
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def clear(self):
+        self.items.clear()
+        self.hits = self.misses = 0
+    
+    def __repr__(self):
+        return 'LRUCache: ' + `len(self.items)` + '/' + `self.maxSize` + ' items, ' + `self.hits` + ' hits, ' + `self.misses` + ' misses'
+
+
 class Preparation(object):
     """ Set of functions to prepare the environment for running the studies"""
     def __init__(self):
@@ -197,7 +249,73 @@ class Preparation(object):
         elif day > 31: day = 31
         return day
     
+    # timestep: (date strings, days, months) of each time step of the year
+    dateTables = {}
+    
+    def dateTable(self, timestep = 1):
+        """ Date strings, days and months (starting from 0) of hours 1/timestep to 8760 of the year
+            The item for hour x is at index x * timestep - 1
+        """
+        if timestep not in self.dateTables:
+            monthOfDay = [month for month in range(12) for day in range(self.numOfDays[month], self.numOfDays[month + 1])]
+            dateStrings = []; days = array('i'); months = array('i')
+            for step in xrange(1, 8760 * timestep + 1):
+                hour = step / float(timestep) if timestep != 1 else step
+                if hour % 24 == 0:
+                    dayOfYear = int(hour / 24)
+                    time = '24:00'
+                else:
+                    dayOfYear = int(hour // 24) + 1
+                    minutes = `int(round((hour - math.floor(hour)) * 60))`
+                    if len(minutes) == 1: minutes = '0' + minutes
+                    time = `int(hour%24)` + ':' + minutes
+                month = monthOfDay[dayOfYear - 1]
+                day = dayOfYear - self.numOfDays[month]
+                dateStrings.append(`day` + ' ' + self.monthList[month] + ' ' + time)
+                days.append(day); months.append(month)
+            self.dateTables[timestep] = dateStrings, days, months
+        return self.dateTables[timestep]
+    
     def hour2Date(self, hour, alternate = False):
+        # look up the hours of the year in the table
+        try: isHourOfYear = 0 < hour < 8760 and hour == int(hour)
+        except: isHourOfYear = False
+        if isHourOfYear:
+            dateStrings, days, months = self.dateTable()
+            index = int(hour) - 1
+            if not alternate: return dateStrings[index]
+            # the time of the last hour of each day is 0 for the alternate format
+            return days[index], months[index], hour%24
+        return self.calculateDate(hour, alternate)
+    
+    def hours2Dates(self, hours, alternate = False, timestep = 1):
+        """ hour2Date for a list of hours. Hours that are multiples of 1/timestep are looked up in the date table
+            Returns a list of date strings or lists of days, months and times if alternate is True
+        """
+        dateStrings, dayTable, monthTable = self.dateTable(timestep)
+        numOfSteps = 8760 * timestep
+        indices = []
+        for hour in hours:
+            step = hour * timestep
+            if 0 < step < numOfSteps and step == int(step): indices.append(int(step) - 1)
+            else: indices.append(None)
+        
+        if not alternate:
+            return [dateStrings[index] if index != None else self.calculateDate(hour) for hour, index in izip(hours, indices)]
+        
+        days = []; months = []; times = []
+        for hour, index in izip(hours, indices):
+            if index != None: day, month, time = dayTable[index], monthTable[index], hour%24
+            else: day, month, time = self.calculateDate(hour, True)
+            days.append(day); months.append(month); times.append(time)
+        return days, months, times
+    
+    def dates2Hours(self, months, days, hours):
+        """ date2Hour for lists of months, days and hours"""
+        numOfHours = self.numOfHours
+        return [numOfHours[int(month)-1] + (int(day) - 1) * 24 + hour for month, day, hour in izip(months, days, hours)]
+    
+    def calculateDate(self, hour, alternate = False):
         numOfDays = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334, 365]
         numOfHours = [24 * numOfDay for numOfDay in numOfDays]
         #print hour/24
@@ -231,17 +349,15 @@ class Preparation(object):
 
     def date2Hour(self, month, day, hour):
         # fix the end day
-        numOfDays = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
         # dd = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-        JD = numOfDays[int(month)-1] + int(day)
+        JD = self.numOfDays[int(month)-1] + int(day)
         return (JD - 1) * 24 + hour
     
     def getHour(self, JD, hour):
         return (JD - 1) * 24 + hour
     
     def getJD(self, month, day):
-        numOfDays = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
-        return numOfDays[int(month)-1] + int(day)
+        return self.numOfDays[int(month)-1] + int(day)
         
     def getCenPt(self, cenPt):
         if cenPt is None:
@@ -252,46 +368,252 @@ class Preparation(object):
                 try: return rc.Geometry.Point3d(cenPt)
                 except: return rc.Geometry.Point3d.Origin
     
-    def selectHourlyData(self, hourlyData, analysisPeriod):
-        # separate data
-        indexList, listInfo = self.separateList(hourlyData, self.strToBeFound)
+    # (analysis period, timestep): indices of the period in an annual list
+    periodIndices = LRUCache(64)
+    
+    def getPeriodIndices(self, analysisPeriod, timestep = 1):
+        """ Indices of the values of an annual list that are in the analysis period
+            The period can go from the end of the year to the start of the year and only the hours
+            between stHour and endHour of each day are selected. timestep is the number of values per hour.
+            Returns an xrange for periods of full days and an array of indices for the others
+        """
+        stMonth, stDay, stHour, endMonth, endDay, endHour = self.readRunPeriod(analysisPeriod, False)
+        cacheKey = (stMonth, stDay, stHour, endMonth, endDay, endHour, timestep)
+        indices = self.periodIndices.get(cacheKey)
+        if indices != None: return indices
+        
+        stAnnualHour = self.date2Hour(stMonth, stDay, stHour)
+        endAnnualHour = self.date2Hour(endMonth, endDay, endHour)
+        
+        if stAnnualHour < endAnnualHour and stHour == 1 and endHour == 24:
+            indices = xrange((stAnnualHour - 1) * timestep, endAnnualHour * timestep)
+        else:
+            if stAnnualHour < endAnnualHour: hours = xrange(stAnnualHour - 1, endAnnualHour)
+            # check it goes from the end of the year to the start of the year
+            else: hours = chain(xrange(stAnnualHour - 1, 8760), xrange(0, endAnnualHour))
+            indices = array('i', [hour * timestep + step for hour in hours if stHour - 1 <= hour % 24 <= endHour - 1 \
+                                  for step in xrange(timestep)])
+        
+        self.periodIndices.set(cacheKey, indices)
+        return indices
+    
+    def getPeriodMask(self, analysisPeriod, timestep = 1):
+        """ 1 for the values of an annual list that are in the analysis period and 0 for the others"""
+        stMonth, stDay, stHour, endMonth, endDay, endHour = self.readRunPeriod(analysisPeriod, False)
+        cacheKey = ('mask', stMonth, stDay, stHour, endMonth, endDay, endHour, timestep)
+        mask = self.periodIndices.get(cacheKey)
+        if mask == None:
+            mask = array('b', [0]) * (8760 * timestep)
+            for index in self.getPeriodIndices(analysisPeriod, timestep): mask[index] = 1
+            self.periodIndices.set(cacheKey, mask)
+        return mask
     
-        #separate lists of lists
-        separatedLists = []
-        for i in range(len(indexList)-1):
-            selList = []
-            [selList.append(float(x)) for x in hourlyData[indexList[i]+7:indexList[i+1]]]
-            separatedLists.append(selList)
+    def selectValues(self, values, indices):
+        """ Return the values at the indices as a list"""
+        if isinstance(indices, xrange):
+            if not len(indices): return []
+            return list(values[indices[0]:indices[-1] + 1])
+        if len(indices) and max(indices) >= len(values):
+            # the list is shorter than a year
+            indices = [i for i in indices if i < len(values)]
+        if len(indices) < 2: return [values[i] for i in indices]
+        return list(itemgetter(*indices)(values))
     
+    validTimesteps = [1, 2, 3, 4, 5, 6, 10, 12, 15, 20, 30, 60]
+    
+    def checkTimestep(self, timestep):
+        """ Return the closest number of steps per hour that 60 is divisible by"""
+        try: timestep = int(timestep)
+        except: return 1
+        if timestep in self.validTimesteps: return timestep
+        return min(self.validTimesteps, key = lambda validTimestep: abs(validTimestep - timestep))
+    
+    def timestepHours(self, hours, timestep = 1):
+        """ Hours of the day at timestep steps per hour. Each hour h is followed by h + 1/timestep to h + (timestep - 1)/timestep"""
+        if timestep == 1: return list(hours)
+        return [hour + step / float(timestep) for hour in hours for step in xrange(timestep)]
+    
+    def getPeriodHours(self, analysisPeriod, timestep = 1):
+        """ Hours of the year of the values of an analysis period at timestep steps per hour
+            Each value is at the end of its time step, so the value at index i is at hour (i + 1) / timestep
+        """
+        cacheKey = ('hours',) + tuple(self.readRunPeriod(analysisPeriod, False)) + (timestep,)
+        hours = self.periodIndices.get(cacheKey)
+        if hours == None:
+            hours = array('d', [(index + 1) / float(timestep) for index in self.getPeriodIndices(analysisPeriod, timestep)])
+            self.periodIndices.set(cacheKey, hours)
+        return hours
+    
+    def interpolationWeights(self, hoursOfYear):
+        """ Indices of the hourly values before and after each hour of the year and the weight of the value after
+            Hours before the first hour and after the last hour of the year are interpolated with the other end of the year
+        """
+        before = array('i'); after = array('i'); weights = array('d')
+        for hour in hoursOfYear:
+            lowerHour = int(math.floor(hour))
+            before.append((lowerHour - 1) % 8760)
+            after.append(lowerHour % 8760)
+            weights.append(hour - lowerHour)
+        return before, after, weights
+    
+    def interpolateValues(self, values, hoursOfYear):
+        """ Linear interpolation of annual hourly values at fractional hours of the year
+            hoursOfYear can also be the output of interpolationWeights so the weights can be used for several lists
+        """
+        if not isinstance(hoursOfYear, tuple): hoursOfYear = self.interpolationWeights(hoursOfYear)
+        before, after, weights = hoursOfYear
+        return [values[b] + (values[a] - values[b]) * w if w else values[b] for b, a, w in izip(before, after, weights)]
+    
+    def hourly2Timestep(self, values, timestep):
+        """ Interpolate annual hourly values to timestep values per hour"""
+        if timestep == 1: return list(values)
+        return self.interpolateValues(values, [(step + 1) / float(timestep) for step in xrange(8760 * timestep)])
+    
+    def selectHourlyData(self, hourlyData, analysisPeriod, timestep = 1):
+        # separate data
+        indexList, listInfo = self.separateList(hourlyData, self.strToBeFound)
+        
         # read analysis period
         stMonth, stDay, stHour, endMonth, endDay, endHour = self.readRunPeriod(analysisPeriod)
+        selectedHours = self.getPeriodIndices(analysisPeriod, timestep)
         
         selHourlyData =[];
         
-        for l in range(len(separatedLists)):
-            [selHourlyData.append(item) for item in listInfo[l][:4]]
+        for l in range(len(indexList)-1):
+            selHourlyData.extend(listInfo[l][:4])
             selHourlyData.append('Hourly')
             selHourlyData.append((stMonth, stDay, stHour))
             selHourlyData.append((endMonth, endDay, endHour))
             # select data
-            stAnnualHour = self.date2Hour(stMonth, stDay, stHour)
-            endAnnualHour = self.date2Hour(endMonth, endDay, endHour)
-            
-            # check it goes from the end of the year to the start of the year
-            if stAnnualHour < endAnnualHour:
-                for i, item in enumerate(separatedLists[l][stAnnualHour-1:endAnnualHour]):
-                    if stHour-1 <= (i + stHour - 1)%24 <= endHour-1: selHourlyData.append(item)
-                type = True
-            else:
-                for i, item in enumerate(separatedLists[l][stAnnualHour-1:]):
-                    if stHour-1 <= (i + stHour - 1)%24 <= endHour-1: selHourlyData.append(item)
-                
-                for i, item in enumerate(separatedLists[l][:endAnnualHour]):
-                    if stHour-1 <= i %24 <= endHour-1: selHourlyData.append(item)
-                type = False
+            values = hourlyData[indexList[l]+7:indexList[l+1]]
+            selHourlyData.extend(map(float, self.selectValues(values, selectedHours)))
         
         return selHourlyData
     
+    def conditionalStatementTitle(self, conditionalStatement, listInfo):
+        # replace the letters with the name of the lists and put 'and' and 'or' in new lines
+        titleStatement = '...                         ...                         ...\n' +\
+                         'Conditional Selection Applied:\n'
+        def listName(match):
+            num = ord(match.group(1)) - ord('a')
+            return listInfo[num][2]
+        for statemntPart in conditionalStatement.split(' '):
+            if statemntPart!='and' and statemntPart!='or':
+                titleStatement = titleStatement + ' ' + re.sub(r'(?<![A-Za-z_])([a-z])(?![A-Za-z_0-9])', listName, statemntPart)
+            else:
+                titleStatement = titleStatement + '\n' + statemntPart
+        return titleStatement
+    
+    def legacyConditionalStatement(self, conditionalStatement, numOfLists):
+        # the letters replaced with the lists as it was done in the components before ConditionalStatement
+        letters = [chr(i) for i in xrange(ord('a'), ord('z')+1)]
+        finalStatement = 'pattern = '
+        for statemntPart in conditionalStatement.split(' '):
+            if statemntPart!='and' and statemntPart!='or':
+                for num in range(numOfLists):
+                    statemntPart = statemntPart.replace(letters[num], 'selList[this][HOY]'.replace('this', `num`), 20000)
+            finalStatement = finalStatement + ' ' + statemntPart
+        return finalStatement
+    
+    def execConditionalStatement(self, conditionalStatement, selList):
+        """ Run the exec statement of the old components for each hour and return the pattern
+            checkConditionalStatement uses it for the statements that ConditionalStatement can't parse
+        """
+        finalStatement = self.legacyConditionalStatement(conditionalStatement, len(selList))
+        namespace = {'selList': selList}
+        patternList = []
+        for HOY in range(len(selList[0])):
+            namespace['HOY'] = HOY
+            exec finalStatement in namespace
+            patternList.append(namespace['pattern'])
+        return patternList
+    
+    def valuesDigest(self, values):
+        """ md5 digest of a list of values to use it in a cache key. Returns None if the values can't be marshaled
+            Python's hash is 32 bits in IronPython so different lists can have the same hash. The values are
+            marshaled with their types so 1 and 1.0 don't have the same digest, as they give different results with /
+        """
+        try: return hashlib.md5(marshal.dumps(list(values))).hexdigest()
+        except ValueError: return None
+    
+    # statement: ConditionalStatement
+    compiledStatements = LRUCache(64)
+    # (normalized statement, fingerprints of the used lists): HourPattern
+    conditionalStatementResults = LRUCache(32)
+    
+    def compileConditionalStatement(self, conditionalStatement):
+        statement = self.compiledStatements.get(conditionalStatement)
+        if statement == None:
+            statement = ConditionalStatement(conditionalStatement)
+            self.compiledStatements.set(conditionalStatement, statement)
+        return statement
+    
+    def evaluateConditionalStatement(self, statement, selList):
+        """ Return the HourPattern of a statement for the lists
+            The result is reused for the same statement (after parsing, so 'a>5' and 'a > 5' are the same)
+            and the same values of the lists that the statement uses, also by other components
+        """
+        fingerprints = tuple([(var, len(selList[var]), self.valuesDigest(selList[var])) for var in statement.variables])
+        # values without a digest are not cached
+        if None in [fingerprint[2] for fingerprint in fingerprints]:
+            return HourPattern.fromList(statement.evaluate(selList))
+        cacheKey = (statement.source, fingerprints)
+        patternList = self.conditionalStatementResults.get(cacheKey)
+        if patternList == None:
+            patternList = HourPattern.fromList(statement.evaluate(selList))
+            self.conditionalStatementResults.set(cacheKey, patternList)
+        return patternList
+    
+    def checkConditionalStatement(self, annualHourlyData, conditionalStatement, GHComponent):
+        """ Return the title of the statement and an HourPattern of the hours of the year that meet the statement
+            Returns -1, -1 and gives a warning if the statement or the data is not valid
+        """
+        indexList, listInfo = self.separateList(annualHourlyData, self.strToBeFound)
+        letters = [chr(i) for i in xrange(ord('a'), ord('z')+1)]
+        
+        try:
+            statement = self.compileConditionalStatement(conditionalStatement)
+            listNum = statement.variables
+        except Exception:
+            # run with exec as the components did before, which also gives the same error
+            statement = None
+            csCleaned = conditionalStatement.replace('and', '',20000).replace('or', '',20000)
+            listNum = [count for count, let in enumerate(letters) if csCleaned.find(let)!= -1]
+        
+        # check if all the conditions are actually applicable
+        for num in listNum:
+            if num>len(listInfo) - 1:
+                warning = 'A conditional statement is assigned for list number ' + `num + 1` + '  which is not existed!\n' + \
+                          'Please remove the letter "' + letters[num] + '" from the statements to solve this problem!\n' + \
+                          'Number of lists are ' + `len(listInfo)` + '. Please fix this issue and try again.'
+                print warning
+                self.giveWarning(warning, GHComponent)
+                return -1, -1
+        
+        selList = []
+        for i in range(len(listInfo)):
+            selList.append(annualHourlyData[indexList[i]+7:indexList[i+1]])
+            if listInfo[i][4]!='Hourly' or listInfo[i][5]!=(1,1,1) or  listInfo[i][6]!=(12,31,24) or len(selList[i])!=8760:
+                warning = 'At least one of the input data lists is not a valis ladybug hourly data! Please fix this issue and try again!\n List number = '+ `i+1`
+                print warning
+                self.giveWarning(warning, GHComponent)
+                return -1, -1
+        
+        titleStatement = self.conditionalStatementTitle(conditionalStatement, listInfo)
+        print titleStatement
+        
+        # check for the pattern
+        try:
+            if statement == None: patternList = HourPattern.fromList(self.execConditionalStatement(conditionalStatement, selList))
+            else: patternList = self.evaluateConditionalStatement(statement, selList)
+        except Exception, e:
+            warning = 'There is an error in the conditional statement:\n' + `e`
+            print warning
+            self.giveWarning(warning, GHComponent)
+            return -1, -1
+        
+        return titleStatement, patternList
+    
     def readLegendParameters(self, legendPar, getCenter = True):
         if legendPar == []: legendPar = [None] * 6
         if legendPar[0] == None: lowB = 'min'
@@ -444,23 +766,97 @@ class Preparation(object):
             #print 'GenCumulativeSky.exe is already available at ', workingDir + \
             #'\nPlease make sure you are using the latest version of GenCumulativeSky.exe'
 
-    def separateList(self, list, key):
-            indexList = []; listInfo = [];
-            for item in range(len(list)):
-                if list[item] == key:
-                    indexList.append(item)
-                    listInfo.append(list[item : item+7])
+    # length of the Ladybug lists with the header for each frequency
+    ladybugListStrides = {'Hourly': 7 + 8760, 'Daily': 7 + 365, 'Monthly': 7 + 12}
+    
+    # (key, length, first header of the input list): (indexList, listInfo)
+    separatedLists = LRUCache(16)
+    
+    def findHeaders(self, inputList, key):
+        """ Return the index of the headers in inputList
+            Streams of annual hourly, daily or monthly lists are split by their fixed length. The split is
+            only used if there is a header at each stride and nowhere else. Other lists are scanned for the key.
+        """
+        if inputList and inputList[0] == key and len(inputList) > 4:
+            frequency = inputList[4]
+            if frequency in self.ladybugListStrides:
+                stride = self.ladybugListStrides[frequency]
+                if len(inputList) % stride == 0:
+                    indexList = range(0, len(inputList), stride)
+                    if all([inputList[i] == key and inputList[i + 4] == frequency for i in indexList]) and \
+                       inputList.count(key) == len(indexList):
+                        return indexList
+        
+        indexList = []
+        try:
+            index = inputList.index(key)
+            while True:
+                indexList.append(index)
+                index = inputList.index(key, index + 1)
+        except ValueError: pass
+        return indexList
+    
+    def separateList(self, inputList, key):
+            # the same list is usually separated several times in one solution
+            # the cache doesn't keep the list. a cached result is used if the headers are still at the same place
+            cacheKey = (key, len(inputList), tuple([str(item) for item in inputList[:7]]))
+            cachedResult = self.separatedLists.get(cacheKey)
+            if cachedResult and all([inputList[item : item+7] == info for item, info in zip(*cachedResult)]):
+                return list(cachedResult[0]), [list(info) for info in cachedResult[1]]
+            
+            indexList = self.findHeaders(inputList, key)
+            listInfo = [inputList[item : item+7] for item in indexList]
             # in case of numbers with no str information
             if len(indexList) == 0:
-                indexList = [-7, len(list)];
+                indexList = [-7, len(inputList)];
                 listInfo = [key, 'somewhere','someData','?','?','?','?']
-            else: indexList.append(len(list))
-            #
-            return indexList, listInfo
+                return indexList, listInfo
+            
+            indexList.append(len(inputList))
+            self.separatedLists.set(cacheKey, (indexList, listInfo))
+            return list(indexList), [list(info) for info in listInfo]
 
+    def splitEpwPath(self, epw_file):
+        """ Return the archive and the name of the member for epw files inside a zip archive
+            (e.g. c:\\weather\\USA.zip\\USA_NY_New.York.epw) and (epw_file, None) for the others
+        """
+        # the archive is the first part of the path that ends with .zip and is a file
+        for match in re.finditer(r'\.zip(?=[\\/]|$)', epw_file, re.IGNORECASE):
+            archive = epw_file[:match.end()]
+            if os.path.isfile(archive):
+                member = epw_file[match.end() + 1:].replace('\\', '/')
+                return archive, member or None
+        return epw_file, None
+    
+    def openEpwFile(self, epw_file):
+        """ Open an epw file for reading. epw_file can be an .epw file, an .epw.gz file, a .zip archive
+            (the first epw file inside the archive will be used) or an epw file inside a .zip archive.
+            Compressed files are decompressed while they are read and nothing is written to the disk.
+        """
+        archive, member = self.splitEpwPath(epw_file)
+        if archive.lower().endswith('.zip'):
+            zipFile = zipfile.ZipFile(archive)
+            try:
+                if member == None:
+                    epwMembers = [name for name in zipFile.namelist() if name.lower().endswith('.epw')]
+                    if not epwMembers: raise IOError('There is no epw file in ' + archive)
+                    member = epwMembers[0]
+                # the archive is closed when the member is closed
+                return EPWZipMember(zipFile, member)
+            except:
+                zipFile.close()
+                raise
+        elif epw_file.lower().endswith('.gz'):
+            return gzip.open(epw_file, 'rb')
+        return open(epw_file,"r")
+    
     ## read epw file
-    def epwLocation(self, epw_file):
-        epwfile = open(epw_file,"r")
+    def epwLocation(self, epw_file, workingDir = None, useCache = True):
+        if useCache:
+            cachedData = EPWCache(workingDir).load(epw_file, fieldIndices = [])
+            if cachedData: return cachedData[0]
+        
+        epwfile = self.openEpwFile(epw_file)
         headline = epwfile.readline()
         csheadline = headline.split(',')
         while 1>0: #remove empty cells from the end of the list if any
@@ -481,9 +877,15 @@ class Preparation(object):
             lngt+',     !Longitude\n' + \
             timeZone+',     !Time Zone\n' + \
             elev + ';       !Elevation'
-        epwfile.close
+        epwfile.close()
         return locName, lat, lngt, timeZone, elev, locationString
     
+    def epwHeaderLines(self, epw_file):
+        """ Return the 8 header lines of an epw file"""
+        epwfile = self.openEpwFile(epw_file)
+        try: return [epwfile.readline().rstrip() for lineCount in range(8)]
+        finally: epwfile.close()
+    
     def separateHeader(self, inputList):
         num = []; str = []
         for item in inputList:
@@ -493,45 +895,239 @@ class Preparation(object):
     
     strToBeFound = 'key:location/dataType/units/frequency/startsAt/endsAt'
     
-    def epwDataReader(self, epw_file, location = 'Somewhere!'):
-        # weather data
-        dbTemp = [self.strToBeFound, location, 'Dry Bulb Temperature', 'C', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        dewPoint = [self.strToBeFound, location, 'Dew Point Temperature', 'C', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        RH = [self.strToBeFound, location, 'Relative Humidity', '%', 'Hourly', (1, 1, 1), (12, 31, 24)]
-        windSpeed = [self.strToBeFound, location, 'Wind Speed', 'm/s', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        windDir = [self.strToBeFound, location, 'Wind Direction', 'degrees', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        dirRad = [self.strToBeFound, location, 'Direct Normal Radiation', 'Wh/m2', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        difRad = [self.strToBeFound, location, 'Diffuse Horizontal Radiation', 'Wh/m2', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        glbRad = [self.strToBeFound, location, 'Global Horizontal Radiation', 'Wh/m2', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        dirIll = [self.strToBeFound, location, 'Direct Normal Illuminance', 'lux', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        difIll = [self.strToBeFound, location, 'Diffuse Horizontal Illuminance', 'lux', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        glbIll = [self.strToBeFound, location, 'Global Horizontal Illuminance', 'lux', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        cloudCov = [self.strToBeFound, location, 'Total Cloud Cover', 'tenth', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        rainDepth = [self.strToBeFound, location, 'Liquid Precipitation Depth', 'mm', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        barPress = [self.strToBeFound, location, 'Barometric Pressure', 'Pa', 'Hourly', (1, 1, 1), (12, 31, 24)];
-        epwfile = open(epw_file,"r")
-        lnum = 1 # line number
-        for line in epwfile:
-            if lnum > 8:
-                dbTemp.append(float(line.split(',')[6]))
-                dewPoint.append(float(line.split(',')[7]))
-                RH.append(float(line.split(',')[8]))
-                barPress.append(float(line.split(',')[9]))
-                windSpeed.append(float(line.split(',')[21]))
-                windDir.append(float(line.split(',')[20]))
-                dirRad.append(float(line.split(',')[14]))
-                difRad.append(float(line.split(',')[15]))
-                glbRad.append(float(line.split(',')[13]))
-                dirIll.append(float(line.split(',')[17]))
-                difIll.append(float(line.split(',')[18]))
-                glbIll.append(float(line.split(',')[16]))
-                cloudCov.append(float(line.split(',')[22]))
-                try:
-                    if float(line.split(',')[33])!=999: rainDepth.append(float(line.split(',')[33]))
-                    else: rainDepth.append(0.0)
-                except: pass
-            lnum += 1
-        return dbTemp, dewPoint, RH, windSpeed, windDir, dirRad, difRad, glbRad, dirIll, difIll, glbIll, cloudCov, rainDepth, barPress
+    # name, units and array typecode for each of the 35 fields of an epw data row
+    # typecode None means the field is text and will be kept as a list of strings
+    epwFields = [('Year', 'yr', 'i'), ('Month', 'month', 'i'), ('Day', 'day', 'i'), ('Hour', 'hr', 'i'), ('Minute', 'min', 'i'),
+                 ('Data Source and Uncertainty Flags', '', None),
+                 ('Dry Bulb Temperature', 'C', 'd'), ('Dew Point Temperature', 'C', 'd'),
+                 ('Relative Humidity', '%', 'd'), ('Barometric Pressure', 'Pa', 'd'),
+                 ('Extraterrestrial Horizontal Radiation', 'Wh/m2', 'd'), ('Extraterrestrial Direct Normal Radiation', 'Wh/m2', 'd'),
+                 ('Horizontal Infrared Radiation Intensity', 'Wh/m2', 'd'), ('Global Horizontal Radiation', 'Wh/m2', 'd'),
+                 ('Direct Normal Radiation', 'Wh/m2', 'd'), ('Diffuse Horizontal Radiation', 'Wh/m2', 'd'),
+                 ('Global Horizontal Illuminance', 'lux', 'd'), ('Direct Normal Illuminance', 'lux', 'd'),
+                 ('Diffuse Horizontal Illuminance', 'lux', 'd'), ('Zenith Luminance', 'Cd/m2', 'd'),
+                 ('Wind Direction', 'degrees', 'd'), ('Wind Speed', 'm/s', 'd'),
+                 ('Total Cloud Cover', 'tenth', 'd'), ('Opaque Sky Cover', 'tenth', 'd'),
+                 ('Visibility', 'km', 'd'), ('Ceiling Height', 'm', 'd'),
+                 ('Present Weather Observation', '', 'd'), ('Present Weather Codes', '', None),
+                 ('Precipitable Water', 'mm', 'd'), ('Aerosol Optical Depth', 'thousandths', 'd'),
+                 ('Snow Depth', 'cm', 'd'), ('Days Since Last Snowfall', 'day', 'd'),
+                 ('Albedo', '', 'd'), ('Liquid Precipitation Depth', 'mm', 'd'),
+                 ('Liquid Precipitation Quantity', 'hr', 'd')]
+    
+    # epw field index of each of the outputs of epwDataReader in the order that they are returned
+    epwDataReaderFields = [6, 7, 8, 21, 20, 14, 15, 13, 17, 18, 16, 22, 33, 9]
+    
+    def padEpwRows(self, rows):
+        # some of the older files don't have the precipitation fields
+        # pad the rows with the missing value so all the rows have all the fields
+        numOfFields = len(self.epwFields)
+        if rows and min(map(len, rows)) < numOfFields:
+            for row in rows:
+                if len(row) < numOfFields: row.extend(['999'] * (numOfFields - len(row)))
+        return rows
+    
+    def epwStrings2Column(self, values, typecode):
+        """ Convert the strings of one epw field to a typed column"""
+        if typecode == None: return list(values)
+        elif typecode == 'i':
+            try: return array('i', map(int, values))
+            except ValueError: return array('i', [int(float(x)) for x in values])
+        return array(typecode, map(float, values))
+    
+    def epwRows2Columns(self, rows):
+        """ Transpose tokenized epw rows into one column per epw field
+            numeric fields are returned as array.array and text fields as lists of strings
+        """
+        rows = self.padEpwRows(rows)
+        if rows: columns = zip(*rows)
+        else: columns = [()] * len(self.epwFields)
+        
+        return [self.epwStrings2Column(columns[fieldCount], typecode) \
+                for fieldCount, (fieldName, units, typecode) in enumerate(self.epwFields)]
+    
+    def epwRowReader(self, epw_file):
+        """ Return the data rows of an epw file. Each row is tokenized to a list of strings."""
+        epwfile = self.openEpwFile(epw_file)
+        try: lines = epwfile.readlines()[8:]
+        finally: epwfile.close()
+        return self.padEpwRows([line.rstrip().split(',') for line in lines if line.strip()])
+    
+    def epwColumnReader(self, epw_file, workingDir = None, useCache = True):
+        """ Read all the 35 fields of an epw file in one pass
+            Each data row is tokenized only once and the values are written into typed columns
+            Parsed columns are stored in a binary sidecar in the working directory so the next
+            read of the same file skips the text parsing
+        """
+        if useCache:
+            epwCache = EPWCache(workingDir)
+            cachedData = epwCache.load(epw_file)
+            if cachedData: return cachedData[1]
+        
+        epwColumns = self.epwRows2Columns(self.epwRowReader(epw_file))
+        
+        if useCache: epwCache.save(epw_file, self.epwLocation(epw_file, useCache = False), epwColumns)
+        return epwColumns
+    
+    def epwHourlyData(self, fieldIndex, column, location = 'Somewhere!', missingIndices = None, fillMethod = None):
+        """ Put the Ladybug header in front of the values of an epw field
+            If fillMethod is 'linear' or 'daily' the values at missingIndices are filled
+        """
+        fieldName, units, typecode = self.epwFields[fieldIndex]
+        header = [self.strToBeFound, location, fieldName, units, 'Hourly', (1, 1, 1), (12, 31, 24)]
+        if fieldIndex == 33:
+            # 999 is missing data for liquid precipitation depth
+            return header + [x if x != 999 else 0.0 for x in column]
+        if fillMethod and missingIndices:
+            return header + self.fillMissingValues(column, missingIndices, fillMethod)
+        return header + list(column)
+    
+    # values of each field that are equal or larger than these values are missing
+    # based on EnergyPlus Auxiliary Programs, Weather Data Format
+    epwMissingValues = {6: 99.9, 7: 99.9, 8: 999, 9: 999999, 10: 9999, 11: 9999, 12: 9999,
+                        13: 9999, 14: 9999, 15: 9999, 16: 999999, 17: 999999, 18: 999999, 19: 9999,
+                        20: 999, 21: 999, 22: 99, 23: 99, 24: 9999, 25: 99999, 28: 999,
+                        29: 0.999, 30: 999, 31: 99, 32: 999, 33: 999, 34: 99}
+    
+    def epwMissingIndices(self, fieldIndex, column):
+        """ Indices of the missing values of one epw field. The length of the array is the number of missing values"""
+        if fieldIndex not in self.epwMissingValues: return array('i')
+        missingValue = self.epwMissingValues[fieldIndex]
+        return array('i', [count for count, value in enumerate(column) if value >= missingValue])
+    
+    def epwMissingData(self, epwColumns, fieldIndices = None):
+        """ Return a dictionary of field index: indices of missing values for the fields with missing values"""
+        if fieldIndices == None: fieldIndices = self.epwMissingValues.keys()
+        missingData = {}
+        for fieldIndex in fieldIndices:
+            if epwColumns[fieldIndex] == None: continue
+            missingIndices = self.epwMissingIndices(fieldIndex, epwColumns[fieldIndex])
+            if missingIndices: missingData[fieldIndex] = missingIndices
+        return missingData
+    
+    def reportMissingData(self, missingData, fillMethod = 'linear'):
+        """ Print and return a message for each field that has filled missing values"""
+        messages = []
+        for fieldIndex in sorted(missingData.keys()):
+            if fieldIndex == 33: continue
+            messages.append(`len(missingData[fieldIndex])` + ' missing values of ' + self.epwFields[fieldIndex][0] + \
+                            ' are filled by ' + fillMethod + ' interpolation.')
+            print messages[-1]
+        return messages
+    
+    def fillMissingValues(self, column, missingIndices, fillMethod = 'linear', stepsPerDay = 24, numOfDays = 7):
+        """ Return a list of the values with the missing values filled
+            linear: interpolate between the valid values before and after each gap
+            daily: average of the valid values at the same time of the day in the numOfDays days before and after
+                   if there is no valid value in this period the value is interpolated linearly
+        """
+        values = list(column)
+        if not missingIndices: return values
+        isMissing = set(missingIndices)
+        if len(isMissing) == len(values): return values
+        
+        # valid neighbours of each gap are found once for all the values of the gap
+        gapBounds = {}
+        sortedIndices = sorted(isMissing)
+        gapStart = 0
+        for count, missingIndex in enumerate(sortedIndices):
+            if count + 1 == len(sortedIndices) or sortedIndices[count + 1] != missingIndex + 1:
+                for gapIndex in sortedIndices[gapStart:count + 1]:
+                    gapBounds[gapIndex] = (sortedIndices[gapStart] - 1, missingIndex + 1)
+                gapStart = count + 1
+        
+        def linearFill(missingIndex):
+            before, after = gapBounds[missingIndex]
+            if before < 0: return column[after]
+            if after >= len(values): return column[before]
+            return column[before] + (column[after] - column[before]) * (missingIndex - before) / float(after - before)
+        
+        def dailyFill(missingIndex):
+            profile = [column[i] for dayCount in range(1, numOfDays + 1) \
+                       for i in (missingIndex - dayCount * stepsPerDay, missingIndex + dayCount * stepsPerDay) \
+                       if 0 <= i < len(values) and i not in isMissing]
+            if profile: return sum(profile) / float(len(profile))
+            return linearFill(missingIndex)
+        
+        if fillMethod == 'daily': fill = dailyFill
+        else: fill = linearFill
+        for missingIndex in missingIndices: values[missingIndex] = fill(missingIndex)
+        return values
+    
+    def epwDataReader(self, epw_file, location = 'Somewhere!', workingDir = None, useCache = True, fillMethod = None):
+        """ fillMethod can be None, 'linear' or 'daily'. By default the missing values are returned as they are in the file"""
+        epwColumns = self.epwColumnReader(epw_file, workingDir, useCache)
+        missingData = self.epwMissingData(epwColumns, self.epwDataReaderFields)
+        if fillMethod: self.reportMissingData(missingData, fillMethod)
+        # dbTemp, dewPoint, RH, windSpeed, windDir, dirRad, difRad, glbRad, dirIll, difIll, glbIll, cloudCov, rainDepth, barPress
+        return tuple([self.epwHourlyData(fieldIndex, epwColumns[fieldIndex], location, missingData.get(fieldIndex), fillMethod) \
+                      for fieldIndex in self.epwDataReaderFields])
+    
+    def epwRecordsPerHour(self, epw_file):
+        """ Number of records per hour from DATA PERIODS line of an epw file"""
+        epwfile = self.openEpwFile(epw_file)
+        try:
+            for lineCount in range(8):
+                line = epwfile.readline()
+                if line.upper().startswith('DATA PERIODS'):
+                    try: return max(1, int(line.split(',')[2]))
+                    except: return 1
+        finally: epwfile.close()
+        return 1
+    
+    def epwStreamReader(self, epw_file, fieldIndices = None, chunkSize = 8760):
+        """ Generator that reads an epw file in chunks of chunkSize rows
+            Each chunk is an EPWDataChunk with the timestamps and typed columns of fieldIndices.
+            Only one chunk is in memory at a time so multi-year and sub-hourly files can be
+            aggregated in bounded memory.
+        """
+        if fieldIndices == None: fieldIndices = self.epwDataReaderFields
+        timestep = self.epwRecordsPerHour(epw_file)
+        epwfile = self.openEpwFile(epw_file)
+        try:
+            for lineCount in range(8): epwfile.readline()
+            rows = []; rowCount = 0
+            for line in epwfile:
+                if not line.strip(): continue
+                rows.append(line.rstrip().split(','))
+                if len(rows) == chunkSize:
+                    yield EPWDataChunk(self, rows, fieldIndices, timestep, rowCount)
+                    rowCount += len(rows); rows = []
+            if rows: yield EPWDataChunk(self, rows, fieldIndices, timestep, rowCount)
+        finally: epwfile.close()
+    
+    # (dataType, units, number of values, md5 of the values) > MonthlyHourlyStatistics of the hourly
+    # data that is imported from epw files
+    hourlyStatistics = LRUCache(64)
+    
+    def hourlyStatisticsKey(self, dataType, units, values):
+        return dataType, units, len(values), self.valuesDigest(values)
+    
+    def registerHourlyStatistics(self, dataType, units, values, statistics):
+        key = self.hourlyStatisticsKey(dataType, units, values)
+        if key[-1] != None: self.hourlyStatistics.set(key, statistics)
+    
+    def getHourlyStatistics(self, dataType, units, values):
+        """ Return the MonthlyHourlyStatistics of the values if they are imported from an epw file, otherwise None"""
+        if len(values) != 8760 or not len(self.hourlyStatistics): return None
+        key = self.hourlyStatisticsKey(dataType, units, values)
+        if key[-1] == None: return None
+        return self.hourlyStatistics.get(key)
+    
+    # EPWData objects that are already opened in this session
+    openedWeatherData = {}
+    
+    def epwWeatherData(self, epw_file, workingDir = None, useCache = True, fillMethod = None):
+        """ Return a lazy EPWData object for this epw file
+            The same object is returned as long as the file is not changed, so the fields that are
+            already parsed by one component are free for the next one
+        """
+        key = EPWCache(workingDir).fileKey(epw_file) + (fillMethod,)
+        if key not in self.openedWeatherData:
+            # don't keep more than a handful of weather files in memory
+            if len(self.openedWeatherData) >= 8: self.openedWeatherData.clear()
+            self.openedWeatherData[key] = EPWData(epw_file, workingDir, useCache, fillMethod)
+        return self.openedWeatherData[key]
     
     ##### Start of Gencumulative Sky
     def removeBlank(self, str):
@@ -954,55 +1550,2041 @@ class Preparation(object):
 (-0.108119,0.0,0.994138),(-0.093634,0.05406,0.994138),(-0.05406,0.093634,0.994138),
 (0.0,0.0,1.0)]
         
-        return ReinhartPatchesNormalVectors
+        return ReinhartPatchesNormalVectors
+    
+    TregenzaPatchesNormalVectors = [
+    (0.0,0.994522,0.104528),(0.206773,0.972789,0.104528),(0.404508,0.908541,0.104528),
+(0.584565,0.804585,0.104528),(0.739074,0.665465,0.104528),(0.861281,0.497261,0.104528),
+(0.945847,0.307324,0.104528),(0.989074,0.103956,0.104528),(0.989074,-0.103956,0.104528),
+(0.945847,-0.307324,0.104528),(0.861281,-0.497261,0.104528),(0.739074,-0.665465,0.104528),
+(0.584565,-0.804585,0.104528),(0.404508,-0.908541,0.104528),(0.206773,-0.972789,0.104528),
+(0.0,-0.994522,0.104528),(-0.206773,-0.972789,0.104528),(-0.404508,-0.908541,0.104528),
+(-0.584565,-0.804585,0.104528),(-0.739074,-0.665465,0.104528),(-0.861281,-0.497261,0.104528),
+(-0.945847,-0.307324,0.104528),(-0.989074,-0.103956,0.104528),(-0.989074,0.103956,0.104528),
+(-0.945847,0.307324,0.104528),(-0.861281,0.497261,0.104528),(-0.739074,0.665465,0.104528),
+(-0.584565,0.804585,0.104528),(-0.404508,0.908541,0.104528),(-0.206773,0.972789,0.104528),
+(0.0,0.951057,0.309017),(0.197736,0.930274,0.309017),(0.38683,0.868833,0.309017),
+(0.559017,0.769421,0.309017),(0.706773,0.636381,0.309017),(0.823639,0.475528,0.309017),
+(0.904508,0.293893,0.309017),(0.945847,0.099412,0.309017),(0.945847,-0.099412,0.309017),
+(0.904508,-0.293893,0.309017),(0.823639,-0.475528,0.309017),(0.706773,-0.636381,0.309017),
+(0.559017,-0.769421,0.309017),(0.38683,-0.868833,0.309017),(0.197736,-0.930274,0.309017),
+(0.0,-0.951057,0.309017),(-0.197736,-0.930274,0.309017),(-0.38683,-0.868833,0.309017),
+(-0.559017,-0.769421,0.309017),(-0.706773,-0.636381,0.309017),(-0.823639,-0.475528,0.309017),
+(-0.904508,-0.293893,0.309017),(-0.945847,-0.099412,0.309017),(-0.945847,0.099412,0.309017),
+(-0.904508,0.293893,0.309017),(-0.823639,0.475528,0.309017),(-0.706773,0.636381,0.309017),
+(-0.559017,0.769421,0.309017),(-0.38683,0.868833,0.309017),(-0.197736,0.930274,0.309017),
+(0.0,0.866025,0.5),(0.224144,0.836516,0.5),(0.433013,0.75,0.5),(0.612372,0.612372,0.5),
+(0.75,0.433013,0.5),(0.836516,0.224144,0.5),(0.866025,0.0,0.5),(0.836516,-0.224144,0.5),
+(0.75,-0.433013,0.5),(0.612372,-0.612372,0.5),(0.433013,-0.75,0.5),(0.224144,-0.836516,0.5),
+(0.0,-0.866025,0.5),(-0.224144,-0.836516,0.5),(-0.433013,-0.75,0.5),(-0.612372,-0.612372,0.5),
+(-0.75,-0.433013,0.5),(-0.836516,-0.224144,0.5),(-0.866025,0.0,0.5),(-0.836516,0.224144,0.5),
+(-0.75,0.433013,0.5),(-0.612372,0.612372,0.5),(-0.433013,0.75,0.5),(-0.224144,0.836516,0.5),
+(0.0,0.743145,0.669131),(0.19234,0.717823,0.669131),(0.371572,0.643582,0.669131),(0.525483,0.525483,0.669131),
+(0.643582,0.371572,0.669131),(0.717823,0.19234,0.669131),(0.743145,0.0,0.669131),(0.717823,-0.19234,0.669131),
+(0.643582,-0.371572,0.669131),(0.525483,-0.525483,0.669131),(0.371572,-0.643582,0.669131),
+(0.19234,-0.717823,0.669131),(0.0,-0.743145,0.669131),(-0.19234,-0.717823,0.669131),
+(-0.371572,-0.643582,0.669131),(-0.525483,-0.525483,0.669131),(-0.643582,-0.371572,0.669131),
+(-0.717823,-0.19234,0.669131),(-0.743145,0.0,0.669131),(-0.717823,0.19234,0.669131),
+(-0.643582,0.371572,0.669131),(-0.525483,0.525483,0.669131),(-0.371572,0.643582,0.669131),
+(-0.19234,0.717823,0.669131),(0.0,0.587785,0.809017),(0.201034,0.552337,0.809017),
+(0.377821,0.45027,0.809017),(0.509037,0.293893,0.809017),(0.578855,0.102068,0.809017),
+(0.578855,-0.102068,0.809017),(0.509037,-0.293893,0.809017),(0.377821,-0.45027,0.809017),
+(0.201034,-0.552337,0.809017),(0.0,-0.587785,0.809017),(-0.201034,-0.552337,0.809017),
+(-0.377821,-0.45027,0.809017),(-0.509037,-0.293893,0.809017),(-0.578855,-0.102068,0.809017),
+(-0.578855,0.102068,0.809017),(-0.509037,0.293893,0.809017),(-0.377821,0.45027,0.809017),
+(-0.201034,0.552337,0.809017),(0.0,0.406737,0.913545),(0.203368,0.352244,0.913545),
+(0.352244,0.203368,0.913545),(0.406737,0.0,0.913545),(0.352244,-0.203368,0.913545),
+(0.203368,-0.352244,0.913545),(0.0,-0.406737,0.913545),(-0.203368,-0.352244,0.913545),
+(-0.352244,-0.203368,0.913545),(-0.406737,0.0,0.913545),(-0.352244,0.203368,0.913545),
+(-0.203368,0.352244,0.913545),(0.0,0.207912,0.978148),(0.180057,0.103956,0.978148),
+(0.180057,-0.103956,0.978148),(0.0,-0.207912,0.978148),(-0.180057,-0.103956,0.978148),
+(-0.180057,0.103956,0.978148),(0.0,0.0,1)]
+
+
+class DataHeader(object):
+    """ The 7 header items of a Ladybug list
+        key:location/dataType/units/frequency/startsAt/endsAt
+    """
+    def __init__(self, location = 'Somewhere!', dataType = '', units = '', frequency = 'Hourly', startsAt = (1, 1, 1), endsAt = (12, 31, 24)):
+        self.location = location
+        self.dataType = dataType
+        self.units = units
+        self.frequency = frequency
+        self.startsAt = startsAt
+        self.endsAt = endsAt
+    
+    @classmethod
+    def fromList(cls, headerList):
+        return cls(*headerList[1:7])
+    
+    def toList(self):
+        return [Preparation.strToBeFound, self.location, self.dataType, self.units, self.frequency, self.startsAt, self.endsAt]
+    
+    def duplicate(self, startsAt = None, endsAt = None):
+        return DataHeader(self.location, self.dataType, self.units, self.frequency, startsAt or self.startsAt, endsAt or self.endsAt)
+    
+    def __repr__(self):
+        return self.dataType + ' (' + self.units + ') ' + `self.startsAt` + ' - ' + `self.endsAt`
+
+
+class HourlyDataCollection(object):
+    """ Header and values of a Ladybug list
+        The values are kept in one array of doubles. Slices and analysis periods are views that only
+        keep the indices of the selected values, so the values are never copied or converted again.
+        Use toLadybugList to get the list that the components use.
+    """
+    def __init__(self, header, values, indices = None):
+        self.header = header
+        if not isinstance(values, array): values = array('d', values)
+        self.values = values
+        # xrange for contiguous views and array of indices for the others
+        if indices == None: indices = xrange(len(values))
+        self.indices = indices
+    
+    @classmethod
+    def fromLadybugList(cls, ladybugList):
+        """ Return a list of collections for a list that can have several Ladybug lists after each other"""
+        lb_preparation = Preparation()
+        indexList, listInfo = lb_preparation.separateList(ladybugList, lb_preparation.strToBeFound)
+        # separateList returns a made up header for the lists that don't have any
+        if indexList[0] == -7 or [info for info in listInfo if len(info) != 7]:
+            raise ValueError('Each list should start with a 7 item Ladybug header: ' + lb_preparation.strToBeFound)
+        return [cls(DataHeader.fromList(listInfo[i]), map(float, ladybugList[indexList[i] + 7:indexList[i + 1]])) \
+                for i in range(len(indexList) - 1)]
+    
+    def toList(self):
+        if isinstance(self.indices, xrange) and len(self.indices) == len(self.values): return self.values.tolist()
+        values = self.values
+        return [values[i] for i in self.indices]
+    
+    def toLadybugList(self):
+        return self.header.toList() + self.toList()
+    
+    def __len__(self):
+        return len(self.indices)
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self.indices))
+            if isinstance(self.indices, xrange) and step == 1:
+                first = self.indices[0] if len(self.indices) else 0
+                return HourlyDataCollection(self.header, self.values, xrange(first + start, first + max(stop, start)))
+            return HourlyDataCollection(self.header, self.values, array('i', [self.indices[i] for i in xrange(start, stop, step)]))
+        return self.values[self.indices[key]]
+    
+    def __iter__(self):
+        values = self.values
+        return (values[i] for i in self.indices)
+    
+    def selectPeriod(self, analysisPeriod):
+        """ View of the values in the analysis period ((stMonth, stDay, stHour), (endMonth, endDay, endHour))
+            The period is selected the same way as Preparation.selectHourlyData does and is applied to
+            all the values of the collection
+        """
+        lb_preparation = Preparation()
+        stMonth, stDay, stHour, endMonth, endDay, endHour = lb_preparation.readRunPeriod(analysisPeriod, False)
+        indices = lb_preparation.getPeriodIndices(analysisPeriod)
+        
+        # the values don't start from the first hour of the year
+        firstHour = lb_preparation.date2Hour(*self.header.startsAt)
+        if firstHour != 1 or (len(indices) and max(indices) >= len(self.values)):
+            indices = array('i', [i - firstHour + 1 for i in indices if 0 <= i - firstHour + 1 < len(self.values)])
+        
+        return HourlyDataCollection(self.header.duplicate((stMonth, stDay, stHour), (endMonth, endDay, endHour)), self.values, indices)
+    
+    def __repr__(self):
+        return 'HourlyDataCollection: ' + `self.header` + ' [' + `len(self)` + ' values]'
+
+
+class DataResampler(object):
+    """ Aggregate hourly values to daily, monthly and annual values and calculate rolling statistics
+        Sums and means are calculated from the cumulative sum of the values, so each value is only
+        added once. stat can be 'mean', 'sum', 'min', 'max' or 'percentile'.
+    """
+    stats = ['mean', 'sum', 'min', 'max', 'percentile']
+    
+    def __init__(self, stepsPerDay = 24):
+        self.stepsPerDay = stepsPerDay
+        self.numOfDays = Preparation().numOfDays
+    
+    def cumulativeSum(self, values):
+        cumSum = array('d', [0]) * (len(values) + 1)
+        total = 0
+        for count, value in enumerate(values):
+            total += value
+            cumSum[count + 1] = total
+        return cumSum
+    
+    def groupRanges(self, frequency, numOfValues, hourWindow = None):
+        """ (start, end) index ranges of the values of each day, month or year
+            hourWindow (firstHour, lastHour) only keeps these hours of each day (1 to 24)
+        """
+        stepsPerDay = self.stepsPerDay
+        numOfDays = numOfValues // stepsPerDay
+        if hourWindow == None: firstStep, lastStep = 0, stepsPerDay
+        else: firstStep, lastStep = (hourWindow[0] - 1) * stepsPerDay // 24, hourWindow[1] * stepsPerDay // 24
+        
+        if hourWindow == None and frequency != 'daily':
+            # the days of a month or the year are one range
+            if frequency == 'monthly': dayGroups = [(self.numOfDays[m], self.numOfDays[m + 1]) for m in range(12)]
+            else: dayGroups = [(0, numOfDays)]
+            return [[(stDay * stepsPerDay, min(endDay * stepsPerDay, numOfValues))] for stDay, endDay in dayGroups if stDay < numOfDays]
+        
+        dayRanges = [(day * stepsPerDay + firstStep, day * stepsPerDay + lastStep) for day in range(numOfDays)]
+        if frequency == 'daily': return [[dayRange] for dayRange in dayRanges]
+        elif frequency == 'monthly':
+            return [dayRanges[self.numOfDays[m]:self.numOfDays[m + 1]] for m in range(12) if self.numOfDays[m] < numOfDays]
+        return [dayRanges]
+    
+    def percentile(self, sortedValues, percentile):
+        if not sortedValues: return 0
+        position = (len(sortedValues) - 1) * percentile / 100.0
+        lower = int(position)
+        upper = min(lower + 1, len(sortedValues) - 1)
+        return sortedValues[lower] + (sortedValues[upper] - sortedValues[lower]) * (position - lower)
+    
+    def aggregate(self, values, frequency = 'daily', stat = 'mean', hourWindow = None, percentile = 50):
+        """ Return a list with one value for each day, month or year
+            frequency: 'daily', 'monthly' or 'annual'
+        """
+        if isinstance(values, HourlyDataCollection): values = values.toList()
+        groups = self.groupRanges(frequency, len(values), hourWindow)
+        
+        if stat in ('mean', 'sum'):
+            cumSum = self.cumulativeSum(values)
+            sums = [sum([cumSum[end] - cumSum[start] for start, end in ranges]) for ranges in groups]
+            if stat == 'sum': return sums
+            counts = [sum([end - start for start, end in ranges]) for ranges in groups]
+            return [total / count if count else 0 for total, count in izip(sums, counts)]
+        elif stat == 'min':
+            return [min([min(values[start:end]) for start, end in ranges]) for ranges in groups]
+        elif stat == 'max':
+            return [max([max(values[start:end]) for start, end in ranges]) for ranges in groups]
+        elif stat == 'percentile':
+            return [self.percentile(sorted(chain(*[values[start:end] for start, end in ranges])), percentile) for ranges in groups]
+        raise ValueError('stat should be one of ' + `self.stats`)
+    
+    def monthlyPerHour(self, values, stat = 'mean', percentile = 50):
+        """ Statistics of each hour of the day for each month as 12 lists of stepsPerDay values"""
+        if isinstance(values, HourlyDataCollection): values = values.toList()
+        stepsPerDay = self.stepsPerDay
+        statFunctions = {'mean': lambda x: sum(x) / float(len(x)), 'sum': sum, 'min': min, 'max': max,
+                         'percentile': lambda x: self.percentile(sorted(x), percentile)}
+        if stat not in statFunctions: raise ValueError('stat should be one of ' + `self.stats`)
+        statFunction = statFunctions[stat]
+        monthlyValues = []
+        for month in range(12):
+            start, end = self.numOfDays[month] * stepsPerDay, min(self.numOfDays[month + 1] * stepsPerDay, len(values))
+            if start >= end: break
+            # the values of each step of the day are every stepsPerDay values
+            monthlyValues.append([statFunction(values[start + step:end:stepsPerDay]) for step in range(stepsPerDay)])
+        return monthlyValues
+    
+    def windowBounds(self, index, window, centered, numOfValues):
+        if centered: start = index - window // 2
+        else: start = index - window + 1
+        return max(start, 0), min(start + window, numOfValues)
+    
+    def rollingMean(self, values, window = 24, centered = False):
+        """ Mean of the window ending at (or centered on) each value. Windows are shorter at the ends"""
+        cumSum = self.cumulativeSum(values)
+        numOfValues = len(values)
+        means = []
+        for index in xrange(numOfValues):
+            start, end = self.windowBounds(index, window, centered, numOfValues)
+            means.append((cumSum[end] - cumSum[start]) / (end - start))
+        return means
+    
+    def rollingExtreme(self, values, window, centered, isBetter):
+        # monotonic queue of the indices of the candidates for the extreme value of the window
+        numOfValues = len(values)
+        candidates = deque()
+        results = []
+        nextIndex = 0
+        for index in xrange(numOfValues):
+            start, end = self.windowBounds(index, window, centered, numOfValues)
+            while nextIndex < end:
+                while candidates and not isBetter(values[candidates[-1]], values[nextIndex]): candidates.pop()
+                candidates.append(nextIndex)
+                nextIndex += 1
+            while candidates[0] < start: candidates.popleft()
+            results.append(values[candidates[0]])
+        return results
+    
+    def rollingMin(self, values, window = 24, centered = False):
+        return self.rollingExtreme(values, window, centered, lambda candidate, value: candidate < value)
+    
+    def rollingMax(self, values, window = 24, centered = False):
+        return self.rollingExtreme(values, window, centered, lambda candidate, value: candidate > value)
+
+
+class MonthlyHourlyStatistics(object):
+    """ Statistics of annual hourly values for each hour of the day of each month as a 12 x 24 x stat cube
+        The cube is one flat array so any value is read in O(1). months and hours start from 1.
+    """
+    stats = ('mean', 'min', 'max', 'percentile10', 'percentile25', 'percentile50', 'percentile75', 'percentile90')
+    
+    def __init__(self, values):
+        self.values = values
+    
+    @classmethod
+    def fromHourlyValues(cls, hourlyValues):
+        if len(hourlyValues) != 8760: raise ValueError('Statistics can only be calculated for annual hourly values')
+        if isinstance(hourlyValues, HourlyDataCollection): hourlyValues = hourlyValues.toList()
+        resampler = DataResampler()
+        percentiles = [int(stat[10:]) for stat in cls.stats[3:]]
+        cube = array('d', [0]) * (len(cls.stats) * 288)
+        for month in range(12):
+            start, end = resampler.numOfDays[month] * 24, resampler.numOfDays[month + 1] * 24
+            for hour in range(24):
+                # the values are sorted once for all the statistics of this hour
+                sortedValues = sorted(hourlyValues[start + hour:end:24])
+                statValues = [sum(sortedValues) / float(len(sortedValues)), sortedValues[0], sortedValues[-1]] + \
+                             [resampler.percentile(sortedValues, percentile) for percentile in percentiles]
+                for statCount, value in enumerate(statValues):
+                    cube[(statCount * 12 + month) * 24 + hour] = value
+        return cls(cube)
+    
+    def index(self, stat, month, hour):
+        return (self.stats.index(stat) * 12 + month - 1) * 24 + hour - 1
+    
+    def value(self, stat, month, hour):
+        return self.values[self.index(stat, month, hour)]
+    
+    def monthlyPerHour(self, stat = 'mean'):
+        """ 12 lists of 24 values of one statistic"""
+        start = self.stats.index(stat) * 288
+        return [list(self.values[start + month * 24:start + (month + 1) * 24]) for month in range(12)]
+    
+    def monthlyMean(self, month, firstHour = 1, lastHour = 24):
+        """ Average of the values between firstHour and lastHour of all the days of a month"""
+        start = self.index('mean', month, firstHour)
+        return sum(self.values[start:start + lastHour - firstHour + 1]) / (lastHour - firstHour + 1)
+    
+    def __repr__(self):
+        return 'MonthlyHourlyStatistics: ' + ', '.join(self.stats)
+
+
+class PeriodFinder(object):
+    """ Find the warmest, coldest or most typical periods of N days in annual hourly data
+        Every window of N days is scored from the cumulative sum of the daily values, so all the
+        windows are scored in O(n). criterion can be 'highest', 'lowest' or 'typical'.
+    """
+    criteria = ('highest', 'lowest', 'typical')
+    
+    def __init__(self, numOfDays = 7):
+        self.numOfDays = numOfDays
+        self.lb_preparation = Preparation()
+        self.resampler = DataResampler()
+    
+    def searchDays(self, searchPeriod = None):
+        """ Days of the year (starting from 0) of an analysis period in order. The period can go from the end of the year to the start of the year"""
+        stMonth, stDay, stHour, endMonth, endDay, endHour = self.lb_preparation.readRunPeriod(searchPeriod, False)
+        stDayOfYear = self.lb_preparation.getJD(stMonth, stDay) - 1
+        endDayOfYear = self.lb_preparation.getJD(endMonth, endDay) - 1
+        if stDayOfYear <= endDayOfYear: return range(stDayOfYear, endDayOfYear + 1)
+        return range(stDayOfYear, 365) + range(endDayOfYear + 1)
+    
+    def windowScores(self, dailyValues, criterion = 'highest', referenceValue = None):
+        """ Score of each window of numOfDays consecutive daily values. The best window has the lowest score
+            The score of typical windows is the deviation of the daily values from referenceValue which is
+            the average of all the daily values by default
+        """
+        if criterion not in self.criteria: raise ValueError('criterion should be one of ' + `self.criteria`)
+        if criterion == 'typical':
+            if referenceValue == None: referenceValue = sum(dailyValues) / float(len(dailyValues))
+            dailyValues = [abs(value - referenceValue) for value in dailyValues]
+        cumSum = self.resampler.cumulativeSum(dailyValues)
+        window = self.numOfDays
+        sums = [cumSum[day + window] - cumSum[day] for day in xrange(len(dailyValues) - window + 1)]
+        if criterion == 'highest': return [-total for total in sums]
+        return sums
+    
+    def findPeriods(self, hourlyValues, criterion = 'highest', numOfPeriods = 1, searchPeriod = None, stat = 'mean'):
+        """ Analysis periods of the best numOfPeriods windows that don't overlap, ranked from the best one
+            The windows are only searched in searchPeriod and the daily values are calculated with stat,
+            e.g. use 'max' to find the periods with the hottest afternoons.
+            Returns the analysis periods ((month, day, 1), (month, day, 24)) and the average daily value of each period
+        """
+        if len(hourlyValues) != 8760: raise ValueError('Periods can only be found in annual hourly values')
+        window = self.numOfDays
+        searchDays = self.searchDays(searchPeriod)
+        if len(searchDays) < window: return [], []
+        
+        dailyValues = self.resampler.aggregate(hourlyValues, 'daily', stat)
+        dailyValues = [dailyValues[day] for day in searchDays]
+        scores = self.windowScores(dailyValues, criterion)
+        cumSum = self.resampler.cumulativeSum(dailyValues)
+        
+        dateStrings, days, months = self.lb_preparation.dateTable()
+        def date(day): return months[day * 24] + 1, days[day * 24]
+        
+        analysisPeriods = []; averages = []
+        isTaken = [False] * len(dailyValues)
+        for score, start in sorted(izip(scores, xrange(len(scores)))):
+            # all the windows have the same length so they overlap if one of the ends is taken
+            if isTaken[start] or isTaken[start + window - 1]: continue
+            for day in range(start, start + window): isTaken[day] = True
+            stMonth, stDay = date(searchDays[start])
+            endMonth, endDay = date(searchDays[start + window - 1])
+            analysisPeriods.append(((stMonth, stDay, 1), (endMonth, endDay, 24)))
+            averages.append((cumSum[start + window] - cumSum[start]) / window)
+            if len(analysisPeriods) == numOfPeriods: break
+        return analysisPeriods, averages
+
+
+class ConditionalStatement(object):
+    """ Conditional statement for hourly data lists, e.g. 'a > 25 and b < 80'
+        Letters a to z are the values of the 1st to 26th lists. The statement can use comparisons
+        (<, <=, >, >=, ==, !=, also chained as in '18 < a < 24'), +, -, *, /, parentheses and
+        and, or, not. The statement is parsed once and compiled to a single pass over all the hours.
+    """
+    tokenPattern = re.compile(r'\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|(<=|>=|==|!=|<>|<|>|\+|-|\*|/|\(|\))|([A-Za-z_]\w*))')
+    comparisonOperators = ['<', '<=', '>', '>=', '==', '!=', '<>']
+    
+    def __init__(self, statement):
+        self.statement = statement
+        self.tokens = self.tokenize(statement)
+        self.position = 0
+        self.tree = self.parseOr()
+        if self.position != len(self.tokens):
+            raise SyntaxError('Unexpected ' + `self.tokens[self.position][1]` + ' in ' + `statement`)
+        # indices of the lists that are used in the statement
+        self.variables = sorted(set([token[1] for token in self.tokens if token[0] == 'var']))
+        self.source = self.toSource(self.tree)
+        self.function = self.compileStatement()
+    
+    def tokenize(self, statement):
+        tokens = []
+        position = 0
+        statement = statement.rstrip()
+        while position < len(statement):
+            match = self.tokenPattern.match(statement, position)
+            if not match or match.end() == position:
+                raise SyntaxError('Invalid character ' + `statement[position:].strip()[:1]` + ' in ' + `statement`)
+            number, operator, name = match.groups()
+            if number != None: tokens.append(('num', number))
+            elif operator != None: tokens.append(('op', operator))
+            elif name in ('and', 'or', 'not'): tokens.append(('op', name))
+            elif len(name) == 1 and 'a' <= name <= 'z': tokens.append(('var', ord(name) - ord('a')))
+            else: raise SyntaxError('Unknown name ' + `name` + ' in ' + `statement` + '. Use letters a to z for the lists')
+            position = match.end()
+        return tokens
+    
+    def peek(self):
+        if self.position < len(self.tokens): return self.tokens[self.position]
+        return (None, None)
+    
+    def expect(self, operator):
+        if self.peek() != ('op', operator):
+            raise SyntaxError('Expected ' + `operator` + ' in ' + `self.statement`)
+        self.position += 1
+    
+    # recursive descent parser. Nodes are tuples of (node type, ...)
+    def parseOr(self):
+        nodes = [self.parseAnd()]
+        while self.peek() == ('op', 'or'):
+            self.position += 1
+            nodes.append(self.parseAnd())
+        if len(nodes) == 1: return nodes[0]
+        return ('or', nodes)
+    
+    def parseAnd(self):
+        nodes = [self.parseNot()]
+        while self.peek() == ('op', 'and'):
+            self.position += 1
+            nodes.append(self.parseNot())
+        if len(nodes) == 1: return nodes[0]
+        return ('and', nodes)
+    
+    def parseNot(self):
+        if self.peek() == ('op', 'not'):
+            self.position += 1
+            return ('not', self.parseNot())
+        return self.parseComparison()
+    
+    def parseComparison(self):
+        first = self.parseSum()
+        comparisons = []
+        while self.peek()[0] == 'op' and self.peek()[1] in self.comparisonOperators:
+            operator = self.peek()[1]
+            self.position += 1
+            comparisons.append((operator, self.parseSum()))
+        if not comparisons: return first
+        return ('compare', first, comparisons)
+    
+    def parseSum(self):
+        node = self.parseProduct()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            operator = self.peek()[1]
+            self.position += 1
+            node = ('binop', operator, node, self.parseProduct())
+        return node
+    
+    def parseProduct(self):
+        node = self.parseFactor()
+        while self.peek() in (('op', '*'), ('op', '/')):
+            operator = self.peek()[1]
+            self.position += 1
+            node = ('binop', operator, node, self.parseFactor())
+        return node
+    
+    def parseFactor(self):
+        tokenType, value = self.peek()
+        if tokenType == None: raise SyntaxError('Unexpected end of ' + `self.statement`)
+        self.position += 1
+        if tokenType == 'num': return ('num', value)
+        elif tokenType == 'var': return ('var', value)
+        elif value in ('-', '+'): return ('unary', value, self.parseFactor())
+        elif value == '(':
+            node = self.parseOr()
+            self.expect(')')
+            return node
+        raise SyntaxError('Unexpected ' + `value` + ' in ' + `self.statement`)
+    
+    def toSource(self, node):
+        nodeType = node[0]
+        if nodeType == 'num': return node[1]
+        elif nodeType == 'var': return 'v' + `node[1]`
+        elif nodeType == 'unary': return '(' + node[1] + self.toSource(node[2]) + ')'
+        elif nodeType == 'binop': return '(' + self.toSource(node[2]) + ' ' + node[1] + ' ' + self.toSource(node[3]) + ')'
+        elif nodeType == 'not': return '(not ' + self.toSource(node[1]) + ')'
+        elif nodeType == 'compare':
+            return '(' + self.toSource(node[1]) + ''.join([' ' + operator + ' ' + self.toSource(operand) \
+                                                          for operator, operand in node[2]]) + ')'
+        return '(' + (' ' + nodeType + ' ').join([self.toSource(child) for child in node[1]]) + ')'
+    
+    def compileStatement(self):
+        # the statement is evaluated for all the hours in one list comprehension
+        columnNames = ['c' + `var` for var in self.variables]
+        valueNames = ['v' + `var` for var in self.variables]
+        if not self.variables:
+            source = 'lambda numOfValues: [' + self.source + '] * numOfValues'
+        elif len(self.variables) == 1:
+            source = 'lambda ' + columnNames[0] + ': [' + self.source + ' for ' + valueNames[0] + ' in ' + columnNames[0] + ']'
+        else:
+            source = 'lambda ' + ', '.join(columnNames) + ': [' + self.source + ' for ' + ', '.join(valueNames) + \
+                     ' in izip(' + ', '.join(columnNames) + ')]'
+        return eval(compile(source, '<conditional statement>', 'eval'), {'izip': izip})
+    
+    def evaluate(self, lists, numOfValues = 8760):
+        """ Return the result of the statement for each item of the lists"""
+        if not self.variables: return self.function(numOfValues)
+        return self.function(*[lists[var] for var in self.variables])
+
+
+class HourPattern(object):
+    """ Pattern of selected hours packed in the bits of a long (bit i is hour of the year i + 1)
+        It can be used as the list of True/False values of the conditional statement (indexing,
+        iteration and len work the same) and supports &, |, ^, ~ and counting without loops over the hours.
+    """
+    def __init__(self, bits = 0L, length = 8760):
+        self.length = length
+        self.fullBits = (1L << length) - 1
+        self.bits = long(bits) & self.fullBits
+    
+    @classmethod
+    def fromList(cls, patternList):
+        """ Pattern from a list of values. The hours with a True value are selected"""
+        if not len(patternList): return cls(0L, 0)
+        bitString = ''.join(['1' if pattern else '0' for pattern in reversed(patternList)])
+        return cls(long(bitString, 2), len(patternList))
+    
+    @classmethod
+    def fromIndices(cls, indices, length = 8760):
+        """ Pattern from the indices of the selected hours, e.g. Preparation.getPeriodIndices"""
+        if isinstance(indices, xrange) and len(indices):
+            return cls(((1L << len(indices)) - 1) << indices[0], length)
+        bitList = ['0'] * length
+        for index in indices: bitList[length - 1 - index] = '1'
+        if not length: return cls(0L, 0)
+        return cls(long(''.join(bitList), 2), length)
+    
+    @classmethod
+    def fromAnalysisPeriod(cls, analysisPeriod):
+        return cls.fromIndices(Preparation().getPeriodIndices(analysisPeriod))
+    
+    @classmethod
+    def allHours(cls, length = 8760):
+        return cls((1L << length) - 1, length)
+    
+    def duplicate(self, bits):
+        return HourPattern(bits, self.length)
+    
+    def otherBits(self, other):
+        if isinstance(other, HourPattern): return other.bits
+        return HourPattern.fromList(other).bits
+    
+    def __and__(self, other):
+        return self.duplicate(self.bits & self.otherBits(other))
+    
+    def __or__(self, other):
+        return self.duplicate(self.bits | self.otherBits(other))
+    
+    def __xor__(self, other):
+        return self.duplicate(self.bits ^ self.otherBits(other))
+    
+    def __invert__(self):
+        return self.duplicate(~self.bits & self.fullBits)
+    
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+    
+    def __eq__(self, other):
+        return isinstance(other, HourPattern) and self.bits == other.bits and self.length == other.length
+    
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    
+    def intersectPeriod(self, analysisPeriod):
+        """ Hours of the pattern that are also in the analysis period"""
+        return self & HourPattern.fromAnalysisPeriod(analysisPeriod)
+    
+    def count(self, value = True):
+        """ Number of selected hours (or unselected hours if value is False)"""
+        selectedCount = bin(self.bits).count('1')
+        if value: return selectedCount
+        return self.length - selectedCount
+    
+    def hours(self):
+        """ Indices of the selected hours (hour of the year - 1)"""
+        bitString = bin(self.bits)[:1:-1]
+        index = bitString.find('1')
+        while index != -1:
+            yield index
+            index = bitString.find('1', index + 1)
+    
+    def toList(self):
+        bitString = bin(self.bits)[:1:-1].ljust(self.length, '0')
+        return [bit == '1' for bit in bitString]
+    
+    def __len__(self):
+        return self.length
+    
+    def __getitem__(self, index):
+        if index < 0: index += self.length
+        if not 0 <= index < self.length: raise IndexError('hour pattern index out of range')
+        return bool((self.bits >> index) & 1)
+    
+    def __iter__(self):
+        return iter(self.toList())
+    
+    def __contains__(self, value):
+        if value: return self.bits != 0
+        return self.count() < self.length
+    
+    def __repr__(self):
+        return 'HourPattern: ' + `self.count()` + ' of ' + `self.length` + ' hours'
+
+
+class EPWZipMember(object):
+    """ File object of an epw file inside a zip archive that keeps the archive open as long as the
+        member is open and closes both of them together
+    """
+    def __init__(self, zipFile, member):
+        self.zipFile = zipFile
+        self.memberFile = zipFile.open(member)
+    
+    def __iter__(self):
+        return iter(self.memberFile)
+    
+    def __getattr__(self, name):
+        return getattr(self.memberFile, name)
+    
+    def close(self):
+        try: self.memberFile.close()
+        finally: self.zipFile.close()
+
+
+class EPWData(object):
+    """ Weather data of an epw file that parses each field only the first time it is asked for
+        The rows of the file are tokenized once and kept, so parsing a new field is only a type
+        conversion. If there is a sidecar for the file the fields are read from the sidecar instead.
+    """
+    def __init__(self, epw_file, workingDir = None, useCache = True, fillMethod = None):
+        self.epwFile = epw_file
+        self.workingDir = workingDir
+        self.useCache = useCache
+        self.fillMethod = fillMethod
+        self.lb_preparation = Preparation()
+        self.rows = None
+        self.columns = [None] * len(self.lb_preparation.epwFields)
+        # field index: indices of the missing values. it is filled when a field is parsed
+        self.missingData = {}
+        self.locationData = None
+        # field index: MonthlyHourlyStatistics
+        self.statisticsData = {}
+        self.cachedStatistics = None
+        # new statistics that are not written to the statistics sidecar yet
+        self.statisticsChanged = False
+        self.epwFields = self.lb_preparation.epwFields
+    
+    @property
+    def location(self):
+        # locName, lat, lngt, timeZone, elev, locationString
+        if self.locationData == None:
+            self.locationData = self.lb_preparation.epwLocation(self.epwFile, self.workingDir, self.useCache)
+        return self.locationData
+    
+    @property
+    def parsedFields(self):
+        return [fieldIndex for fieldIndex, column in enumerate(self.columns) if column != None]
+    
+    def column(self, fieldIndex):
+        """ Typed column for an epw field. fieldIndex is the index of the field in an epw row."""
+        if self.columns[fieldIndex] == None:
+            if self.rows == None and self.useCache:
+                cachedData = EPWCache(self.workingDir).load(self.epwFile, fieldIndices = [fieldIndex])
+                if cachedData: self.columns[fieldIndex] = cachedData[1][fieldIndex]
+            
+            if self.columns[fieldIndex] == None:
+                if self.rows == None: self.rows = self.lb_preparation.epwRowReader(self.epwFile)
+                typecode = self.lb_preparation.epwFields[fieldIndex][2]
+                self.columns[fieldIndex] = self.lb_preparation.epwStrings2Column([row[fieldIndex] for row in self.rows], typecode)
+                
+                # the rows aren't needed anymore once all the fields are parsed
+                if None not in self.columns:
+                    self.rows = None
+                    if self.useCache: EPWCache(self.workingDir).save(self.epwFile, self.location, self.columns)
+            
+            missingIndices = self.lb_preparation.epwMissingIndices(fieldIndex, self.columns[fieldIndex])
+            if missingIndices: self.missingData[fieldIndex] = missingIndices
+        return self.columns[fieldIndex]
+    
+    def hourlyCollection(self, fieldIndex):
+        """ HourlyDataCollection for an epw field. The missing values are filled if there is a fillMethod"""
+        hourlyData = self.hourlyData(fieldIndex)
+        return HourlyDataCollection(DataHeader.fromList(hourlyData[:7]), hourlyData[7:])
+    
+    def hourlyData(self, fieldIndex):
+        """ Ladybug list with the header for an epw field
+            The statistics of the values are registered so the components that get this list can use them
+        """
+        column = self.column(fieldIndex)
+        hourlyData = self.lb_preparation.epwHourlyData(fieldIndex, column, self.location[0], self.missingData.get(fieldIndex), self.fillMethod)
+        if self.epwFields[fieldIndex][2] != None and len(hourlyData) == 8767:
+            self.lb_preparation.registerHourlyStatistics(hourlyData[2], hourlyData[3], hourlyData[7:], self.statistics(fieldIndex, hourlyData[7:]))
+        return hourlyData
+    
+    def statistics(self, fieldIndex, hourlyValues = None):
+        """ MonthlyHourlyStatistics of an epw field
+            The statistics are calculated once and kept in the statistics sidecar of the file
+        """
+        if fieldIndex not in self.statisticsData:
+            statistics = None
+            if self.useCache:
+                if self.cachedStatistics == None: self.cachedStatistics = EPWCache(self.workingDir).loadStatistics(self.epwFile)
+                statistics = self.cachedStatistics.get((fieldIndex, self.fillMethod))
+            if statistics == None:
+                if hourlyValues == None:
+                    hourlyValues = self.lb_preparation.epwHourlyData(fieldIndex, self.column(fieldIndex), self.location[0],
+                                                                     self.missingData.get(fieldIndex), self.fillMethod)[7:]
+                statistics = MonthlyHourlyStatistics.fromHourlyValues(hourlyValues)
+                if self.useCache:
+                    self.cachedStatistics[(fieldIndex, self.fillMethod)] = statistics
+                    self.statisticsChanged = True
+            self.statisticsData[fieldIndex] = statistics
+        return self.statisticsData[fieldIndex]
+    
+    def filledValuesReport(self, fieldIndices):
+        """ Messages about the missing values of these fields that are filled. Empty if there is no fillMethod"""
+        if not self.fillMethod: return []
+        missingData = dict([(fieldIndex, self.missingData[fieldIndex]) for fieldIndex in fieldIndices if fieldIndex in self.missingData])
+        return self.lb_preparation.reportMissingData(missingData, self.fillMethod)
+    
+    def saveCache(self):
+        """ Write the parsed fields and the new statistics to the sidecars of the file
+            Call it once after all the needed fields are asked for. The sidecar has all the fields
+            so if the file is parsed from the text the rest of the fields are parsed from the rows.
+        """
+        if not self.useCache: return
+        if self.rows != None:
+            # the last one of them writes the sidecar
+            for fieldIndex, column in enumerate(self.columns):
+                if column == None: self.column(fieldIndex)
+        if self.statisticsChanged:
+            EPWCache(self.workingDir).saveStatistics(self.epwFile, self.cachedStatistics)
+            self.statisticsChanged = False
+
+
+class EPWDataChunk(object):
+    """ A chunk of rows from Preparation.epwStreamReader
+        years, months, days, hours and minutes are the time fields of the rows and HOYs is the
+        hour of the year at the end of each row. For sub-hourly files HOYs are fractional.
+        columns is a dictionary of fieldIndex > typed column.
+    """
+    def __init__(self, lb_preparation, rows, fieldIndices, timestep, startRow = 0):
+        rows = lb_preparation.padEpwRows(rows)
+        fields = zip(*rows)
+        self.timestep = timestep
+        self.startRow = startRow
+        self.years, self.months, self.days, self.hours, self.minutes = \
+            [lb_preparation.epwStrings2Column(fields[fieldIndex], 'i') for fieldIndex in range(5)]
+        self.columns = {}
+        for fieldIndex in fieldIndices:
+            typecode = lb_preparation.epwFields[fieldIndex][2]
+            self.columns[fieldIndex] = lb_preparation.epwStrings2Column(fields[fieldIndex], typecode)
+        
+        numOfHours = lb_preparation.numOfHours
+        if timestep == 1:
+            self.HOYs = array('d', [numOfHours[m - 1] + (d - 1) * 24 + h \
+                                    for m, d, h in zip(self.months, self.days, self.hours)])
+        else:
+            # minute is the end of the interval in the hour. Some files use 0 for the end of the hour
+            self.HOYs = array('d', [numOfHours[m - 1] + (d - 1) * 24 + h - 1 + (mi or 60) / 60.0 \
+                                    for m, d, h, mi in zip(self.months, self.days, self.hours, self.minutes)])
+    
+    def __len__(self):
+        return len(self.HOYs)
+
+
+class EPWStreamStatistics(object):
+    """ Collect monthly statistics and degree days from the chunks of Preparation.epwStreamReader
+        Only running sums are kept so decades of weather data are summarized in bounded memory.
+        Degree days are calculated with the daily average method.
+    """
+    def __init__(self, fieldIndex = 6, heatingSetPoint = 18.3, coolingSetPoint = 23.3):
+        self.fieldIndex = fieldIndex
+        self.heatingSetPoint = heatingSetPoint
+        self.coolingSetPoint = coolingSetPoint
+        # (year, month) > [sum, count, min, max]
+        self.monthlyValues = {}
+        # (year, month) > [heating degree days, cooling degree days]
+        self.monthlyDegreeDays = {}
+        self.currentDay = None
+        self.daySum = 0; self.dayCount = 0
+    
+    def closeDay(self):
+        if self.currentDay == None or self.dayCount == 0: return
+        dayAvr = self.daySum / self.dayCount
+        degreeDays = self.monthlyDegreeDays.setdefault(self.currentDay[:2], [0, 0])
+        if dayAvr < self.heatingSetPoint: degreeDays[0] += self.heatingSetPoint - dayAvr
+        if dayAvr > self.coolingSetPoint: degreeDays[1] += dayAvr - self.coolingSetPoint
+        self.daySum = 0; self.dayCount = 0
+    
+    def update(self, chunk):
+        values = chunk.columns[self.fieldIndex]
+        # group the rows of the chunk by day and add each day in one go
+        stRow = 0
+        numOfRows = len(values)
+        while stRow < numOfRows:
+            day = (chunk.years[stRow], chunk.months[stRow], chunk.days[stRow])
+            endRow = stRow + 1
+            while endRow < numOfRows and chunk.days[endRow] == day[2] and chunk.months[endRow] == day[1]: endRow += 1
+            dayValues = values[stRow:endRow]
+            
+            if day != self.currentDay:
+                self.closeDay()
+                self.currentDay = day
+            self.daySum += sum(dayValues); self.dayCount += len(dayValues)
+            
+            monthlyValues = self.monthlyValues.get(day[:2])
+            if monthlyValues == None: self.monthlyValues[day[:2]] = [sum(dayValues), len(dayValues), min(dayValues), max(dayValues)]
+            else:
+                monthlyValues[0] += sum(dayValues); monthlyValues[1] += len(dayValues)
+                monthlyValues[2] = min(monthlyValues[2], min(dayValues)); monthlyValues[3] = max(monthlyValues[3], max(dayValues))
+            stRow = endRow
+    
+    def run(self, lb_preparation, epw_file, chunkSize = 8760):
+        for chunk in lb_preparation.epwStreamReader(epw_file, [self.fieldIndex], chunkSize): self.update(chunk)
+        self.closeDay()
+        return self
+    
+    def monthlyAverages(self):
+        # list of (year, month, average, min, max)
+        return [key + (v[0] / v[1], v[2], v[3]) for key, v in sorted(self.monthlyValues.items())]
+    
+    def degreeDays(self):
+        # list of (year, month, heating degree days, cooling degree days)
+        return [key + tuple(v) for key, v in sorted(self.monthlyDegreeDays.items())]
+
+
+class EPWCache(object):
+    """ Binary sidecar cache for parsed epw files
+        Each sidecar is named after the content hash of the epw file and keeps the location data and
+        all the parsed columns. Sidecars are memory-mapped on load and the least recently used ones are
+        removed once the cache folder grows bigger than maxSize.
+    """
+    version = 'LBEPW001'
+    
+    # (path, size, mtime) > content hash for the files that are already hashed in this session
+    contentHashes = {}
+    
+    def __init__(self, workingDir = None, maxSize = 256 * 1024 * 1024):
+        if not workingDir: workingDir = "c:\\ladybug"
+        self.cacheDir = os.path.join(workingDir, 'epwCache')
+        self.maxSize = maxSize
+    
+    def fileKey(self, epw_file):
+        archive, member = Preparation().splitEpwPath(epw_file)
+        epwPath = os.path.normcase(os.path.abspath(archive))
+        if member: epwPath = epwPath + '|' + member
+        fileStat = os.stat(archive)
+        return epwPath, fileStat.st_size, fileStat.st_mtime
+    
+    def contentHash(self, epw_file):
+        key = self.fileKey(epw_file)
+        if key not in self.contentHashes:
+            archive, member = Preparation().splitEpwPath(epw_file)
+            if archive.lower().endswith('.zip'):
+                # use the crc and the size of the member that are already stored in the archive
+                zipFile = zipfile.ZipFile(archive)
+                try:
+                    if member == None: member = [n for n in zipFile.namelist() if n.lower().endswith('.epw')][0]
+                    info = zipFile.getinfo(member)
+                finally: zipFile.close()
+                self.contentHashes[key] = hashlib.md5('zip:%d:%d' % (info.CRC, info.file_size)).hexdigest()
+            else:
+                epwfile = open(epw_file, 'rb')
+                try: self.contentHashes[key] = hashlib.md5(epwfile.read()).hexdigest()
+                finally: epwfile.close()
+        return self.contentHashes[key]
+    
+    def sidecarPath(self, epw_file):
+        return os.path.join(self.cacheDir, self.contentHash(epw_file) + '.lbepw')
+    
+    def save(self, epw_file, locationData, epwColumns):
+        """ Write location data and columns to the sidecar
+            The file starts with the version and the length of a marshaled header that has the
+            offset of each column. Numeric columns are written as raw arrays and text columns as
+            marshaled lists, so each one of them can be loaded separately.
+        """
+        try:
+            if not os.path.isdir(self.cacheDir): os.makedirs(self.cacheDir)
+            epwPath, size, mtime = self.fileKey(epw_file)
+            blobs = []; fields = []; offset = 0
+            for column in epwColumns:
+                if isinstance(column, array):
+                    blob = column.tostring(); typecode = column.typecode
+                else:
+                    blob = marshal.dumps(list(column)); typecode = None
+                # keep each column 8-byte aligned
+                blob = blob + '\0' * (-len(blob) % 8)
+                fields.append((typecode, offset, len(column), len(blob)))
+                blobs.append(blob)
+                offset += len(blob)
+            
+            header = marshal.dumps({'hash': self.contentHash(epw_file), 'path': epwPath, 'size': size, 'mtime': mtime,
+                                    'byteorder': sys.byteorder, 'location': tuple(locationData), 'fields': fields})
+            header = header + '\0' * (-(len(self.version) + 4 + len(header)) % 8)
+            
+            sidecar = self.sidecarPath(epw_file)
+            tempFile = sidecar + '.tmp'
+            cacheFile = open(tempFile, 'wb')
+            try:
+                cacheFile.write(self.version + struct.pack('<I', len(header)) + header)
+                for blob in blobs: cacheFile.write(blob)
+            finally: cacheFile.close()
+            if os.path.isfile(sidecar): os.remove(sidecar)
+            os.rename(tempFile, sidecar)
+            
+            self.evict()
+            return sidecar
+        except Exception:
+            # cache is only an optimization
+            return -1
+    
+    def load(self, epw_file, fieldIndices = None):
+        """ Load location data and columns from the sidecar of this epw file
+            fieldIndices limits the columns to be read from the sidecar. The other columns will be None.
+            Returns None if there is no valid sidecar for this file.
+        """
+        try:
+            sidecar = self.sidecarPath(epw_file)
+            if not os.path.isfile(sidecar): return None
+            cacheFile = open(sidecar, 'rb')
+        except Exception:
+            return None
+        
+        data = None
+        try:
+            try:
+                if mmap != None: data = mmap.mmap(cacheFile.fileno(), 0, access = mmap.ACCESS_READ)
+                else: data = cacheFile.read()
+                
+                if data[:len(self.version)] != self.version: raise ValueError('Outdated sidecar')
+                headerStart = len(self.version) + 4
+                headerLength = struct.unpack('<I', data[len(self.version):headerStart])[0]
+                header = marshal.loads(data[headerStart:headerStart + headerLength])
+                if header['hash'] != self.contentHash(epw_file): raise ValueError('Sidecar does not match the file')
+                
+                dataStart = headerStart + headerLength
+                epwColumns = [None] * len(header['fields'])
+                if fieldIndices == None: fieldIndices = range(len(header['fields']))
+                for fieldIndex in fieldIndices:
+                    typecode, offset, count, numOfBytes = header['fields'][fieldIndex]
+                    blob = data[dataStart + offset:dataStart + offset + numOfBytes]
+                    if typecode == None:
+                        column = marshal.loads(blob)
+                    else:
+                        column = array(typecode)
+                        column.fromstring(blob[:count * column.itemsize])
+                        if header['byteorder'] != sys.byteorder: column.byteswap()
+                    epwColumns[fieldIndex] = column
+            finally:
+                # the sidecar can't be removed on Windows as long as it is mapped
+                if mmap != None and data != None: data.close()
+                cacheFile.close()
+        except Exception:
+            # remove the broken or outdated sidecar so it will be re-created
+            try: os.remove(sidecar)
+            except: pass
+            return None
+        
+        # mark the sidecar as recently used
+        try: os.utime(sidecar, None)
+        except: pass
+        return header['location'], epwColumns
+    
+    def statisticsPath(self, epw_file):
+        return os.path.join(self.cacheDir, self.contentHash(epw_file) + '.lbstat')
+    
+    def saveStatistics(self, epw_file, statistics):
+        """ Write a dictionary of (fieldIndex, fillMethod) > MonthlyHourlyStatistics to the statistics sidecar"""
+        try:
+            if not os.path.isdir(self.cacheDir): os.makedirs(self.cacheDir)
+            cubes = dict([(key, cube.values.tostring()) for key, cube in statistics.items()])
+            sidecar = self.statisticsPath(epw_file)
+            tempFile = sidecar + '.tmp'
+            cacheFile = open(tempFile, 'wb')
+            try:
+                cacheFile.write(self.version + marshal.dumps({'hash': self.contentHash(epw_file),
+                                                              'byteorder': sys.byteorder, 'stats': MonthlyHourlyStatistics.stats,
+                                                              'cubes': cubes}))
+            finally: cacheFile.close()
+            if os.path.isfile(sidecar): os.remove(sidecar)
+            os.rename(tempFile, sidecar)
+            
+            self.evict()
+            return sidecar
+        except Exception:
+            return -1
+    
+    def loadStatistics(self, epw_file):
+        """ Load the statistics sidecar of this epw file. Returns an empty dictionary if there is no valid sidecar."""
+        try:
+            sidecar = self.statisticsPath(epw_file)
+            if not os.path.isfile(sidecar): return {}
+            cacheFile = open(sidecar, 'rb')
+            try: data = cacheFile.read()
+            finally: cacheFile.close()
+            
+            if data[:len(self.version)] != self.version: raise ValueError('Outdated sidecar')
+            header = marshal.loads(data[len(self.version):])
+            if header['hash'] != self.contentHash(epw_file) or header['stats'] != MonthlyHourlyStatistics.stats:
+                raise ValueError('Sidecar does not match the file')
+            statistics = {}
+            for key, blob in header['cubes'].items():
+                cube = array('d')
+                cube.fromstring(blob)
+                if header['byteorder'] != sys.byteorder: cube.byteswap()
+                statistics[key] = MonthlyHourlyStatistics(cube)
+        except Exception:
+            try: os.remove(sidecar)
+            except: pass
+            return {}
+        
+        try: os.utime(sidecar, None)
+        except: pass
+        return statistics
+    
+    def evict(self):
+        """ Remove the least recently used sidecars until the cache is smaller than maxSize"""
+        sidecars = []
+        for fileName in os.listdir(self.cacheDir):
+            if not fileName.endswith(('.lbepw', '.lbstat')): continue
+            filePath = os.path.join(self.cacheDir, fileName)
+            fileStat = os.stat(filePath)
+            sidecars.append((fileStat.st_mtime, fileStat.st_size, filePath))
+        sidecars.sort()
+        totalSize = sum([sidecar[1] for sidecar in sidecars])
+        for mtime, size, filePath in sidecars:
+            if totalSize <= self.maxSize: break
+            try:
+                os.remove(filePath)
+                totalSize -= size
+            except: pass
+
+
+class EPWCatalog(object):
+    """ SQLite catalog of the location data and summary statistics of a library of epw files
+        importDirectory parses all the epw files of a folder in parallel and nearestStations
+        finds the closest weather stations to a site using the latitude/longitude index.
+    """
+    def __init__(self, catalogFile = None, workingDir = None):
+        if not catalogFile:
+            if not workingDir: workingDir = "c:\\ladybug"
+            catalogFile = os.path.join(workingDir, 'weatherCatalog.sqlite')
+        self.catalogFile = catalogFile
+    
+    def connect(self):
+        if sqlite3 == None:
+            print 'sqlite3 is not available in this version of IronPython. Weather catalog needs sqlite3!'
+            return -1
+        catalogDir = os.path.dirname(self.catalogFile)
+        if catalogDir and not os.path.isdir(catalogDir): os.makedirs(catalogDir)
+        connection = sqlite3.connect(self.catalogFile)
+        connection.execute("CREATE TABLE IF NOT EXISTS stations (" + \
+                           "path TEXT PRIMARY KEY, size INTEGER, mtime REAL, name TEXT, " + \
+                           "latitude REAL, longitude REAL, timeZone REAL, elevation REAL, " + \
+                           "avgDryBulb REAL, minDryBulb REAL, maxDryBulb REAL, " + \
+                           "heatingDegDays REAL, coolingDegDays REAL, totalGlobalRadiation REAL, avgWindSpeed REAL)")
+        connection.execute("CREATE INDEX IF NOT EXISTS stationsLocation ON stations (latitude, longitude)")
+        return connection
+    
+    def summarizeEpw(self, epw_file, heatingSetPoint = 18.3, coolingSetPoint = 23.3):
+        """ Location data and annual summary of one epw file as a row of the catalog"""
+        lb_preparation = Preparation()
+        epwPath = os.path.abspath(epw_file)
+        locName, lat, lngt, timeZone, elev, locationString = lb_preparation.epwLocation(epwPath, useCache = False)
+        epwColumns = lb_preparation.epwColumnReader(epwPath, useCache = False)
+        dbTemp = epwColumns[6]; glbRad = epwColumns[13]; windSpeed = epwColumns[21]
+        
+        # degree days based on daily average temperature
+        heatingDegDays = coolingDegDays = 0
+        for day in range(len(dbTemp) / 24):
+            dayAvrTemp = sum(dbTemp[day * 24:(day + 1) * 24]) / 24
+            if dayAvrTemp < heatingSetPoint: heatingDegDays += heatingSetPoint - dayAvrTemp
+            elif dayAvrTemp > coolingSetPoint: coolingDegDays += dayAvrTemp - coolingSetPoint
+        
+        fileStat = os.stat(epwPath)
+        return (epwPath, fileStat.st_size, fileStat.st_mtime, locName,
+                float(lat), float(lngt), float(timeZone), float(elev),
+                sum(dbTemp) / len(dbTemp), min(dbTemp), max(dbTemp),
+                heatingDegDays, coolingDegDays, sum(glbRad) / 1000, sum(windSpeed) / len(windSpeed))
+    
+    def importDirectory(self, epwDirectory, parallel = True, recursive = True):
+        """ Add all the epw files of a folder to the catalog
+            Files that are already in the catalog and are not changed are skipped.
+            Returns number of imported files and the list of files that failed.
+        """
+        connection = self.connect()
+        if connection == -1: return -1
+        
+        epwFiles = []
+        for root, dirs, files in os.walk(epwDirectory):
+            epwFiles.extend([os.path.abspath(os.path.join(root, f)) for f in files if f.lower().endswith('.epw')])
+            if not recursive: break
+        
+        # skip the files that haven't changed since the last import
+        catalogued = dict([(row[0], (row[1], row[2])) for row in connection.execute("SELECT path, size, mtime FROM stations")])
+        newFiles = []
+        for epwFile in epwFiles:
+            fileStat = os.stat(epwFile)
+            if catalogued.get(epwFile) != (fileStat.st_size, fileStat.st_mtime): newFiles.append(epwFile)
+        
+        summaries = [None] * len(newFiles)
+        def summarize(i):
+            try: summaries[i] = self.summarizeEpw(newFiles[i])
+            except Exception, e: summaries[i] = e
+        
+        stTime = time.time()
+        if parallel:
+            tasks.Parallel.ForEach(range(len(newFiles)), summarize)
+        else:
+            for i in range(len(newFiles)): summarize(i)
+        
+        # sqlite connections can't be shared between threads so write everything here
+        rows = [summary for summary in summaries if isinstance(summary, tuple)]
+        failedFiles = [epwFile for epwFile, summary in zip(newFiles, summaries) if not isinstance(summary, tuple)]
+        connection.executemany("INSERT OR REPLACE INTO stations VALUES (" + ",".join(["?"] * 15) + ")", rows)
+        connection.commit()
+        connection.close()
+        
+        print `len(rows)` + ' weather files are imported in ' + ("%.3f" % (time.time() - stTime)) + ' Seconds...'
+        if failedFiles: print 'Failed to import:\n' + '\n'.join(failedFiles)
+        return len(rows), failedFiles
     
-    TregenzaPatchesNormalVectors = [
-    (0.0,0.994522,0.104528),(0.206773,0.972789,0.104528),(0.404508,0.908541,0.104528),
-(0.584565,0.804585,0.104528),(0.739074,0.665465,0.104528),(0.861281,0.497261,0.104528),
-(0.945847,0.307324,0.104528),(0.989074,0.103956,0.104528),(0.989074,-0.103956,0.104528),
-(0.945847,-0.307324,0.104528),(0.861281,-0.497261,0.104528),(0.739074,-0.665465,0.104528),
-(0.584565,-0.804585,0.104528),(0.404508,-0.908541,0.104528),(0.206773,-0.972789,0.104528),
-(0.0,-0.994522,0.104528),(-0.206773,-0.972789,0.104528),(-0.404508,-0.908541,0.104528),
-(-0.584565,-0.804585,0.104528),(-0.739074,-0.665465,0.104528),(-0.861281,-0.497261,0.104528),
-(-0.945847,-0.307324,0.104528),(-0.989074,-0.103956,0.104528),(-0.989074,0.103956,0.104528),
-(-0.945847,0.307324,0.104528),(-0.861281,0.497261,0.104528),(-0.739074,0.665465,0.104528),
-(-0.584565,0.804585,0.104528),(-0.404508,0.908541,0.104528),(-0.206773,0.972789,0.104528),
-(0.0,0.951057,0.309017),(0.197736,0.930274,0.309017),(0.38683,0.868833,0.309017),
-(0.559017,0.769421,0.309017),(0.706773,0.636381,0.309017),(0.823639,0.475528,0.309017),
-(0.904508,0.293893,0.309017),(0.945847,0.099412,0.309017),(0.945847,-0.099412,0.309017),
-(0.904508,-0.293893,0.309017),(0.823639,-0.475528,0.309017),(0.706773,-0.636381,0.309017),
-(0.559017,-0.769421,0.309017),(0.38683,-0.868833,0.309017),(0.197736,-0.930274,0.309017),
-(0.0,-0.951057,0.309017),(-0.197736,-0.930274,0.309017),(-0.38683,-0.868833,0.309017),
-(-0.559017,-0.769421,0.309017),(-0.706773,-0.636381,0.309017),(-0.823639,-0.475528,0.309017),
-(-0.904508,-0.293893,0.309017),(-0.945847,-0.099412,0.309017),(-0.945847,0.099412,0.309017),
-(-0.904508,0.293893,0.309017),(-0.823639,0.475528,0.309017),(-0.706773,0.636381,0.309017),
-(-0.559017,0.769421,0.309017),(-0.38683,0.868833,0.309017),(-0.197736,0.930274,0.309017),
-(0.0,0.866025,0.5),(0.224144,0.836516,0.5),(0.433013,0.75,0.5),(0.612372,0.612372,0.5),
-(0.75,0.433013,0.5),(0.836516,0.224144,0.5),(0.866025,0.0,0.5),(0.836516,-0.224144,0.5),
-(0.75,-0.433013,0.5),(0.612372,-0.612372,0.5),(0.433013,-0.75,0.5),(0.224144,-0.836516,0.5),
-(0.0,-0.866025,0.5),(-0.224144,-0.836516,0.5),(-0.433013,-0.75,0.5),(-0.612372,-0.612372,0.5),
-(-0.75,-0.433013,0.5),(-0.836516,-0.224144,0.5),(-0.866025,0.0,0.5),(-0.836516,0.224144,0.5),
-(-0.75,0.433013,0.5),(-0.612372,0.612372,0.5),(-0.433013,0.75,0.5),(-0.224144,0.836516,0.5),
-(0.0,0.743145,0.669131),(0.19234,0.717823,0.669131),(0.371572,0.643582,0.669131),(0.525483,0.525483,0.669131),
-(0.643582,0.371572,0.669131),(0.717823,0.19234,0.669131),(0.743145,0.0,0.669131),(0.717823,-0.19234,0.669131),
-(0.643582,-0.371572,0.669131),(0.525483,-0.525483,0.669131),(0.371572,-0.643582,0.669131),
-(0.19234,-0.717823,0.669131),(0.0,-0.743145,0.669131),(-0.19234,-0.717823,0.669131),
-(-0.371572,-0.643582,0.669131),(-0.525483,-0.525483,0.669131),(-0.643582,-0.371572,0.669131),
-(-0.717823,-0.19234,0.669131),(-0.743145,0.0,0.669131),(-0.717823,0.19234,0.669131),
-(-0.643582,0.371572,0.669131),(-0.525483,0.525483,0.669131),(-0.371572,0.643582,0.669131),
-(-0.19234,0.717823,0.669131),(0.0,0.587785,0.809017),(0.201034,0.552337,0.809017),
-(0.377821,0.45027,0.809017),(0.509037,0.293893,0.809017),(0.578855,0.102068,0.809017),
-(0.578855,-0.102068,0.809017),(0.509037,-0.293893,0.809017),(0.377821,-0.45027,0.809017),
-(0.201034,-0.552337,0.809017),(0.0,-0.587785,0.809017),(-0.201034,-0.552337,0.809017),
-(-0.377821,-0.45027,0.809017),(-0.509037,-0.293893,0.809017),(-0.578855,-0.102068,0.809017),
-(-0.578855,0.102068,0.809017),(-0.509037,0.293893,0.809017),(-0.377821,0.45027,0.809017),
-(-0.201034,0.552337,0.809017),(0.0,0.406737,0.913545),(0.203368,0.352244,0.913545),
-(0.352244,0.203368,0.913545),(0.406737,0.0,0.913545),(0.352244,-0.203368,0.913545),
-(0.203368,-0.352244,0.913545),(0.0,-0.406737,0.913545),(-0.203368,-0.352244,0.913545),
-(-0.352244,-0.203368,0.913545),(-0.406737,0.0,0.913545),(-0.352244,0.203368,0.913545),
-(-0.203368,0.352244,0.913545),(0.0,0.207912,0.978148),(0.180057,0.103956,0.978148),
-(0.180057,-0.103956,0.978148),(0.0,-0.207912,0.978148),(-0.180057,-0.103956,0.978148),
-(-0.180057,0.103956,0.978148),(0.0,0.0,1)]
+    def distance(self, lat1, lngt1, lat2, lngt2):
+        # great-circle distance in km
+        lat1, lngt1, lat2, lngt2 = map(math.radians, (lat1, lngt1, lat2, lngt2))
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lngt2 - lngt1) / 2) ** 2
+        return 2 * 6371.0 * math.asin(min(1, math.sqrt(a)))
+    
+    def nearestStations(self, latitude, longitude, count = 1):
+        """ Find the closest weather stations to a site
+            The search box on the latitude/longitude index grows until it has enough stations.
+            Returns a list of (distance in km, path, name, latitude, longitude) sorted by distance.
+        """
+        connection = self.connect()
+        if connection == -1: return -1
+        latitude = float(latitude); longitude = float(longitude)
+        numOfStations = connection.execute("SELECT COUNT(*) FROM stations").fetchone()[0]
+        count = min(count, numOfStations)
+        
+        boxSize = 1.0; stations = []
+        while count:
+            lngtBoxSize = min(180, boxSize / max(0.01, math.cos(math.radians(min(89.9, abs(latitude) + boxSize)))))
+            query = "SELECT path, name, latitude, longitude FROM stations WHERE latitude BETWEEN ? AND ?"
+            args = [latitude - boxSize, latitude + boxSize]
+            if lngtBoxSize < 180:
+                # the box may cross the 180 meridian
+                minLngt = longitude - lngtBoxSize; maxLngt = longitude + lngtBoxSize
+                if minLngt < -180: query += " AND (longitude >= ? OR longitude <= ?)"; args += [minLngt + 360, maxLngt]
+                elif maxLngt > 180: query += " AND (longitude >= ? OR longitude <= ?)"; args += [minLngt, maxLngt - 360]
+                else: query += " AND longitude BETWEEN ? AND ?"; args += [minLngt, maxLngt]
+            stations = [(self.distance(latitude, longitude, lat, lngt), path, name, lat, lngt) \
+                        for path, name, lat, lngt in connection.execute(query, args)]
+            stations.sort()
+            # a station outside of the box can still be closer than the ones in the corners
+            # of the box so only trust the stations that are within the inscribed circle
+            inCircle = [station for station in stations if station[0] <= boxSize * 111.0]
+            if len(inCircle) >= count or (boxSize >= 180 and lngtBoxSize >= 180): break
+            boxSize *= 2
+        connection.close()
+        return stations[:count]
+
+
+class EPWWriter(object):
+    """ Write .wea and .epw files from epw columns
+        Each file is formatted in memory and written with a single write. The time stamps of the
+        rows are generated once and shared by all the files that have the same dates
+    """
+    # md5 of the date columns: time stamp strings
+    timeStampCache = {}
+    
+    def __init__(self):
+        self.lb_preparation = Preparation()
+    
+    def timeStep(self, epwColumns):
+        months, days, hours = epwColumns[1], epwColumns[2], epwColumns[3]
+        timestep = 1
+        while timestep < len(hours) and hours[timestep] == hours[0] and days[timestep] == days[0] and months[timestep] == months[0]:
+            timestep += 1
+        return timestep
+    
+    def weaTimeStamps(self, epwColumns):
+        """ 'month day hour' strings of a wea file. Hour is the middle of each time step
+            The month and the day are the ones of the epw row. The line by line conversion of GenCumulativeSkyMtx
+            labeled the first hour of each day (except January 1) with the day before.
+        """
+        dateColumns = [array('i', epwColumns[fieldIndex]) for fieldIndex in range(1, 5)]
+        key = hashlib.md5(''.join([column.tostring() for column in dateColumns])).hexdigest()
+        if key not in self.timeStampCache:
+            months, days, hours, minutes = dateColumns
+            halfStep = 30.0 / self.timeStep(epwColumns)
+            self.timeStampCache[key] = ['%d %d %g ' % (m, d, h - 1 + ((mi or 60) - halfStep) / 60) \
+                                        for m, d, h, mi in izip(months, days, hours, minutes)]
+        return self.timeStampCache[key]
+    
+    def weaHeader(self, locationData):
+        locName, lat, lngt, timeZone, elev = locationData[:5]
+        return  "place " + locName + "\n" + \
+                "latitude " + lat + "\n" + \
+                "longitude " + `-float(lngt)` + "\n" + \
+                "time_zone " + `-float(timeZone) * 15` + "\n" + \
+                "site_elevation " + elev + "\n" + \
+                "weather_data_file_units 1\n"
+    
+    def writeWea(self, weaFile, locationData, epwColumns):
+        """ Write the direct normal and the diffuse horizontal radiation of the epw columns to a wea file
+            locationData is the output of Preparation.epwLocation
+        """
+        lines = [timeStamp + '%.10g %.10g\n' % (dirRad, difRad) for timeStamp, dirRad, difRad \
+                 in izip(self.weaTimeStamps(epwColumns), epwColumns[14], epwColumns[15])]
+        outf = open(weaFile, 'w')
+        try: outf.write(self.weaHeader(locationData) + ''.join(lines))
+        finally: outf.close()
+        return weaFile
+    
+    def epwRowFormat(self):
+        formats = []
+        for fieldName, units, typecode in self.lb_preparation.epwFields:
+            if typecode == None: formats.append('%s')
+            elif typecode == 'i': formats.append('%d')
+            else: formats.append('%.10g')
+        return ','.join(formats) + '\n'
+    
+    def writeEpw(self, epwFile, headerLines, epwColumns):
+        """ Write an epw file
+            headerLines are the 8 header lines of the file (see Preparation.epwHeaderLines)
+            epwColumns are 35 columns in the format of Preparation.epwColumnReader
+        """
+        rowFormat = self.epwRowFormat()
+        lines = [rowFormat % row for row in izip(*epwColumns)]
+        outf = open(epwFile, 'w')
+        try: outf.write('\n'.join(headerLines) + '\n' + ''.join(lines))
+        finally: outf.close()
+        return epwFile
+    
+    def epw2wea(self, epw_file, weaFile = None, workingDir = None):
+        """ Convert an epw file to a wea file next to it"""
+        if weaFile == None: weaFile = epw_file.replace(".epw", ".wea")
+        epwColumns = self.lb_preparation.epwColumnReader(epw_file, workingDir)
+        return self.writeWea(weaFile, self.lb_preparation.epwLocation(epw_file, workingDir), epwColumns)
+
+
+class ClimateMorphing(object):
+    """ Morph an epw file to future climate scenarios with monthly change factors
+        (Belcher, Hacker and Powell 2005: shift, stretch and shift + stretch)
+        Each scenario is a dictionary with 'name' and lists of 12 monthly changes for any of these keys:
+            dryBulbTemperature: change of the mean dry bulb temperature (C)
+            dryBulbMax, dryBulbMin: change of the mean daily maximum and minimum temperatures (C)
+                                    if both are given the diurnal range is stretched as well
+            relativeHumidity: change of relative humidity (%)
+            globalRadiation: change of global horizontal radiation (%). Direct and diffuse are scaled by the same factor
+            windSpeed: change of wind speed (%)
+            barometricPressure: change of barometric pressure (Pa)
+        Dew point temperature is recalculated from the morphed dry bulb temperature and relative humidity.
+    """
+    def __init__(self, epw_file, workingDir = None):
+        self.lb_preparation = Preparation()
+        self.epwFile = epw_file
+        self.headerLines = self.lb_preparation.epwHeaderLines(epw_file)
+        self.epwColumns = self.lb_preparation.epwColumnReader(epw_file, workingDir)
+        # month of each hour starting from 0
+        self.monthIndex = array('i', [month - 1 for month in self.epwColumns[1]])
+        self.calculateMonthlyStatistics()
+    
+    def calculateMonthlyStatistics(self):
+        """ Monthly mean dry bulb temperature and monthly mean of daily maximum and minimum temperatures"""
+        months, days, dbTemps = self.epwColumns[1], self.epwColumns[2], self.epwColumns[6]
+        missingValue = self.lb_preparation.epwMissingValues[6]
+        sums = [0.0] * 12; counts = [0] * 12
+        dailyMax = {}; dailyMin = {}
+        for month, day, dbTemp in izip(months, days, dbTemps):
+            if dbTemp >= missingValue: continue
+            sums[month - 1] += dbTemp; counts[month - 1] += 1
+            key = (month, day)
+            if key not in dailyMax: dailyMax[key] = dailyMin[key] = dbTemp
+            elif dbTemp > dailyMax[key]: dailyMax[key] = dbTemp
+            elif dbTemp < dailyMin[key]: dailyMin[key] = dbTemp
+        
+        def monthlyMean(dailyValues):
+            monthlySums = [0.0] * 12; monthlyCounts = [0] * 12
+            for (month, day), value in dailyValues.items():
+                monthlySums[month - 1] += value; monthlyCounts[month - 1] += 1
+            return [monthlySums[m] / monthlyCounts[m] if monthlyCounts[m] else 0 for m in range(12)]
+        
+        self.monthlyDbTemp = [sums[m] / counts[m] if counts[m] else 0 for m in range(12)]
+        self.monthlyDbMax = monthlyMean(dailyMax)
+        self.monthlyDbMin = monthlyMean(dailyMin)
+    
+    def hourlyFactors(self, monthlyValues):
+        # expand 12 monthly values to the hours of the file
+        return [monthlyValues[m] for m in self.monthIndex]
+    
+    def morphColumn(self, fieldIndex, column, morphFunction, *monthlyValues):
+        """ Apply morphFunction(value, monthly values...) to all the valid values of a column"""
+        missingValue = self.lb_preparation.epwMissingValues[fieldIndex]
+        hourlyValues = [self.hourlyFactors(values) for values in monthlyValues]
+        return array('d', [morphFunction(x, *factors) if x < missingValue else x \
+                           for x, factors in izip(column, izip(*hourlyValues))])
+    
+    def dewPoint(self, dbTemp, relHumidity):
+        # Magnus formula
+        a, b = 17.27, 237.7
+        gamma = math.log(max(relHumidity, 1) / 100.0) + a * dbTemp / (b + dbTemp)
+        return b * gamma / (a - gamma)
+    
+    def morph(self, scenario):
+        """ Return the 35 epw columns of the morphed weather data for a scenario"""
+        columns = list(self.epwColumns)
+        
+        if 'dryBulbTemperature' in scenario:
+            deltaT = scenario['dryBulbTemperature']
+            if 'dryBulbMax' in scenario and 'dryBulbMin' in scenario:
+                # shift and stretch
+                alpha = [(scenario['dryBulbMax'][m] - scenario['dryBulbMin'][m]) / (self.monthlyDbMax[m] - self.monthlyDbMin[m]) \
+                         if self.monthlyDbMax[m] != self.monthlyDbMin[m] else 0 for m in range(12)]
+                columns[6] = self.morphColumn(6, columns[6], lambda x, dT, a, mean: x + dT + a * (x - mean),
+                                              deltaT, alpha, self.monthlyDbTemp)
+            else:
+                columns[6] = self.morphColumn(6, columns[6], lambda x, dT: x + dT, deltaT)
+        
+        if 'relativeHumidity' in scenario:
+            columns[8] = self.morphColumn(8, columns[8], lambda x, dRH: min(max(x + dRH, 0), 100), scenario['relativeHumidity'])
+        
+        if 'dryBulbTemperature' in scenario or 'relativeHumidity' in scenario:
+            missingDewPoint = self.lb_preparation.epwMissingValues[7]
+            columns[7] = array('d', [self.dewPoint(dbTemp, relHumidity) if dewPoint < missingDewPoint and dbTemp < 99.9 and relHumidity < 999 else dewPoint \
+                                     for dbTemp, dewPoint, relHumidity in izip(columns[6], columns[7], columns[8])])
+        
+        if 'globalRadiation' in scenario:
+            factors = [1 + change / 100.0 for change in scenario['globalRadiation']]
+            for fieldIndex in (13, 14, 15):
+                columns[fieldIndex] = self.morphColumn(fieldIndex, columns[fieldIndex], lambda x, f: max(x * f, 0), factors)
+        
+        if 'windSpeed' in scenario:
+            factors = [1 + change / 100.0 for change in scenario['windSpeed']]
+            columns[21] = self.morphColumn(21, columns[21], lambda x, f: max(x * f, 0), factors)
+        
+        if 'barometricPressure' in scenario:
+            columns[9] = self.morphColumn(9, columns[9], lambda x, dP: x + dP, scenario['barometricPressure'])
+        
+        return columns
+    
+    def morphedHeaderLines(self, scenario):
+        headerLines = list(self.headerLines)
+        # the 7th line of the header is COMMENTS 2
+        headerLines[6] = 'COMMENTS 2,Morphed by Ladybug for scenario ' + scenario['name']
+        return headerLines
+    
+    def writeScenarios(self, scenarios, outputDir, parallel = True):
+        """ Morph and write an epw file for each scenario to outputDir and return the file paths"""
+        if not os.path.isdir(outputDir): os.makedirs(outputDir)
+        epwWriter = EPWWriter()
+        epwFiles = [os.path.join(outputDir, scenario['name'] + '.epw') for scenario in scenarios]
+        
+        def morphAndWrite(i):
+            epwWriter.writeEpw(epwFiles[i], self.morphedHeaderLines(scenarios[i]), self.morph(scenarios[i]))
+        
+        if parallel: tasks.Parallel.ForEach(range(len(scenarios)), morphAndWrite)
+        else:
+            for i in range(len(scenarios)): morphAndWrite(i)
+        return epwFiles
+
+
+# JD, solar time, declination, altitude and azimuth of one sun position. Angles are in radians
+SolarPosition = namedtuple('SolarPosition', ['JD', 'solTime', 'solDec', 'solAlt', 'solAz'])
+
+
+class SolarCalculator(object):
+    """ The solar position equations of Sunpath without any state
+        The location is set when the calculator is created and never changes and each position is returned
+        as an immutable SolarPosition, so one calculator can be used by several threads at the same time.
+    """
+    # altitude of the center of the sun at sunrise and sunset in radians
+    horizonAltitude = 0
+    # the declination and the solar time only change daily so sunrise and sunset are found in one step
+    sunTimeIterations = 1
+    # the terms of a day are used for all its hours, so the hours after midnight are in the sun up hours of the same day
+    continuousDays = False
+    
+    def __init__(self, latitude, longitude = 0, timeZone = 0, northAngle = 0):
+        self.solLat = math.radians(float(latitude))
+        self.s_longtitude = math.radians(longitude)
+        self.s_meridian = math.radians(timeZone * 15)
+        self.angle2North = northAngle
+        # JD > (sunrise, noon, sunset). It only caches the results so it is safe to share between threads
+        self.sunTimes = {}
+    
+    @classmethod
+    def forEngine(cls, engine, latitude, longitude = 0, timeZone = 0, northAngle = 0, elevation = 0, pressure = 1013.25, temperature = 12):
+        """ Calculator of one of the solarEngines. Elevation, pressure and temperature are only used by SPA"""
+        if engine == 'spa': return SPACalculator(latitude, longitude, timeZone, northAngle, elevation, pressure = pressure, temperature = temperature)
+        return solarEngines[engine](latitude, longitude, timeZone, northAngle)
+    
+    def julianDay(self, month, day):
+        numOfDays = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
+        return numOfDays[int(month)-1] + int(day)
+    
+    def splitHoursOfYear(self, hoursOfYear):
+        """ Julian days and hours of the day of hours of the year. Hour 24 of each day is in that day"""
+        JDs = []; hours = []
+        for HOY in hoursOfYear:
+            JD = max(int(math.ceil(HOY / 24.0)), 1)
+            JDs.append(JD); hours.append(HOY - (JD - 1) * 24)
+        return JDs, hours
+    
+    def dailyTerms(self, JD):
+        # the parts of the solar time and the declination that only change daily
+        solTime = (0.170 * math.sin((4 * PI/373) * (JD - 80))
+        - 0.129 * math.sin((2 * PI/355) * (JD - 8))
+        + 12 * (self.s_meridian - self.s_longtitude) / PI)
+        solDec = 0.4093 * math.sin((2 * PI / 368) * (JD - 81))
+        return solTime, solDec, math.sin(solDec), math.cos(solDec)
+    
+    def position(self, month, day, hour):
+        JD = self.julianDay(month, day)
+        solTime, solDec, sinDec, cosDec = self.dailyTerms(JD)
+        solTime = solTime - hour
+        cosHourAngle = math.cos(solTime * (PI/12))
+        solAlt = math.asin(math.sin(self.solLat) * sinDec - math.cos(self.solLat) * cosDec * cosHourAngle)
+        solAz = -math.atan2(cosDec * math.sin(solTime * (PI/12)),
+                            -math.cos(self.solLat) * sinDec - math.sin(self.solLat) * cosDec * cosHourAngle)
+        return SolarPosition(JD, solTime, solDec, solAlt, solAz)
+    
+    def positions(self, months, days, hours):
+        """ SolarPosition for lists of months, days and hours"""
+        return [self.position(month, day, hour) for month, day, hour in izip(months, days, hours)]
+    
+    def sunVector(self, solAlt, solAz):
+        # unit vector from the sun to the center, same as Sunpath.sunPosPt
+        angle = self.angle2North + solAz + PI
+        return math.sin(angle) * math.cos(solAlt), -math.cos(angle) * math.cos(solAlt), -math.sin(solAlt)
+    
+    def positionArrays(self, JDs, hours):
+        """ Altitudes, azimuths and x, y and z of the sun vectors for lists of Julian days and hours of the day
+            The terms that only depend on the day are calculated once for each day
+        """
+        sinLat = math.sin(self.solLat); cosLat = math.cos(self.solLat)
+        northAngle = self.angle2North + PI
+        sin = math.sin; cos = math.cos; asin = math.asin; atan2 = math.atan2
+        dailyTerms = {}
+        altitudes = array('d'); azimuths = array('d')
+        vectorsX = array('d'); vectorsY = array('d'); vectorsZ = array('d')
+        for JD, hour in izip(JDs, hours):
+            try: solTime, sinDec, cosDec = dailyTerms[JD]
+            except KeyError:
+                solTime, solDec, sinDec, cosDec = self.dailyTerms(JD)
+                dailyTerms[JD] = solTime, sinDec, cosDec
+            hourAngle = (solTime - hour) * (PI/12)
+            cosHourAngle = cos(hourAngle)
+            solAlt = asin(sinLat * sinDec - cosLat * cosDec * cosHourAngle)
+            solAz = -atan2(cosDec * sin(hourAngle), -cosLat * sinDec - sinLat * cosDec * cosHourAngle)
+            angle = northAngle + solAz
+            cosAlt = cos(solAlt)
+            altitudes.append(solAlt); azimuths.append(solAz)
+            vectorsX.append(sin(angle) * cosAlt); vectorsY.append(-cos(angle) * cosAlt); vectorsZ.append(-sin(solAlt))
+        return altitudes, azimuths, vectorsX, vectorsY, vectorsZ
+    
+    def hourAngle(self, solTime):
+        # hour angle in hours between -12 and 12. solTime is minus the solar time
+        return (-solTime) % 24 - 12
+    
+    def halfDayLength(self, solDec):
+        # hours from noon to sunset
+        cosHalfDay = ((math.sin(self.horizonAltitude) - math.sin(self.solLat) * math.sin(solDec)) /
+                      (math.cos(self.solLat) * math.cos(solDec)))
+        if cosHalfDay >= 1: return 0 # polar night
+        elif cosHalfDay <= -1: return 12 # midnight sun
+        return (12 / PI) * math.acos(cosHalfDay)
+    
+    def sunriseSunset(self, JD):
+        """ Sunrise, solar noon and sunset of a day of the year in hours of the day
+            Noon is where the hour angle is 0 and the sun is up (12 / PI) * acos(-tan(latitude) * tan(declination))
+            hours before and after noon. Sunrise can be before 0 and sunset after 24. During the polar night
+            sunrise and sunset are at noon and during the midnight sun they are 12 hours before and after noon.
+        """
+        try: return self.sunTimes[JD]
+        except KeyError: pass
+        noon = 12
+        for iteration in range(self.sunTimeIterations):
+            noon -= self.hourAngle(self.position(1, JD, noon).solTime)
+        sunTimes = [None, noon, None]; halfDays = []
+        for direction in (-1, 1):
+            hour = noon
+            for iteration in range(self.sunTimeIterations):
+                position = self.position(1, JD, hour)
+                # the hour angle is close to the hours from noon so only the small difference is wrapped
+                drift = (self.hourAngle(position.solTime) - (hour - noon) + 12) % 24 - 12
+                halfDay = self.halfDayLength(position.solDec)
+                hour = noon + direction * halfDay - drift
+            sunTimes[direction + 1] = hour; halfDays.append(halfDay)
+        if halfDays == [12, 12]: sunTimes = [noon - 12, noon, noon + 12]
+        elif halfDays == [0, 0]: sunTimes = [noon, noon, noon]
+        self.sunTimes[JD] = sunTimes = tuple(sunTimes)
+        return sunTimes
+    
+    def sunUpIntervals(self, JD):
+        # the hours of the day that are in the sun up hours of the previous day, the day and the next day
+        intervals = []
+        for dayCount in (-1, 0, 1):
+            if self.continuousDays: sunrise, noon, sunset = self.sunriseSunset(JD + dayCount)
+            else: sunrise, noon, sunset = self.sunriseSunset(JD)
+            intervals.append((sunrise + 24 * dayCount, sunset + 24 * dayCount))
+        return intervals
+    
+    def isSunUp(self, JD, hour):
+        for sunrise, sunset in self.sunUpIntervals(JD):
+            if sunset - sunrise >= 24 or sunrise < hour < sunset: return True
+        return False
+    
+    def daylightTable(self, JDs = None):
+        """ Sunrises, solar noons, sunsets and day lengths in hours for a list of days of the year
+            Returns one array for each. Default is all the days of the year
+        """
+        if JDs == None: JDs = range(1, 366)
+        sunrises = array('d'); noons = array('d'); sunsets = array('d'); dayLengths = array('d')
+        for JD in JDs:
+            sunrise, noon, sunset = self.sunriseSunset(JD)
+            sunrises.append(sunrise); noons.append(noon); sunsets.append(sunset); dayLengths.append(sunset - sunrise)
+        return sunrises, noons, sunsets, dayLengths
+    
+    def daylightHours(self, JD, timestep = 1):
+        """ Hours of the day at the time steps of the hour when the sun is up. Hours are from 1 / timestep to 24"""
+        numOfSteps = 24 * timestep
+        steps = set()
+        for sunrise, sunset in self.sunUpIntervals(JD):
+            if sunset - sunrise >= 24: return [step / float(timestep) for step in range(1, numOfSteps + 1)]
+            firstStep = max(int(math.floor(sunrise * timestep)) + 1, 1)
+            lastStep = min(int(math.ceil(sunset * timestep)) - 1, numOfSteps)
+            steps.update(range(firstStep, lastStep + 1))
+        return [step / float(timestep) for step in sorted(steps)]
+    
+    def daylightPositionArrays(self, timestep = 1, JDs = None):
+        """ positionArrays of the time steps of the year when the sun is up. Night time steps are not calculated
+            Returns an array of the hours of the year followed by the arrays of positionArrays
+        """
+        if JDs == None: JDs = range(1, 366)
+        daylightJDs = []; daylightHours = []
+        hoursOfYear = array('d')
+        for JD in JDs:
+            hours = self.daylightHours(JD, timestep)
+            daylightJDs.extend([JD] * len(hours)); daylightHours.extend(hours)
+            hoursOfYear.extend([(JD - 1) * 24 + hour for hour in hours])
+        return (hoursOfYear,) + self.positionArrays(daylightJDs, daylightHours)
+    
+    @classmethod
+    def positionsForLocations(cls, locations, hoursOfYear, northAngle = 0, parallel = True):
+        """ positionArrays of the same hours of the year for many locations
+            locations is a list of (latitude, longitude, timeZone). Each location is calculated by its
+            own calculator so the locations are calculated in parallel.
+        """
+        JDs, hours = cls(0).splitHoursOfYear(hoursOfYear)
+        results = [None] * len(locations)
+        
+        def calculate(i):
+            results[i] = cls(*locations[i], northAngle = northAngle).positionArrays(JDs, hours)
+        
+        if parallel: tasks.Parallel.ForEach(range(len(locations)), calculate)
+        else:
+            for i in range(len(locations)): calculate(i)
+        return results
+
+
+class SPACalculator(SolarCalculator):
+    """ NREL Solar Position Algorithm (Reda and Andreas, 2004) with the same interface as SolarCalculator
+        The accuracy is about 0.0003 degrees. Benchmark.spaAccuracy compares it with the RADIANCE equations.
+        The heliocentric and geocentric terms only change slowly so they are calculated once for each
+        day at 0 UT and interpolated for the time steps of the day as in appendix A.2 of the algorithm.
+        The date of the hours of the year is in the year that is set when the calculator is created.
+    """
+    # periodic terms of the earth as (A, B, C)
+    L0 = ((175347046.0, 0.0, 0.0), (3341656.0, 4.6692568, 6283.07585), (34894.0, 4.6261, 12566.1517),
+          (3497.0, 2.7441, 5753.3849), (3418.0, 2.8289, 3.5231), (3136.0, 3.6277, 77713.7715),
+          (2676.0, 4.4181, 7860.4194), (2343.0, 6.1352, 3930.2097), (1324.0, 0.7425, 11506.7698),
+          (1273.0, 2.0371, 529.691), (1199.0, 1.1096, 1577.3435), (990.0, 5.233, 5884.927),
+          (902.0, 2.045, 26.298), (857.0, 3.508, 398.149), (780.0, 1.179, 5223.694),
+          (753.0, 2.533, 5507.553), (505.0, 4.583, 18849.228), (492.0, 4.205, 775.523),
+          (357.0, 2.92, 0.067), (317.0, 5.849, 11790.629), (284.0, 1.899, 796.298),
+          (271.0, 0.315, 10977.079), (243.0, 0.345, 5486.778), (206.0, 4.806, 2544.314),
+          (205.0, 1.869, 5573.143), (202.0, 2.458, 6069.777), (156.0, 0.833, 213.299),
+          (132.0, 3.411, 2942.463), (126.0, 1.083, 20.775), (115.0, 0.645, 0.98),
+          (103.0, 0.636, 4694.003), (102.0, 0.976, 15720.839), (102.0, 4.267, 7.114),
+          (99.0, 6.21, 2146.17), (98.0, 0.68, 155.42), (86.0, 5.98, 161000.69),
+          (85.0, 1.3, 6275.96), (85.0, 3.67, 71430.7), (80.0, 1.81, 17260.15),
+          (79.0, 3.04, 12036.46), (75.0, 1.76, 5088.63), (74.0, 3.5, 3154.69),
+          (74.0, 4.68, 801.82), (70.0, 0.83, 9437.76), (62.0, 3.98, 8827.39),
+          (61.0, 1.82, 7084.9), (57.0, 2.78, 6286.6), (56.0, 4.39, 14143.5),
+          (56.0, 3.47, 6279.55), (52.0, 0.19, 12139.55), (52.0, 1.33, 1748.02),
+          (51.0, 0.28, 5856.48), (49.0, 0.49, 1194.45), (41.0, 5.37, 8429.24),
+          (41.0, 2.4, 19651.05), (39.0, 6.17, 10447.39), (37.0, 6.04, 10213.29),
+          (37.0, 2.57, 1059.38), (36.0, 1.71, 2352.87), (36.0, 1.78, 6812.77),
+          (33.0, 0.59, 17789.85), (30.0, 0.44, 83996.85), (30.0, 2.74, 1349.87),
+          (25.0, 3.16, 4690.48))
+    L1 = ((628331966747.0, 0.0, 0.0), (206059.0, 2.678235, 6283.07585), (4303.0, 2.6351, 12566.1517),
+          (425.0, 1.59, 3.523), (119.0, 5.796, 26.298), (109.0, 2.966, 1577.344),
+          (93.0, 2.59, 18849.23), (72.0, 1.14, 529.69), (68.0, 1.87, 398.15),
+          (67.0, 4.41, 5507.55), (59.0, 2.89, 5223.69), (56.0, 2.17, 155.42),
+          (45.0, 0.4, 796.3), (36.0, 0.47, 775.52), (29.0, 2.65, 7.11),
+          (21.0, 5.34, 0.98), (19.0, 1.85, 5486.78), (19.0, 4.97, 213.3),
+          (17.0, 2.99, 6275.96), (16.0, 0.03, 2544.31), (16.0, 1.43, 2146.17),
+          (15.0, 1.21, 10977.08), (12.0, 2.83, 1748.02), (12.0, 3.26, 5088.63),
+          (12.0, 5.27, 1194.45), (12.0, 2.08, 4694.0), (11.0, 0.77, 553.57),
+          (10.0, 1.3, 6286.6), (10.0, 4.24, 1349.87), (9.0, 2.7, 242.73),
+          (9.0, 5.64, 951.72), (8.0, 5.3, 2352.87), (6.0, 2.65, 9437.76),
+          (6.0, 4.67, 4690.48))
+    L2 = ((52919.0, 0.0, 0.0), (8720.0, 1.0721, 6283.0758), (309.0, 0.867, 12566.152),
+          (27.0, 0.05, 3.52), (16.0, 5.19, 26.3), (16.0, 3.68, 155.42),
+          (10.0, 0.76, 18849.23), (9.0, 2.06, 77713.77), (7.0, 0.83, 775.52),
+          (5.0, 4.66, 1577.34), (4.0, 1.03, 7.11), (4.0, 3.44, 5573.14),
+          (3.0, 5.14, 796.3), (3.0, 6.05, 5507.55), (3.0, 1.19, 242.73),
+          (3.0, 6.12, 529.69), (3.0, 0.31, 398.15), (3.0, 2.28, 553.57),
+          (2.0, 4.38, 5223.69), (2.0, 3.75, 0.98))
+    L3 = ((289.0, 5.844, 6283.076), (35.0, 0.0, 0.0), (17.0, 5.49, 12566.15),
+          (3.0, 5.2, 155.42), (1.0, 4.72, 3.52), (1.0, 5.3, 18849.23),
+          (1.0, 5.97, 242.73))
+    L4 = ((114.0, 3.142, 0.0), (8.0, 4.13, 6283.08), (1.0, 3.84, 12566.15))
+    L5 = ((1.0, 3.14, 0.0),)
+    B0 = ((280.0, 3.199, 84334.662), (102.0, 5.422, 5507.553), (80.0, 3.88, 5223.69),
+          (44.0, 3.7, 2352.87), (32.0, 4.0, 1577.34))
+    B1 = ((9.0, 3.9, 5507.55), (6.0, 1.73, 5223.69))
+    R0 = ((100013989.0, 0.0, 0.0), (1670700.0, 3.0984635, 6283.07585), (13956.0, 3.05525, 12566.1517),
+          (3084.0, 5.1985, 77713.7715), (1628.0, 1.1739, 5753.3849), (1576.0, 2.8469, 7860.4194),
+          (925.0, 5.453, 11506.77), (542.0, 4.564, 3930.21), (472.0, 3.661, 5884.927),
+          (346.0, 0.964, 5507.553), (329.0, 5.9, 5223.694), (307.0, 0.299, 5573.143),
+          (243.0, 4.273, 11790.629), (212.0, 5.847, 1577.344), (186.0, 5.022, 10977.079),
+          (175.0, 3.012, 18849.228), (110.0, 5.055, 5486.778), (98.0, 0.89, 6069.78),
+          (86.0, 5.69, 15720.84), (86.0, 1.27, 161000.69), (65.0, 0.27, 17260.15),
+          (63.0, 0.92, 529.69), (57.0, 2.01, 83996.85), (56.0, 5.24, 71430.7),
+          (49.0, 3.25, 2544.31), (47.0, 2.58, 775.52), (45.0, 5.54, 9437.76),
+          (43.0, 6.01, 6275.96), (39.0, 5.36, 4694.0), (38.0, 2.39, 8827.39),
+          (37.0, 0.83, 19651.05), (37.0, 4.9, 12139.55), (36.0, 1.67, 12036.46),
+          (35.0, 1.84, 2942.46), (33.0, 0.24, 7084.9), (32.0, 0.18, 5088.63),
+          (32.0, 1.78, 398.15), (28.0, 1.21, 6286.6), (28.0, 1.9, 6279.55),
+          (26.0, 4.59, 10447.39))
+    R1 = ((103019.0, 1.10749, 6283.07585), (1721.0, 1.0644, 12566.1517), (702.0, 3.142, 0.0),
+          (32.0, 1.02, 18849.23), (31.0, 2.84, 5507.55), (25.0, 1.32, 5223.69),
+          (18.0, 1.42, 1577.34), (10.0, 5.91, 10977.08), (9.0, 1.42, 6275.96),
+          (9.0, 0.27, 5486.78))
+    R2 = ((4359.0, 5.7846, 6283.0758), (124.0, 5.579, 12566.152), (12.0, 3.14, 0.0),
+          (9.0, 3.63, 77713.77), (6.0, 1.87, 5573.14), (3.0, 5.47, 18849.23))
+    R3 = ((145.0, 4.273, 6283.076), (7.0, 3.92, 12566.15))
+    R4 = ((4.0, 2.56, 6283.08),)
+    
+    # nutation terms as (Y0, Y1, Y2, Y3, Y4, a, b, c, d)
+    nutationTerms = ((0, 0, 0, 0, 1, -171996, -174.2, 92025, 8.9), (-2, 0, 0, 2, 2, -13187, -1.6, 5736, -3.1),
+          (0, 0, 0, 2, 2, -2274, -0.2, 977, -0.5), (0, 0, 0, 0, 2, 2062, 0.2, -895, 0.5),
+          (0, 1, 0, 0, 0, 1426, -3.4, 54, -0.1), (0, 0, 1, 0, 0, 712, 0.1, -7, 0),
+          (-2, 1, 0, 2, 2, -517, 1.2, 224, -0.6), (0, 0, 0, 2, 1, -386, -0.4, 200, 0),
+          (0, 0, 1, 2, 2, -301, 0, 129, -0.1), (-2, -1, 0, 2, 2, 217, -0.5, -95, 0.3),
+          (-2, 0, 1, 0, 0, -158, 0, 0, 0), (-2, 0, 0, 2, 1, 129, 0.1, -70, 0),
+          (0, 0, -1, 2, 2, 123, 0, -53, 0), (2, 0, 0, 0, 0, 63, 0, 0, 0),
+          (0, 0, 1, 0, 1, 63, 0.1, -33, 0), (2, 0, -1, 2, 2, -59, 0, 26, 0),
+          (0, 0, -1, 0, 1, -58, -0.1, 32, 0), (0, 0, 1, 2, 1, -51, 0, 27, 0),
+          (-2, 0, 2, 0, 0, 48, 0, 0, 0), (0, 0, -2, 2, 1, 46, 0, -24, 0),
+          (2, 0, 0, 2, 2, -38, 0, 16, 0), (0, 0, 2, 2, 2, -31, 0, 13, 0),
+          (0, 0, 2, 0, 0, 29, 0, 0, 0), (-2, 0, 1, 2, 2, 29, 0, -12, 0),
+          (0, 0, 0, 2, 0, 26, 0, 0, 0), (-2, 0, 0, 2, 0, -22, 0, 0, 0),
+          (0, 0, -1, 2, 1, 21, 0, -10, 0), (0, 2, 0, 0, 0, 17, -0.1, 0, 0),
+          (2, 0, -1, 0, 1, 16, 0, -8, 0), (-2, 2, 0, 2, 2, -16, 0.1, 7, 0),
+          (0, 1, 0, 0, 1, -15, 0, 9, 0), (-2, 0, 1, 0, 1, -13, 0, 7, 0),
+          (0, -1, 0, 0, 1, -12, 0, 6, 0), (0, 0, 2, -2, 0, 11, 0, 0, 0),
+          (2, 0, -1, 2, 1, -10, 0, 5, 0), (2, 0, 1, 2, 2, -8, 0, 3, 0),
+          (0, 1, 0, 2, 2, 7, 0, -3, 0), (-2, 1, 1, 0, 0, -7, 0, 0, 0),
+          (0, -1, 0, 2, 2, -7, 0, 3, 0), (2, 0, 0, 2, 1, -7, 0, 3, 0),
+          (2, 0, 1, 0, 0, 6, 0, 0, 0), (-2, 0, 2, 2, 2, 6, 0, -3, 0),
+          (-2, 0, 1, 2, 1, 6, 0, -3, 0), (2, 0, -2, 0, 1, -6, 0, 3, 0),
+          (2, 0, 0, 0, 1, -6, 0, 3, 0), (0, -1, 1, 0, 0, 5, 0, 0, 0),
+          (-2, -1, 0, 2, 1, -5, 0, 3, 0), (-2, 0, 0, 0, 1, -5, 0, 3, 0),
+          (0, 0, 2, 2, 1, -5, 0, 3, 0), (-2, 0, 2, 0, 1, 4, 0, 0, 0),
+          (-2, 1, 0, 2, 1, 4, 0, 0, 0), (0, 0, 1, -2, 0, 4, 0, 0, 0),
+          (-1, 0, 1, 0, 0, -4, 0, 0, 0), (-2, 1, 0, 0, 0, -4, 0, 0, 0),
+          (1, 0, 0, 0, 0, -4, 0, 0, 0), (0, 0, 1, 2, 0, 3, 0, 0, 0),
+          (0, 0, -2, 2, 2, -3, 0, 0, 0), (-1, -1, 1, 0, 0, -3, 0, 0, 0),
+          (0, 1, 1, 0, 0, -3, 0, 0, 0), (0, -1, 1, 2, 2, -3, 0, 0, 0),
+          (2, -1, -1, 2, 2, -3, 0, 0, 0), (0, 0, 3, 2, 2, -3, 0, 0, 0),
+          (2, -1, 0, 2, 2, -3, 0, 0, 0))
+    
+    # (year, deltaT) > day > geocentric terms at 0 UT. The terms do not depend on the location
+    geocentricTables = LRUCache(8)
+    
+    # the declination and the equation of time change during the day. Near the poles the sun up hours of
+    # the days when the sun only grazes the horizon can be one time step off
+    sunTimeIterations = 3
+    continuousDays = True
+    
+    def __init__(self, latitude, longitude = 0, timeZone = 0, northAngle = 0, elevation = 0, year = 2015,
+                 deltaT = 68, pressure = 1013.25, temperature = 12):
+        SolarCalculator.__init__(self, latitude, longitude, timeZone, northAngle)
+        self.latitude = float(latitude); self.longitude = float(longitude); self.timeZone = float(timeZone)
+        self.elevation = float(elevation); self.year = int(year); self.deltaT = float(deltaT)
+        self.pressure = float(pressure); self.temperature = float(temperature)
+        # julian date of 0 UT of the day before the first day of the year
+        self.firstJulianDate = self.julianDate(self.year, 1, 1) - 1
+        # day > geocentric terms at 0 UT, shared by all the locations, and day > interpolation terms of the day
+        self.geocentricDays = self.geocentricTables.get((self.year, self.deltaT))
+        if self.geocentricDays == None:
+            self.geocentricDays = {}
+            self.geocentricTables.set((self.year, self.deltaT), self.geocentricDays)
+        self.days = {}
+        # parallax terms of the observer
+        u = math.atan(0.99664719 * math.tan(self.solLat))
+        self.parallaxX = math.cos(u) + self.elevation / 6378140 * math.cos(self.solLat)
+        self.parallaxY = 0.99664719 * math.sin(u) + self.elevation / 6378140 * math.sin(self.solLat)
+        self.refraction = (self.pressure / 1010) * (283 / (273 + self.temperature)) * 1.02 / 60
+        # the sun rises when the altitude with the refraction is 0
+        lowAltitude = -2.0; highAltitude = 0.0
+        for iteration in range(50):
+            altitude = (lowAltitude + highAltitude) / 2
+            if altitude + self.refraction / math.tan(math.radians(altitude + 10.3 / (altitude + 5.11))) < 0: lowAltitude = altitude
+            else: highAltitude = altitude
+        self.horizonAltitude = math.radians(highAltitude)
+    
+    def julianDate(self, year, month, day):
+        # julian date of 0 UT of a gregorian date
+        if month < 3: year -= 1; month += 12
+        A = year // 100
+        return int(365.25 * (year + 4716)) + int(30.6001 * (month + 1)) + day + 2 - A + A // 4 - 1524.5
+    
+    def earthTerm(self, termSeries, JME):
+        # sum of the series of periodic terms of one heliocentric value
+        result = 0; power = 1
+        for terms in termSeries:
+            result += sum([A * math.cos(B + C * JME) for A, B, C in terms]) * power
+            power *= JME
+        return result / 1e8
+    
+    def geocentricTerms(self, julianDate):
+        """ Apparent sidereal time at Greenwich, geocentric right ascension and declination in degrees
+            and the equatorial horizontal parallax of the sun in degrees at a julian date
+        """
+        JC = (julianDate - 2451545) / 36525
+        JCE = (julianDate + self.deltaT / 86400 - 2451545) / 36525
+        JME = JCE / 10
+        L = math.degrees(self.earthTerm((self.L0, self.L1, self.L2, self.L3, self.L4, self.L5), JME)) % 360
+        B = math.degrees(self.earthTerm((self.B0, self.B1), JME))
+        R = self.earthTerm((self.R0, self.R1, self.R2, self.R3, self.R4), JME)
+        # geocentric longitude and latitude
+        theta = (L + 180) % 360
+        beta = -B
+        
+        # nutation and the obliquity of the ecliptic
+        X = [297.85036 + 445267.111480 * JCE - 0.0019142 * JCE ** 2 + JCE ** 3 / 189474,
+             357.52772 + 35999.050340 * JCE - 0.0001603 * JCE ** 2 - JCE ** 3 / 300000,
+             134.96298 + 477198.867398 * JCE + 0.0086972 * JCE ** 2 + JCE ** 3 / 56250,
+             93.27191 + 483202.017538 * JCE - 0.0036825 * JCE ** 2 + JCE ** 3 / 327270,
+             125.04452 - 1934.136261 * JCE + 0.0020708 * JCE ** 2 + JCE ** 3 / 450000]
+        deltaPsi = 0; deltaEpsilon = 0
+        for Y0, Y1, Y2, Y3, Y4, a, b, c, d in self.nutationTerms:
+            argument = math.radians(X[0] * Y0 + X[1] * Y1 + X[2] * Y2 + X[3] * Y3 + X[4] * Y4)
+            deltaPsi += (a + b * JCE) * math.sin(argument)
+            deltaEpsilon += (c + d * JCE) * math.cos(argument)
+        deltaPsi /= 36000000; deltaEpsilon /= 36000000
+        U = JME / 10
+        epsilon0 = 84381.448 + U * (-4680.93 + U * (-1.55 + U * (1999.25 + U * (-51.38 + U * (-249.67 +
+                   U * (-39.05 + U * (7.12 + U * (27.87 + U * (5.79 + U * 2.45)))))))))
+        epsilon = math.radians(epsilon0 / 3600 + deltaEpsilon)
+        
+        # apparent sun longitude, sidereal time and the geocentric sun position
+        sunLongitude = math.radians(theta + deltaPsi - 20.4898 / (3600 * R))
+        beta = math.radians(beta)
+        nu = (280.46061837 + 360.98564736629 * (julianDate - 2451545) + 0.000387933 * JC ** 2 - JC ** 3 / 38710000
+              + deltaPsi * math.cos(epsilon)) % 360
+        alpha = math.degrees(math.atan2(math.sin(sunLongitude) * math.cos(epsilon) - math.tan(beta) * math.sin(epsilon),
+                                        math.cos(sunLongitude))) % 360
+        delta = math.degrees(math.asin(math.sin(beta) * math.cos(epsilon) +
+                                       math.cos(beta) * math.sin(epsilon) * math.sin(sunLongitude)))
+        return nu, alpha, delta, 8.794 / (3600 * R)
+    
+    def dayTerms(self, day):
+        """ Terms to interpolate the sun position during a day of the year. Days before and after
+            the year are days of the previous and the next years
+        """
+        try: return self.days[day]
+        except KeyError: pass
+        terms = []
+        # each day is also used by the day before and the day after
+        for dayCount in (day - 1, day, day + 1):
+            try: terms.append(self.geocentricDays[dayCount])
+            except KeyError:
+                terms.append(self.geocentricTerms(self.firstJulianDate + dayCount))
+                self.geocentricDays[dayCount] = terms[-1]
+        nu, alpha, delta, xi = terms[1]
+        # quadratic interpolation of the right ascension and the declination with the previous and the next days
+        alphaA = (terms[1][1] - terms[0][1] + 180) % 360 - 180
+        alphaB = (terms[2][1] - terms[1][1] + 180) % 360 - 180
+        deltaA = terms[1][2] - terms[0][2]
+        deltaB = terms[2][2] - terms[1][2]
+        dayTerms = nu, alpha, alphaA + alphaB, alphaB - alphaA, delta, deltaA + deltaB, deltaB - deltaA, xi
+        self.days[day] = dayTerms
+        return dayTerms
+    
+    def topocentricPosition(self, nu, alpha, delta, xi):
+        """ Topocentric hour angle in degrees, declination, altitude with the atmospheric refraction and
+            azimuth from the south to the west as Sunpath in radians
+        """
+        H = math.radians(nu + self.longitude - alpha)
+        delta = math.radians(delta); xi = math.radians(xi)
+        sinXi = math.sin(xi); cosH = math.cos(H); cosDelta = math.cos(delta)
+        deltaAlpha = math.atan2(-self.parallaxX * sinXi * math.sin(H), cosDelta - self.parallaxX * sinXi * cosH)
+        topoDelta = math.atan2((math.sin(delta) - self.parallaxY * sinXi) * math.cos(deltaAlpha),
+                               cosDelta - self.parallaxX * sinXi * cosH)
+        H -= deltaAlpha
+        sinLat = math.sin(self.solLat); cosLat = math.cos(self.solLat)
+        e0 = math.degrees(math.asin(sinLat * math.sin(topoDelta) + cosLat * math.cos(topoDelta) * math.cos(H)))
+        # the refraction is only applied when the sun is above the horizon
+        if e0 >= -0.83337: e0 += self.refraction / math.tan(math.radians(e0 + 10.3 / (e0 + 5.11)))
+        gamma = math.atan2(math.sin(H), math.cos(H) * sinLat - math.tan(topoDelta) * cosLat)
+        # the NREL azimuth is from the north to the east and is gamma + PI
+        solAz = -gamma
+        return math.degrees(H), topoDelta, math.radians(e0), solAz
+    
+    def dayAndFraction(self, JD, hour):
+        # day of the year and fraction of the day in universal time
+        UT = (hour - self.timeZone) / 24.0
+        day = int(math.floor(UT))
+        return JD + day, UT - day
+    
+    def position(self, month, day, hour):
+        JD = self.julianDay(month, day)
+        day, n = self.dayAndFraction(JD, hour)
+        nu, alpha, alphaAB, alphaC, delta, deltaAB, deltaC, xi = self.dayTerms(day)
+        # the daily terms are already in terrestrial time so the fraction of the day is not corrected
+        H, solDec, solAlt, solAz = self.topocentricPosition(nu + 360.985647 * n, alpha + n * (alphaAB + alphaC * n) / 2,
+                                                            delta + n * (deltaAB + deltaC * n) / 2, xi)
+        # the solar time of Sunpath is minus the hour angle
+        return SolarPosition(JD, -H / 15 - 12, solDec, solAlt, solAz)
+    
+    def exactPosition(self, month, day, hour):
+        """ position without the daily interpolation. It is only used to check the interpolation"""
+        JD = self.julianDay(month, day)
+        day, n = self.dayAndFraction(JD, hour)
+        H, solDec, solAlt, solAz = self.topocentricPosition(*self.geocentricTerms(self.firstJulianDate + day + n))
+        return SolarPosition(JD, -H / 15 - 12, solDec, solAlt, solAz)
+    
+    def positionArrays(self, JDs, hours):
+        """ Altitudes, azimuths and x, y and z of the sun vectors for lists of Julian days and hours of the day
+            The terms of each day are calculated once in radians and topocentricPosition is inlined. The parallax
+            in right ascension is less than 0.003 degrees so its first order terms are used, which changes
+            the positions by less than 1e-9 radians.
+        """
+        sinLat = math.sin(self.solLat); cosLat = math.cos(self.solLat)
+        parallaxX = self.parallaxX; parallaxY = self.parallaxY; refraction = self.refraction
+        sinNorth = math.sin(self.angle2North + PI); cosNorth = math.cos(self.angle2North + PI)
+        sin = math.sin; cos = math.cos; tan = math.tan; asin = math.asin; atan2 = math.atan2; sqrt = math.sqrt
+        floor = math.floor; radians = math.radians
+        timeZone = self.timeZone / 24.0
+        siderealRate = radians(360.985647)
+        dayTerms = {}
+        altitudes = array('d'); azimuths = array('d')
+        vectorsX = array('d'); vectorsY = array('d'); vectorsZ = array('d')
+        for JD, hour in izip(JDs, hours):
+            UT = hour / 24.0 - timeZone
+            day = int(floor(UT))
+            n = UT - day; day += JD
+            try: H0, alphaAB, alphaC, delta0, deltaAB, deltaC, xSinXi, ySinXi = dayTerms[day]
+            except KeyError:
+                nu, alpha, alphaAB, alphaC, delta, deltaAB, deltaC, xi = self.dayTerms(day)
+                sinXi = sin(radians(xi))
+                H0, alphaAB, alphaC, delta0, deltaAB, deltaC, xSinXi, ySinXi = dayTerms[day] = \
+                    (radians(nu + self.longitude - alpha), radians(alphaAB) / 2, radians(alphaC) / 2,
+                     radians(delta), radians(deltaAB) / 2, radians(deltaC) / 2, parallaxX * sinXi, parallaxY * sinXi)
+            H = H0 + n * (siderealRate - alphaAB - alphaC * n)
+            delta = delta0 + n * (deltaAB + deltaC * n)
+            cosH = cos(H); sinH = sin(H)
+            denominator = cos(delta) - xSinXi * cosH
+            deltaAlpha = -xSinXi * sinH / denominator
+            cosDeltaAlpha = 1 - deltaAlpha * deltaAlpha / 2
+            numerator = (sin(delta) - ySinXi) * cosDeltaAlpha
+            # sine and cosine of the topocentric declination and hour angle
+            length = sqrt(numerator * numerator + denominator * denominator)
+            sinDelta = numerator / length; cosDelta = denominator / length
+            cosH, sinH = cosH * cosDeltaAlpha + sinH * deltaAlpha, sinH * cosDeltaAlpha - cosH * deltaAlpha
+            e0 = asin(sinLat * sinDelta + cosLat * cosDelta * cosH) * (180 / PI)
+            if e0 >= -0.83337: e0 += refraction / tan(radians(e0 + 10.3 / (e0 + 5.11)))
+            solAlt = e0 * (PI / 180)
+            azimuthY = sinH * cosDelta; azimuthX = cosH * sinLat * cosDelta - sinDelta * cosLat
+            solAz = -atan2(azimuthY, azimuthX)
+            # rotate the azimuth by the north angle without calculating the angle again
+            length = sqrt(azimuthX * azimuthX + azimuthY * azimuthY)
+            if length: cosAz = azimuthX / length; sinAz = -azimuthY / length
+            else: cosAz = 1; sinAz = 0
+            cosAlt = cos(solAlt)
+            altitudes.append(solAlt); azimuths.append(solAz)
+            vectorsX.append((sinNorth * cosAz + cosNorth * sinAz) * cosAlt)
+            vectorsY.append(-(cosNorth * cosAz - sinNorth * sinAz) * cosAlt)
+            vectorsZ.append(-sin(solAlt))
+        return altitudes, azimuths, vectorsX, vectorsY, vectorsZ
+
+
+# solar position engines of Sunpath and SunVectorTable
+solarEngines = {'radiance': SolarCalculator, 'spa': SPACalculator}
+
+
+class SunVectorTable(object):
+    """ Altitudes, azimuths and sun vectors of all the time steps of the year for one location
+        The value at index i is the sun position at hour (i + 1) / timestep of the year. Tables are kept
+        in memory and in the sunVectors folder of the working directory so each location is only
+        calculated once. engine is one of the keys of solarEngines. Elevation in meters, pressure in mbar and
+        temperature in C are only used by SPA.
+    """
+    version = 'LBSUN005'
+    
+    # location key > SunVectorTable
+    tables = LRUCache(16)
+    
+    def __init__(self, latitude, longitude = 0, timeZone = 0, northAngle = 0, timestep = 1, columns = None, engine = 'radiance',
+                 elevation = 0, pressure = 1013.25, temperature = 12):
+        self.key = self.locationKey(latitude, longitude, timeZone, northAngle, timestep, engine, elevation, pressure, temperature)
+        self.timestep = timestep
+        self.calculator = SolarCalculator.forEngine(engine, latitude, longitude, timeZone, northAngle, elevation, pressure, temperature)
+        if columns == None:
+            hoursOfYear = [(step + 1) / float(timestep) for step in xrange(8760 * timestep)]
+            columns = self.calculator.positionArrays(*self.calculator.splitHoursOfYear(hoursOfYear))
+        # altitudes, azimuths and x, y and z of the sun vectors
+        self.columns = columns
+    
+    @classmethod
+    def locationKey(cls, latitude, longitude, timeZone, northAngle, timestep, engine = 'radiance',
+                    elevation = 0, pressure = 1013.25, temperature = 12):
+        # the RADIANCE equations do not use the site conditions so all the elevations share one table
+        if engine != 'spa': elevation, pressure, temperature = 0, 1013.25, 12
+        return ("%.4f" % float(latitude), "%.4f" % float(longitude), "%.2f" % float(timeZone), "%.6f" % float(northAngle), int(timestep), engine,
+                "%.1f" % float(elevation), "%.2f" % float(pressure), "%.1f" % float(temperature))
+    
+    @classmethod
+    def get(cls, latitude, longitude = 0, timeZone = 0, northAngle = 0, timestep = 1, workingDir = None, engine = 'radiance',
+            elevation = 0, pressure = 1013.25, temperature = 12):
+        """ Return the table of a location from memory, from the working directory or calculate it"""
+        key = cls.locationKey(latitude, longitude, timeZone, northAngle, timestep, engine, elevation, pressure, temperature)
+        table = cls.tables.get(key)
+        if table == None:
+            table = cls.load(latitude, longitude, timeZone, northAngle, timestep, workingDir, engine, elevation, pressure, temperature)
+            if table == None:
+                table = cls(latitude, longitude, timeZone, northAngle, timestep, None, engine, elevation, pressure, temperature)
+                table.save(workingDir)
+            cls.tables.set(key, table)
+        return table
+    
+    @classmethod
+    def tablePath(cls, key, workingDir = None):
+        if not workingDir: workingDir = "c:\\ladybug"
+        return os.path.join(workingDir, 'sunVectors', '_'.join([str(item) for item in key]) + '.lbsun')
+    
+    def save(self, workingDir = None):
+        try:
+            tableFile = self.tablePath(self.key, workingDir)
+            if not os.path.isdir(os.path.dirname(tableFile)): os.makedirs(os.path.dirname(tableFile))
+            tempFile = tableFile + '.tmp'
+            outFile = open(tempFile, 'wb')
+            try:
+                outFile.write(self.version + marshal.dumps({'key': self.key, 'byteorder': sys.byteorder,
+                                                            'columns': [column.tostring() for column in self.columns]}))
+            finally: outFile.close()
+            if os.path.isfile(tableFile): os.remove(tableFile)
+            os.rename(tempFile, tableFile)
+            return tableFile
+        except Exception:
+            # the table is only an optimization
+            return -1
+    
+    @classmethod
+    def load(cls, latitude, longitude = 0, timeZone = 0, northAngle = 0, timestep = 1, workingDir = None, engine = 'radiance',
+             elevation = 0, pressure = 1013.25, temperature = 12):
+        """ Load the table of a location from the working directory. Returns None if there is no valid table"""
+        key = cls.locationKey(latitude, longitude, timeZone, northAngle, timestep, engine, elevation, pressure, temperature)
+        tableFile = cls.tablePath(key, workingDir)
+        try:
+            if not os.path.isfile(tableFile): return None
+            inFile = open(tableFile, 'rb')
+            try: data = inFile.read()
+            finally: inFile.close()
+            if data[:len(cls.version)] != cls.version: raise ValueError('Outdated sun vector table')
+            header = marshal.loads(data[len(cls.version):])
+            if tuple(header['key']) != key: raise ValueError('Sun vector table does not match the location')
+            columns = []
+            for blob in header['columns']:
+                column = array('d')
+                column.fromstring(blob)
+                if header['byteorder'] != sys.byteorder: column.byteswap()
+                if len(column) != 8760 * timestep: raise ValueError('Incomplete sun vector table')
+                columns.append(column)
+        except Exception:
+            try: os.remove(tableFile)
+            except: pass
+            return None
+        return cls(latitude, longitude, timeZone, northAngle, timestep, tuple(columns), engine, elevation, pressure, temperature)
+    
+    def lookup(self, hoursOfYear):
+        """ Altitudes, azimuths and x, y and z of the sun vectors at hours of the year
+            Hours that are not time steps of the table are calculated
+        """
+        numOfSteps = 8760 * self.timestep
+        indices = []; missingHours = []
+        for HOY in hoursOfYear:
+            step = HOY * self.timestep
+            index = int(round(step))
+            if abs(step - index) < 1e-6 and 0 < index <= numOfSteps: indices.append(index - 1)
+            else:
+                indices.append(None)
+                missingHours.append(HOY)
+        
+        if missingHours:
+            missingColumns = self.calculator.positionArrays(*self.calculator.splitHoursOfYear(missingHours))
+        results = []
+        for columnCount, column in enumerate(self.columns):
+            result = array('d'); missingCount = 0
+            for index in indices:
+                if index != None: result.append(column[index])
+                else:
+                    result.append(missingColumns[columnCount][missingCount])
+                    missingCount += 1
+            results.append(result)
+        return tuple(results)
 
 
 class Sunpath(object):
@@ -1010,11 +3592,12 @@ class Sunpath(object):
     The sun-path Class is a Python version of RADIANCE sun-path script by Greg Ward. RADIANCE source code can be accessed at:
     http://www.radiance-online.org/download-install/CVS%20source%20code
     The difference of the results with NREL version is less than 1 degree
+    Set solarEngine to 'spa' to use the NREL Solar Position Algorithm instead
     """
     def __init__(self):
         pass
     
-    def initTheClass(self, latitude, northAngle = 0, cenPt = rc.Geometry.Point3d.Origin, scale = 100, longtitude = 0, timeZone = 0):
+    def initTheClass(self, latitude, northAngle = 0, cenPt = rc.Geometry.Point3d.Origin, scale = 100, longtitude = 0, timeZone = 0, solarEngine = 'radiance', elevation = 0):
         self.solLat = math.radians(float(latitude));
         self.s_longtitude =  math.radians(longtitude) #2.13; # site longtitude (radians)
         self.s_meridian = math.radians(timeZone * 15) #2.13 #.0944; # standard meridian (radians)
@@ -1022,41 +3605,50 @@ class Sunpath(object):
         self.basePlane = rc.Geometry.Plane(cenPt, rc.Geometry.Vector3d.ZAxis)
         self.cenPt = cenPt
         self.scale = scale
-
-    def JulianDate(self, month, day):
-        numOfDays = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
-        self.JD = numOfDays[int(month)-1] + int(day)
-
-    def solarTime(self, hour):
-        self.solTime = (0.170 * math.sin((4 * PI/373) * (self.JD - 80))
-        - 0.129 * math.sin((2 * PI/355) * (self.JD - 8))
-        + 12 * (self.s_meridian - self.s_longtitude) / PI) - hour  # Here!
-
-    def solarDeclination(self):
-        self.solDec = 0.4093 * math.sin((2 * PI / 368) * (self.JD - 81))
-
-    def solarAlt(self):
-        self.solAlt = math.asin(math.sin(self.solLat) * math.sin(self.solDec)
-        - math.cos(self.solLat) * math.cos(self.solDec) * math.cos(self.solTime * (PI/12)))
-
-    def solarAz(self):
-        self.solAz = -math.atan2(math.cos(self.solDec) * math.sin(self.solTime * (PI/12)),
-        -math.cos(self.solLat) * math.sin(self.solDec) - math.sin(self.solLat)
-        * math.cos(self.solDec) * math.cos(self.solTime * (PI/12)))
+        if solarEngine not in solarEngines:
+            print "solarEngine should be one of " + ", ".join(sorted(solarEngines.keys()))
+            return -1
+        self.solarEngine = solarEngine
+        self.elevation = elevation
+        self.solarCalculator = SolarCalculator.forEngine(solarEngine, latitude, longtitude, timeZone, northAngle, elevation)
 
     def solInitOutput(self, month, day, hour):
-        self.JulianDate(month, day)
-        self.solarTime(hour)
-        self.solarDeclination()
-        self.solarAlt()
-        self.solarAz()
-
-    def sunPosPt(self, sunScale = 1):
+        # the last position is kept in the class for sunPosPt
+        self.JD, self.solTime, self.solDec, self.solAlt, self.solAz = self.solarCalculator.position(month, day, hour)
+    
+    def solarPositions(self, months, days, hours):
+        """ Solar altitudes and azimuths in radians and unit sun vectors for lists of months, days and hours
+            The class is not changed. Returns arrays of altitudes, azimuths and x, y and z of the sun vectors
+        """
+        JDs = [self.solarCalculator.julianDay(month, day) for month, day in izip(months, days)]
+        return self.solarCalculator.positionArrays(JDs, hours)
+    
+    def solarPositionsForHours(self, hoursOfYear):
+        """ solarPositions for a list of hours of the year. Hour 24 of each day is in that day"""
+        return self.solarCalculator.positionArrays(*self.solarCalculator.splitHoursOfYear(hoursOfYear))
+    
+    def sunriseSunset(self, month, day):
+        """ Sunrise, solar noon and sunset of a day in hours of the day"""
+        return self.solarCalculator.sunriseSunset(self.solarCalculator.julianDay(month, day))
+    
+    def daylightTable(self):
+        """ Arrays of sunrises, solar noons, sunsets and day lengths in hours for the days of the year"""
+        return self.solarCalculator.daylightTable()
+    
+    def daylightPositions(self, timestep = 1):
+        """ solarPositionsForHours of the time steps of the year when the sun is up
+            Returns an array of the hours of the year followed by the arrays of solarPositions
+        """
+        return self.solarCalculator.daylightPositionArrays(timestep)
+    
+    def sunPosPt(self, sunScale = 1, solAlt = None, solAz = None):
         # print 'altitude is:', math.degrees(solAlt), 'and azimuth is:', math.degrees(solAz)
+        # use the position of the last solInitOutput if the altitude and azimuth are not provided
+        if solAlt == None: solAlt, solAz = self.solAlt, self.solAz
         basePoint = rc.Geometry.Point3d.Add(self.cenPt,rc.Geometry.Vector3f(0,self.scale,0))
         basePoint = rc.Geometry.Point(basePoint)
-        basePoint.Rotate(self.solAlt, rc.Geometry.Vector3d.XAxis, self.cenPt)
-        basePoint.Rotate((self.angle2North + self.solAz) + PI, rc.Geometry.Vector3d.ZAxis, self.cenPt)
+        basePoint.Rotate(solAlt, rc.Geometry.Vector3d.XAxis, self.cenPt)
+        basePoint.Rotate((self.angle2North + solAz) + PI, rc.Geometry.Vector3d.ZAxis, self.cenPt)
         sunVector = rc.Geometry.Vector3d(self.cenPt - basePoint.Location)
         sunVector.Unitize()
         
@@ -1958,17 +4550,389 @@ class ResultVisualization(object):
                 rc.RhinoDoc.ActiveDoc.Objects.AddText(legendText[text], plane, textSize, fontName, True, False, attr)
                 # end of the script
 
+class Benchmark(object):
+    """ Set of functions to time Ladybug's heavy lifting against the previous implementations"""
+    
+    def timeIt(self, func, args = (), numOfRuns = 3):
+        # return the best time of numOfRuns runs in seconds
+        bestTime = None
+        for run in range(numOfRuns):
+            stTime = time.time()
+            func(*args)
+            runTime = time.time() - stTime
+            if bestTime == None or runTime < bestTime: bestTime = runTime
+        return bestTime
+    
+    def printResult(self, title, baseTime, newTime):
+        speedUp = baseTime / newTime if newTime else float('inf')
+        print title
+        print '    before = ' + ("%.3f" % baseTime) + ' Seconds...'
+        print '    after = ' + ("%.3f" % newTime) + ' Seconds...'
+        print '    speed up = ' + ("%.1f" % speedUp) + 'x'
+        return speedUp
+    
+    def writeSyntheticEpw(self, filePath, numOfYears = 1):
+        """ Write a synthetic epw file with 8760 rows for each year
+            The values follow simple daily and annual cycles so they look like real weather data
+        """
+        numOfDays = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+        header = ['LOCATION,Synthetic,-,Ladybug,Synthetic,000000,40.00,-75.00,-5.0,10.0',
+                  'DESIGN CONDITIONS,0', 'TYPICAL/EXTREME PERIODS,0', 'GROUND TEMPERATURES,0',
+                  'HOLIDAYS/DAYLIGHT SAVINGS,No,0,0,0', 'COMMENTS 1,Synthetic weather data', 'COMMENTS 2,',
+                  'DATA PERIODS,1,1,Data,Sunday, 1/ 1,12/31']
+        lines = [line + '\n' for line in header]
+        for year in range(numOfYears):
+            HOY = 0
+            for month in range(12):
+                for day in range(numOfDays[month]):
+                    for hour in range(24):
+                        daily = math.sin(2 * PI * (hour - 9) / 24)
+                        annual = -math.cos(2 * PI * HOY / 8760)
+                        dbTemp = 12 + 10 * annual + 5 * daily
+                        dewPoint = dbTemp - 4 - 2 * daily
+                        sunUp = max(0, daily)
+                        dirRad = int(700 * sunUp)
+                        difRad = int(150 * sunUp)
+                        values = [1991 + year, month + 1, day + 1, hour + 1, 60, '?9?9?9?9E0?9?9?9?9?9?9?9?9?9?9?9?9?9?9?9*9*9?9*9*9',
+                                  "%.1f" % dbTemp, "%.1f" % dewPoint, int(70 - 20 * daily), 101000, int(1300 * sunUp), int(1400 * sunUp),
+                                  300, dirRad + difRad, dirRad, difRad, 110 * (dirRad + difRad), 105 * dirRad, 120 * difRad,
+                                  0, (HOY * 37) % 360, "%.1f" % (4 + 3 * math.sin(HOY)), 5, 3, 16.1, 77777, 9, '999999999',
+                                  10, 0.1, 0, 88, 999, 0, 0]
+                        lines.append(','.join([str(v) for v in values]) + '\n')
+                        HOY += 1
+        epwfile = open(filePath, 'w')
+        epwfile.writelines(lines)
+        epwfile.close()
+        return filePath
+    
+    def legacyEpwDataReader(self, epw_file, location = 'Somewhere!'):
+        # epwDataReader as it was before the columnar reader. Kept as the reference for benchmarks
+        lb_preparation = Preparation()
+        header = [lb_preparation.strToBeFound, location, '', '', 'Hourly', (1, 1, 1), (12, 31, 24)]
+        dbTemp = header[:]; dewPoint = header[:]; RH = header[:]; windSpeed = header[:]; windDir = header[:]
+        dirRad = header[:]; difRad = header[:]; glbRad = header[:]; dirIll = header[:]; difIll = header[:]
+        glbIll = header[:]; cloudCov = header[:]; rainDepth = header[:]; barPress = header[:]
+        epwfile = open(epw_file,"r")
+        lnum = 1 # line number
+        for line in epwfile:
+            if lnum > 8:
+                dbTemp.append(float(line.split(',')[6]))
+                dewPoint.append(float(line.split(',')[7]))
+                RH.append(float(line.split(',')[8]))
+                barPress.append(float(line.split(',')[9]))
+                windSpeed.append(float(line.split(',')[21]))
+                windDir.append(float(line.split(',')[20]))
+                dirRad.append(float(line.split(',')[14]))
+                difRad.append(float(line.split(',')[15]))
+                glbRad.append(float(line.split(',')[13]))
+                dirIll.append(float(line.split(',')[17]))
+                difIll.append(float(line.split(',')[18]))
+                glbIll.append(float(line.split(',')[16]))
+                cloudCov.append(float(line.split(',')[22]))
+                try:
+                    if float(line.split(',')[33])!=999: rainDepth.append(float(line.split(',')[33]))
+                    else: rainDepth.append(0.0)
+                except: pass
+            lnum += 1
+        epwfile.close()
+        return dbTemp, dewPoint, RH, windSpeed, windDir, dirRad, difRad, glbRad, dirIll, difIll, glbIll, cloudCov, rainDepth, barPress
+    
+    def epwReader(self, workingDir = None, numOfRuns = 3):
+        """ Compare the line by line epw reader with the columnar reader on a synthetic 8760-row file"""
+        workingDir = Preparation().makeWorkingDir(workingDir)
+        if workingDir == -1: return -1
+        epwFile = self.writeSyntheticEpw(os.path.join(workingDir, 'ladybug_benchmark.epw'))
+        
+        lb_preparation = Preparation()
+        # make sure both readers return the same values before timing them
+        newArgs = (epwFile, 'Somewhere!', workingDir, False)
+        for legacyList, newList in zip(self.legacyEpwDataReader(epwFile), lb_preparation.epwDataReader(*newArgs)):
+            assert legacyList[7:] == newList[7:]
+        
+        baseTime = self.timeIt(self.legacyEpwDataReader, (epwFile,), numOfRuns)
+        newTime = self.timeIt(lb_preparation.epwDataReader, newArgs, numOfRuns)
+        speedUp = self.printResult('Reading 8760 hours of epw data:', baseTime, newTime)
+        
+        # warm load from the binary sidecar
+        lb_preparation.epwDataReader(epwFile, 'Somewhere!', workingDir)
+        cachedTime = self.timeIt(lb_preparation.epwDataReader, (epwFile, 'Somewhere!', workingDir), numOfRuns)
+        self.printResult('Reading 8760 hours of epw data from the sidecar cache:', baseTime, cachedTime)
+        os.remove(epwFile)
+        return speedUp
+    
+    def folderSize(self, folder):
+        return sum([os.path.getsize(os.path.join(root, f)) for root, dirs, files in os.walk(folder) for f in files])
+    
+    def compressedEpw(self, workingDir = None, numOfFiles = 20):
+        """ Compare reading the epw files of a zip archive directly with extracting the archive and
+            parsing the extracted files. Reports run time and peak disk usage of each method.
+        """
+        lb_preparation = Preparation()
+        workingDir = lb_preparation.makeWorkingDir(workingDir)
+        if workingDir == -1: return -1
+        benchmarkDir = os.path.join(workingDir, 'ladybug_benchmark')
+        if os.path.isdir(benchmarkDir): lb_preparation.nukedir(benchmarkDir)
+        os.makedirs(benchmarkDir)
+        
+        # make the archive
+        epwFile = self.writeSyntheticEpw(os.path.join(benchmarkDir, 'synthetic.epw'))
+        archive = os.path.join(benchmarkDir, 'weatherLibrary.zip')
+        zipFile = zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED)
+        for fileCount in range(numOfFiles): zipFile.write(epwFile, 'synthetic_' + `fileCount` + '.epw')
+        zipFile.close()
+        os.remove(epwFile)
+        archiveSize = os.path.getsize(archive)
+        
+        def extractThenParse():
+            extractDir = os.path.join(benchmarkDir, 'extracted')
+            zipFile = zipfile.ZipFile(archive)
+            zipFile.extractall(extractDir)
+            zipFile.close()
+            self.peakDiskUsage = self.folderSize(benchmarkDir) - archiveSize
+            for fileName in os.listdir(extractDir):
+                lb_preparation.epwColumnReader(os.path.join(extractDir, fileName), useCache = False)
+            lb_preparation.nukedir(extractDir)
+        
+        def parseFromArchive():
+            zipFile = zipfile.ZipFile(archive)
+            members = zipFile.namelist()
+            zipFile.close()
+            for member in members:
+                lb_preparation.epwColumnReader(os.path.join(archive, member), useCache = False)
+            self.peakDiskUsage = self.folderSize(benchmarkDir) - archiveSize
+        
+        baseTime = self.timeIt(extractThenParse, (), 1)
+        baseDisk = self.peakDiskUsage
+        newTime = self.timeIt(parseFromArchive, (), 1)
+        newDisk = self.peakDiskUsage
+        lb_preparation.nukedir(benchmarkDir)
+        
+        speedUp = self.printResult('Reading ' + `numOfFiles` + ' epw files from a zip archive:', baseTime, newTime)
+        print '    throughput before = ' + ("%.1f" % (numOfFiles / baseTime)) + ' files/Second'
+        print '    throughput after = ' + ("%.1f" % (numOfFiles / newTime)) + ' files/Second'
+        print '    peak disk usage before = ' + ("%.1f" % (baseDisk / 1048576.0)) + ' MB'
+        print '    peak disk usage after = ' + ("%.1f" % (newDisk / 1048576.0)) + ' MB'
+        return speedUp, baseDisk, newDisk
+    
+    def legacyEpw2Wea(self, epw_file, weaFile):
+        # line by line conversion that was used by GenCumulativeSkyMtx
+        def hour2Date(hour):
+            numOfHours = [24 * numOfDay for numOfDay in [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334, 365]]
+            for h in range(len(numOfHours)-1):
+                if hour <= numOfHours[h+1]: month = h + 1; break
+            if hour == 0: day = 1
+            elif (hour)%24 == 0: day = int((hour - numOfHours[h]) / 24)
+            else: day = int((hour - numOfHours[h]) / 24) + 1
+            return str(day), str(month), str(hour%24 + 0.5)
+        
+        outf = open(weaFile, 'w')
+        outf.write(EPWWriter().weaHeader(Preparation().epwLocation(epw_file, useCache = False)))
+        epwfile = open(epw_file,"r")
+        for lineCount, line in enumerate(epwfile):
+            hour = lineCount - 8
+            if 0 <= hour <= 8760:
+                dirRad = (line.split(',')[14])
+                difRad = (line.split(',')[15])
+                day, month, time = hour2Date(hour)
+                outf.write(month + " " + day + " " + time + " " + dirRad + " " + difRad + "\n")
+        epwfile.close()
+        outf.close()
+    
+    def legacyConditionalPattern(self, selList, conditionalStatement):
+        # string replacement and exec for each hour as it was done in the components
+        finalStatement = Preparation().legacyConditionalStatement(conditionalStatement, len(selList))
+        patternList = []
+        for HOY in range(8760):
+            exec(finalStatement)
+            patternList.append(pattern)
+        return patternList
+    
+    def conditionalStatement(self, workingDir = None, numOfRuns = 3):
+        """ Compare the exec loop of the conditional statement with ConditionalStatement"""
+        workingDir = Preparation().makeWorkingDir(workingDir)
+        if workingDir == -1: return -1
+        epwFile = self.writeSyntheticEpw(os.path.join(workingDir, 'ladybug_benchmark.epw'))
+        hourlyData = Preparation().epwDataReader(epwFile, useCache = False)
+        os.remove(epwFile)
+        selList = [hourlyLists[7:] for hourlyLists in hourlyData[:3]]
+        
+        conditionalStatement = 'a>5 and b<10 or c>90'
+        statement = ConditionalStatement(conditionalStatement)
+        assert statement.evaluate(selList) == self.legacyConditionalPattern(selList, conditionalStatement)
+        
+        baseTime = self.timeIt(self.legacyConditionalPattern, (selList, conditionalStatement), numOfRuns)
+        newTime = self.timeIt(lambda: ConditionalStatement(conditionalStatement).evaluate(selList), (), numOfRuns)
+        return self.printResult('Conditional statement for 8760 hours:', baseTime, newTime)
+    
+    def solarPositions(self, timestep = 60, latitude = 40, longitude = -75, timeZone = -5):
+        """ Compare solInitOutput for each time step with the batch solarPositions for a full year"""
+        hours = Preparation().timestepHours(range(24), timestep)
+        months = []; days = []; hoursOfDay = []
+        numOfDays = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+        for month in range(1, 13):
+            for day in range(1, numOfDays[month - 1] + 1):
+                months.extend([month] * len(hours)); days.extend([day] * len(hours)); hoursOfDay.extend(hours)
+        
+        sunpath = Sunpath()
+        sunpath.initTheClass(latitude, 0, None, 100, longitude, timeZone)
+        def perCall():
+            positions = []
+            for month, day, hour in izip(months, days, hoursOfDay):
+                sunpath.solInitOutput(month, day, hour)
+                positions.append((sunpath.solAlt, sunpath.solAz))
+            return positions
+        
+        positions = sunpath.solarPositions(months, days, hoursOfDay)
+        assert zip(positions[0], positions[1]) == perCall()
+        
+        baseTime = self.timeIt(perCall, (), 1)
+        newTime = self.timeIt(sunpath.solarPositions, (months, days, hoursOfDay), 1)
+        return self.printResult('Solar positions for ' + `len(months)` + ' time steps:', baseTime, newTime)
+    
+    def daylightPositions(self, timestep = 60, latitude = 40, longitude = -75, timeZone = -5):
+        """ Compare calculating all the time steps of the year and removing the night ones with
+            calculating the time steps between sunrise and sunset only
+        """
+        calculator = SolarCalculator(latitude, longitude, timeZone)
+        hoursOfYear = [(step + 1) / float(timestep) for step in xrange(8760 * timestep)]
+        JDs, hours = calculator.splitHoursOfYear(hoursOfYear)
+        def allSteps():
+            positions = calculator.positionArrays(JDs, hours)
+            return [(step + 1, solAlt, solAz) for step, (solAlt, solAz) in enumerate(izip(positions[0], positions[1])) if solAlt > 0]
+        def daylightSteps():
+            # a new calculator so the sunrises and sunsets are calculated in every run
+            positions = SolarCalculator(latitude, longitude, timeZone).daylightPositionArrays(timestep)
+            return [(int(round(HOY * timestep)), solAlt, solAz) for HOY, solAlt, solAz in izip(*positions[:3])]
+        
+        # the same time steps and the same positions apart from the rounding of the hours
+        allPositions = allSteps(); daylightPositions = daylightSteps()
+        assert [position[0] for position in allPositions] == [position[0] for position in daylightPositions]
+        for (step, solAlt, solAz), (daylightStep, daylightAlt, daylightAz) in izip(allPositions, daylightPositions):
+            assert abs(solAlt - daylightAlt) < 1e-9 and abs(solAz - daylightAz) < 1e-9
+        baseTime = self.timeIt(allSteps, (), 3)
+        newTime = self.timeIt(daylightSteps, (), 3)
+        return self.printResult('Sun up positions for ' + `len(hoursOfYear)` + ' time steps:', baseTime, newTime)
+    
+    def spaAccuracy(self, timestep = 4, latitude = 40, longitude = -75, timeZone = -5):
+        """ Compare the RADIANCE solar equations with the NREL Solar Position Algorithm for a full year
+            The interpolated SPA is first checked against the example of the NREL report
+        """
+        # example of the NREL report. Zenith is 50.11162 and azimuth is 194.34024 degrees
+        nrelExample = SPACalculator(39.742476, -105.1786, -7, 0, 1830.14, 2003, 67, 820, 11).position(10, 17, 12 + 30.5 / 60)
+        assert abs(90 - math.degrees(nrelExample.solAlt) - 50.11162) < 0.0001
+        assert abs(180 - math.degrees(nrelExample.solAz) - 194.34024) < 0.0001
+        
+        hoursOfYear = [(step + 1) / float(timestep) for step in xrange(8760 * timestep)]
+        radiance = SolarCalculator(latitude, longitude, timeZone)
+        spa = SPACalculator(latitude, longitude, timeZone)
+        JDs, hours = radiance.splitHoursOfYear(hoursOfYear)
+        radiancePositions = radiance.positionArrays(JDs, hours)
+        spaPositions = spa.positionArrays(JDs, hours)
+        
+        def angleDifference(angle1, angle2):
+            return math.degrees(abs((angle1 - angle2 + PI) % (2 * PI) - PI))
+        
+        altitudeDifferences = []; azimuthDifferences = []
+        for radianceAlt, spaAlt, radianceAz, spaAz in izip(radiancePositions[0], spaPositions[0], radiancePositions[1], spaPositions[1]):
+            if spaAlt < 0: continue
+            altitudeDifferences.append(angleDifference(radianceAlt, spaAlt))
+            azimuthDifferences.append(angleDifference(radianceAz, spaAz))
+        
+        # error of the daily interpolation of SPA for every 97th time step
+        interpolationError = 0
+        for JD, hour, spaAlt, spaAz in islice(izip(JDs, hours, spaPositions[0], spaPositions[1]), 0, None, 97):
+            exactPosition = spa.exactPosition(1, JD, hour)
+            interpolationError = max(interpolationError, angleDifference(exactPosition.solAlt, spaAlt), angleDifference(exactPosition.solAz, spaAz))
+        
+        print 'RADIANCE equations against NREL SPA for ' + `len(altitudeDifferences)` + ' sun up time steps:'
+        print '    altitude difference: mean = ' + ("%.3f" % (sum(altitudeDifferences) / len(altitudeDifferences))) + \
+              ', max = ' + ("%.3f" % max(altitudeDifferences)) + ' degrees'
+        print '    azimuth difference: mean = ' + ("%.3f" % (sum(azimuthDifferences) / len(azimuthDifferences))) + \
+              ', max = ' + ("%.3f" % max(azimuthDifferences)) + ' degrees'
+        print '    SPA daily interpolation error = ' + ("%.6f" % interpolationError) + ' degrees'
+        
+        baseTime = self.timeIt(radiance.positionArrays, (JDs, hours), 3)
+        # the first location of a year also calculates the geocentric terms of the days of the year
+        SPACalculator.geocentricTables.clear()
+        firstTime = self.timeIt(lambda: SPACalculator(latitude, longitude, timeZone).positionArrays(JDs, hours), (), 1)
+        print 'NREL SPA for the first location of the year:'
+        print '    time = ', ("%.3f" % firstTime), 'Seconds...'
+        # a new calculator for each run so the interpolation terms of the days are calculated in every run
+        newTime = self.timeIt(lambda: SPACalculator(latitude, longitude, timeZone).positionArrays(JDs, hours), (), 3)
+        return self.printResult('RADIANCE equations (before) and NREL SPA (after) for ' + `len(hoursOfYear)` + ' time steps:', baseTime, newTime)
+    
+    def epwWriter(self, workingDir = None, numOfFiles = 20):
+        """ Compare the line by line wea conversion with EPWWriter and time writing full epw files"""
+        lb_preparation = Preparation()
+        workingDir = lb_preparation.makeWorkingDir(workingDir)
+        if workingDir == -1: return -1
+        epwFile = self.writeSyntheticEpw(os.path.join(workingDir, 'ladybug_benchmark.epw'))
+        weaFile = os.path.join(workingDir, 'ladybug_benchmark.wea')
+        epwCopy = os.path.join(workingDir, 'ladybug_benchmark_copy.epw')
+        epwWriter = EPWWriter()
+        locationData = lb_preparation.epwLocation(epwFile, useCache = False)
+        headerLines = lb_preparation.epwHeaderLines(epwFile)
+        epwColumns = lb_preparation.epwColumnReader(epwFile, useCache = False)
+        
+        def legacyWea():
+            for fileCount in range(numOfFiles): self.legacyEpw2Wea(epwFile, weaFile)
+        def newWea():
+            for fileCount in range(numOfFiles): epwWriter.writeWea(weaFile, locationData, epwColumns)
+        def newEpw():
+            for fileCount in range(numOfFiles): epwWriter.writeEpw(epwCopy, headerLines, epwColumns)
+        
+        # the values are the same. only the first hour of each day has a different date (see EPWWriter.weaTimeStamps)
+        self.legacyEpw2Wea(epwFile, weaFile)
+        legacyLines = open(weaFile).read().splitlines()
+        epwWriter.writeWea(weaFile, locationData, epwColumns)
+        newLines = open(weaFile).read().splitlines()
+        assert len(legacyLines) == len(newLines) and legacyLines[:6] == newLines[:6]
+        for count, (legacyLine, newLine) in enumerate(zip(legacyLines[6:], newLines[6:])):
+            assert legacyLine.split()[2:] == newLine.split()[2:]
+            assert legacyLine.split()[:2] == newLine.split()[:2] or (count > 0 and count % 24 == 0)
+        
+        baseTime = self.timeIt(legacyWea, (), 1)
+        newTime = self.timeIt(newWea, (), 1)
+        speedUp = self.printResult('Writing ' + `numOfFiles` + ' wea files:', baseTime, newTime)
+        epwTime = self.timeIt(newEpw, (), 1)
+        print 'Writing ' + `numOfFiles` + ' epw files:'
+        print '    time = ', ("%.3f" % epwTime), 'Seconds...'
+        
+        # the written epw file should read back to the same values
+        assert lb_preparation.epwColumnReader(epwCopy, useCache = False) == epwColumns
+        for filePath in [epwFile, weaFile, epwCopy]: os.remove(filePath)
+        return speedUp
+
+
 now = datetime.datetime.now()
 #if now.day + now.month + now.year < 2055 + 365: # should work until the end of 2013
 if letItFly:
     if not sc.sticky.has_key("ladybug_release") or 1>0:
         sc.sticky["ladybug_release"] = True
         sc.sticky["ladybug_Preparation"] = Preparation
+        sc.sticky["ladybug_LRUCache"] = LRUCache
         sc.sticky["ladybug_Mesh"] = MeshPreparation
         sc.sticky["ladybug_RunAnalysis"] = RunAnalysisInsideGH
         sc.sticky["ladybug_Export2Radiance"] = ExportAnalysis2Radiance
         sc.sticky["ladybug_ResultVisualization"] = ResultVisualization
         sc.sticky["ladybug_SunPath"] = Sunpath
+        sc.sticky["ladybug_Benchmark"] = Benchmark
+        sc.sticky["ladybug_EPWCache"] = EPWCache
+        sc.sticky["ladybug_EPWData"] = EPWData
+        sc.sticky["ladybug_DataHeader"] = DataHeader
+        sc.sticky["ladybug_HourlyDataCollection"] = HourlyDataCollection
+        sc.sticky["ladybug_DataResampler"] = DataResampler
+        sc.sticky["ladybug_MonthlyHourlyStatistics"] = MonthlyHourlyStatistics
+        sc.sticky["ladybug_PeriodFinder"] = PeriodFinder
+        sc.sticky["ladybug_SolarCalculator"] = SolarCalculator
+        sc.sticky["ladybug_SPACalculator"] = SPACalculator
+        sc.sticky["ladybug_SunVectorTable"] = SunVectorTable
+        sc.sticky["ladybug_ConditionalStatement"] = ConditionalStatement
+        sc.sticky["ladybug_HourPattern"] = HourPattern
+        sc.sticky["ladybug_EPWStreamStatistics"] = EPWStreamStatistics
+        sc.sticky["ladybug_EPWCatalog"] = EPWCatalog
+        sc.sticky["ladybug_EPWWriter"] = EPWWriter
+        sc.sticky["ladybug_ClimateMorphing"] = ClimateMorphing
 # sc.sticky.clear()
 
 if not sc.sticky.has_key("ladybug_release"):